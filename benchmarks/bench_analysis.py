@@ -0,0 +1,87 @@
+"""
+"Which components must every path from the edge to X pass through?" on a
+synthetic graph: the path/upstream way (for each upstream node of X, check
+whether X is still reachable from the entries without it) vs graph.analysis
+(one dominator tree per graph version, then a walk up the tree per question).
+
+    python -m benchmarks.bench_analysis --nodes 20000 --targets 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import synthetic_graph
+from graph.query import QueryEngine
+from graph.storage import GraphStorage
+
+
+def reachable_without(storage, entries, target, removed) -> bool:
+    seen = set(entries) - {removed}
+    stack = list(seen)
+    while stack:
+        node = stack.pop()
+        if node == target:
+            return True
+        for nxt in storage.successors(node):
+            if nxt != removed and nxt not in seen and storage.get_edge(node, nxt).get('type') != 'owns':
+                seen.add(nxt)
+                stack.append(nxt)
+    return False
+
+
+def must_pass_through_naive(engine, entries, target):
+    """Upstream nodes of `target` whose removal cuts it off from the entries."""
+    if not reachable_without(engine.storage, entries, target, None):
+        return []
+    candidates = [n['id'] for n in engine.upstream(target)]
+    return sorted(c for c in candidates if c not in entries and not reachable_without(engine.storage, entries, target, c))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=20_000)
+    parser.add_argument("--targets", type=int, default=20)
+    args = parser.parse_args()
+
+    nodes, edges = synthetic_graph(args.nodes)
+    storage = GraphStorage(persistence_file=None)
+    for node in nodes:
+        storage.add_node(node)
+    for edge in edges:
+        storage.add_edge(edge)
+    engine = QueryEngine(storage)
+
+    rng = random.Random(0)
+    # Services nothing calls (the first layer) are where traffic enters
+    called = {e.target for e in edges if e.type == "calls"}
+    entries = [n.id for n in nodes if n.type == "service" and n.id not in called][:5]
+    targets = [n.id for n in rng.sample([n for n in nodes if n.type in ("service", "database")], args.targets)]
+    print(f"{args.nodes} nodes, {len(edges)} edges, {len(entries)} entries, {len(targets)} targets")
+
+    start = time.perf_counter()
+    naive = [must_pass_through_naive(engine, entries, t) for t in targets]
+    naive_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine.single_points_of_failure(entries=entries)
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    fast = [sorted(set(engine.single_points_of_failure(t, entries=entries)["must_pass_through"]) - set(entries))
+            for t in targets]
+    query_s = time.perf_counter() - start
+    assert fast == naive, "dominators disagree with the reachability check"
+
+    print(f"{'path/upstream checks:':<30}{naive_s * 1000 / len(targets):10.2f} ms/target")
+    print(f"{'dominator tree build:':<30}{build_s * 1000:10.2f} ms (once per graph version)")
+    print(f"{'dominator lookups:':<30}{query_s * 1000 / len(targets):10.3f} ms/target")
+    overall = engine.single_points_of_failure(entries=entries)["summary"]
+    print(f"{overall['dominator_count']} dominators, {overall['articulation_point_count']} articulation points, "
+          f"{overall['bridge_count']} splitting bridges")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Endpoint extraction from a synthetic docker-compose file with tens of
+thousands of env entries: the connector's former per-entry string splitting
+(http/postgres/redis only, target type re-derived from labels and image on
+every hit) vs connectors.endpoints (compiled URL parsing for every scheme,
+one name -> typed ID table per file). YAML parsing is excluded; the full
+DockerComposeConnector.parse time is shown for scale.
+
+    python -m benchmarks.bench_endpoints --services 2000 --env 25
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from connectors.docker_compose import DockerComposeConnector
+from connectors.endpoints import EndpointResolver, env_dict, infer_type
+
+TEMPLATES = [
+    "http://{svc}:8080", "https://{svc}:8443/api", "grpc://{svc}:50051",
+    "postgresql://app:secret@{db}:5432/app", "mysql://root:pw@{db}:3306/shop",
+    "mongodb://u:p@{db}:27017,{db}:27018/app?replicaSet=rs0", "redis://{cache}:6379/0",
+    "amqp://guest:guest@{queue}:5672/", "kafka://{queue}:9092", "info", "true", "8080", "/var/lib/app",
+]
+# Values that point at nothing: these should cost no more than the legacy splitting
+PLAIN = ["info", "true", "8080", "/var/lib/app"]
+
+
+def estate(services: int, env: int, seed: int = 0, templates=TEMPLATES) -> dict:
+    rng = random.Random(seed)
+    names = [f"svc-{i}" for i in range(services)]
+    dbs = [f"db-{i}" for i in range(max(1, services // 10))]
+    caches = [f"redis-{i}" for i in range(max(1, services // 50))]
+    queues = [f"queue-{i}" for i in range(max(1, services // 50))]
+    compose = {}
+    for name in names:
+        environment = []
+        for j in range(env):
+            value = rng.choice(templates).format(svc=rng.choice(names), db=rng.choice(dbs),
+                                                 cache=rng.choice(caches), queue=rng.choice(queues))
+            environment.append(f"VAR_{j}_URL={value}")
+        compose[name] = {"image": "example/app", "labels": {"team": "t"}, "environment": environment}
+    for db in dbs:
+        compose[db] = {"image": "postgres:16"}
+    for cache in caches:
+        compose[cache] = {"image": "redis:7"}
+    for queue in queues:
+        compose[queue] = {"image": "rabbitmq:3", "labels": {"type": "queue"}}
+    return compose
+
+
+def legacy_targets(services: dict) -> int:
+    """The pre-endpoints DockerComposeConnector env handling, edge count only."""
+    found = 0
+    for config in services.values():
+        env_vars = config.get('environment', [])
+        env = dict(item.split('=', 1) for item in env_vars if '=' in item)
+        for key, value in env.items():
+            target_service = None
+            if '_URL' in key:
+                if 'http://' in value:
+                    parts = value.split('http://')
+                    if len(parts) > 1:
+                        target_service = parts[1].split(':')[0]
+                elif 'postgresql://' in value or 'postgres://' in value:
+                    try:
+                        target_service = value.split('@')[1].split(':')[0]
+                    except IndexError:
+                        pass
+                elif 'redis://' in value:
+                    try:
+                        target_service = value.split('redis://')[1].split(':')[0]
+                    except IndexError:
+                        pass
+            if target_service and target_service in services:
+                tgt_conf = services.get(target_service, {})
+                tgt_lbl = tgt_conf.get('labels', {}) or {}
+                tgt_type = tgt_lbl.get('type', 'service')
+                if tgt_type == 'service':
+                    if 'postgres' in tgt_conf.get('image', '') or target_service.endswith('-db'):
+                        tgt_type = 'database'
+                    elif 'redis' in tgt_conf.get('image', '') or 'redis' in target_service:
+                        tgt_type = 'cache'
+                f"{tgt_type}:{target_service}"
+                found += 1
+    return found
+
+
+def shared_targets(services: dict) -> int:
+    ids = {name: f"{infer_type(config.get('labels') or {}, config.get('image', ''))}:{name}"
+           for name, config in services.items()}
+    resolver = EndpointResolver(ids, known_only=True)
+    return sum(len(resolver.resolve_all(env_dict(config.get('environment')))) for config in services.values())
+
+
+def best_of(fn, *args, repeat: int = 3):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--services", type=int, default=2000)
+    parser.add_argument("--env", type=int, default=25, help="env entries per service")
+    args = parser.parse_args()
+
+    services = estate(args.services, args.env)
+    entries = args.services * args.env
+    print(f"{args.services} services, {entries} env entries")
+
+    legacy_s, legacy_edges = best_of(legacy_targets, services)
+    shared_s, shared_edges = best_of(shared_targets, services)
+    print(f"{'legacy string splitting:':<30}{legacy_s * 1000:8.1f} ms {entries / legacy_s / 1e6:6.2f} M entries/s"
+          f"  {legacy_edges} edges")
+    print(f"{'connectors.endpoints:':<30}{shared_s * 1000:8.1f} ms {entries / shared_s / 1e6:6.2f} M entries/s"
+          f"  {shared_edges} edges (deduplicated, all schemes)")
+
+    plain = estate(args.services, args.env, templates=PLAIN)
+    legacy_plain_s, _ = best_of(legacy_targets, plain)
+    shared_plain_s, _ = best_of(shared_targets, plain)
+    print(f"{'non-endpoint entries only:':<30}{legacy_plain_s * 1000:8.1f} ms legacy, "
+          f"{shared_plain_s * 1000:.1f} ms connectors.endpoints")
+
+    path = os.path.join(tempfile.mkdtemp(), "docker-compose.yml")
+    with open(path, "w") as f:
+        yaml.safe_dump({"services": services}, f)
+    parse_s, (nodes, edges) = best_of(DockerComposeConnector().parse, path, repeat=1)
+    print(f"{'DockerComposeConnector.parse:':<30}{parse_s * 1000:8.1f} ms (YAML included), "
+          f"{len(nodes)} nodes, {len(edges)} edges")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Node resolution with typos: the FuzzyIndex (trigram filter + banded edit
+distance) vs the old substring scan over every node, on synthetic graphs of
+growing size. Reports index build time and memory, and median lookup time
+for names with one or two typos, plus how often the intended node is found.
+
+    python -m benchmarks.bench_fuzzy --sizes 10000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import synthetic_graph
+from graph.fuzzy import FuzzyIndex
+from graph.storage import GraphStorage
+
+
+def typo(rng: random.Random, text: str, edits: int) -> str:
+    chars = list(text)
+    for _ in range(edits):
+        i = rng.randrange(len(chars) - 1)
+        kind = rng.choice(("swap", "drop", "replace", "insert"))
+        if kind == "swap":
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        elif kind == "drop":
+            del chars[i]
+        elif kind == "replace":
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        else:
+            chars.insert(i, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+    return "".join(chars)
+
+
+def legacy_resolve(storage, query: str):
+    # The resolver before the index: one pass over all nodes, substring/plural heuristics
+    query_lower = query.lower()
+    candidates = []
+    for node_id, data in storage.iter_nodes():
+        node_name = data.get('name', '').lower()
+        if query_lower == node_id.lower() or query_lower == node_name:
+            return node_id
+        if query_lower in node_id.lower() or query_lower in node_name:
+            candidates.append(node_id)
+        if query_lower.rstrip('s') in node_name or query_lower.rstrip('s') in node_id:
+            candidates.append(node_id)
+    return min(candidates, key=len) if candidates else None
+
+
+def median_ms(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8}{'build s':>9}{'index MB':>10}{'edits':>7}{'index ms':>10}{'found':>8}"
+          f"{'scan ms':>9}{'found':>8}")
+    for size in args.sizes:
+        nodes, _ = synthetic_graph(size)
+        storage = GraphStorage(persistence_file=os.path.join(tempfile.mkdtemp(), "graph.json"))
+        for node in nodes:
+            storage.add_node(node)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        index = FuzzyIndex(storage)
+        build_s = time.perf_counter() - start
+        index_mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+
+        rng = random.Random(size)
+        services = [node for node in nodes if node.type == "service"]
+        for edits in (1, 2):
+            targets = [rng.choice(services) for _ in range(args.queries)]
+            queries = [typo(rng, node.name, edits) for node in targets]
+            found = sum(bool(hits) and hits[0][0] == node.id
+                        for node, hits in zip(targets, (index.lookup(q, limit=1) for q in queries)))
+            index_ms = median_ms(lambda q: index.lookup(q, limit=1), queries)
+            scan_queries = queries[:20]
+            scan_found = sum(legacy_resolve(storage, q) == node.id for node, q in zip(targets, scan_queries))
+            scan_ms = median_ms(lambda q: legacy_resolve(storage, q), scan_queries)
+            print(f"{size:>8}{build_s:>9.2f}{index_mb:>10.1f}{edits:>7}{index_ms:>10.3f}"
+                  f"{found / len(queries):>8.0%}{scan_ms:>9.1f}{scan_found / len(scan_queries):>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Graph history on a synthetic graph: a series of builds that each change a
+small fraction of the nodes, recorded by graph.history. Reports the history's
+size against keeping a full copy per build, the cost of materializing a past
+version (cold and from the LRU), and blast_radius latency on the current
+graph vs `as_of` a past version.
+
+    python -m benchmarks.bench_history --nodes 20000 --builds 20 --churn 0.01
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import synthetic_graph
+from connectors.base import Node
+from graph.history import GraphHistory
+from graph.query import QueryEngine
+from graph.storage import GraphStorage
+
+
+def median_ms(fn, args_list) -> float:
+    times = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=20_000)
+    parser.add_argument("--builds", type=int, default=20)
+    parser.add_argument("--churn", type=float, default=0.01, help="fraction of nodes changed per build")
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    nodes, edges = synthetic_graph(args.nodes)
+    storage = GraphStorage(persistence_file=os.path.join(tmp, "graph_data.json"))
+    for node in nodes:
+        storage.add_node(node)
+    for edge in edges:
+        storage.add_edge(edge)
+    history = GraphHistory(os.path.join(tmp, "history"))
+    engine = QueryEngine(storage, history=history)
+
+    rng = random.Random(0)
+    full_copies = 0
+    record_s = 0.0
+    for build in range(args.builds):
+        for node in rng.sample(nodes, max(1, int(len(nodes) * args.churn))):
+            storage.add_node(Node(node.id, node.type, node.name, {"build": build}))
+        start = time.perf_counter()
+        history.record(storage)
+        record_s += (time.perf_counter() - start) / args.builds
+        storage.save()
+        full_copies += os.path.getsize(storage.persistence_file)
+    stats = history.stats()
+    print(f"{args.nodes} nodes, {args.builds} builds changing {args.churn:.1%} of nodes each "
+          f"(record: {record_s * 1000:.0f} ms/build)")
+    print(f"{'full copy per build:':<28}{full_copies / 1e6:8.1f} MB")
+    print(f"{'history:':<28}{stats['bytes'] / 1e6:8.1f} MB ({stats['checkpoints']} checkpoints, "
+          f"{stats['versions'] - stats['checkpoints']} deltas)")
+
+    services = [(n.id,) for n in rng.sample([n for n in nodes if n.type == "service"], args.queries)]
+    past = max(1, args.builds // 2)
+    history._engines.clear()
+    start = time.perf_counter()
+    history.engine(past)
+    cold_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    history.engine(past)
+    warm_ms = (time.perf_counter() - start) * 1000
+    print(f"{'materialize, cold:':<28}{cold_ms:8.1f} ms")
+    print(f"{'materialize, cached:':<28}{warm_ms:8.3f} ms")
+
+    engine.blast_radius(services[0][0])
+    engine.blast_radius(services[0][0], as_of=past)
+    current = median_ms(engine.blast_radius, services)
+    historical = median_ms(lambda node_id: engine.blast_radius(node_id, as_of=past), services)
+    print(f"{'blast_radius, current:':<28}{current:8.2f} ms")
+    print(f"{f'blast_radius, as_of={past}:':<28}{historical:8.2f} ms ({historical / current:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
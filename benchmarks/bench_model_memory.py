@@ -0,0 +1,86 @@
+"""
+Bytes-per-edge comparison for connector output.
+
+Builds N edges the way a connector does (fresh type/key strings per parsed
+document) with the old dict-backed Edge class, the slotted Edge and EdgeBatch,
+and reports the traced allocation per edge.
+
+    python -m benchmarks.bench_model_memory --edges 200000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from connectors.base import Edge, EdgeBatch
+
+
+class LegacyEdge:
+    """The pre-slots Edge: per-instance __dict__ and a private properties dict."""
+    def __init__(self, id, type, source, target, properties=None):
+        self.id = id
+        self.type = type
+        self.source = source
+        self.target = target
+        self.properties = properties or {}
+
+
+def _fresh(s: str) -> str:
+    # YAML hands every document its own copy of "calls", "team", ...
+    return "".join(list(s))
+
+
+def _edge_args(i: int, services: int):
+    src = f"service-{i % services}"
+    dst = f"service-{(i * 7 + 1) % services}"
+    edge_type = _fresh("calls")
+    return (f"edge:{src}-{edge_type}-{dst}", edge_type, f"service:{src}", f"service:{dst}",
+            {_fresh("protocol"): "http"} if i % 10 == 0 else None)
+
+
+def measure(label: str, build, n: int, services: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    container = build(n, services)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_edge = current / n
+    print(f"{label:<22} {per_edge:>10.1f} bytes/edge")
+    del container
+    return per_edge
+
+
+def build_legacy(n, services):
+    return [LegacyEdge(*_edge_args(i, services)) for i in range(n)]
+
+
+def build_slotted(n, services):
+    return [Edge(*_edge_args(i, services)) for i in range(n)]
+
+
+def build_batch(n, services):
+    batch = EdgeBatch()
+    for i in range(n):
+        id, edge_type, src, dst, props = _edge_args(i, services)
+        batch.append(src, dst, edge_type, id, props)
+    return batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--services", type=int, default=5_000)
+    args = parser.parse_args()
+
+    print(f"{args.edges} edges over {args.services} services")
+    before = measure("legacy Edge (dict)", build_legacy, args.edges, args.services)
+    slotted = measure("slotted Edge", build_slotted, args.edges, args.services)
+    batch = measure("EdgeBatch", build_batch, args.edges, args.services)
+    print(f"slotted: {before / slotted:.2f}x smaller, batch: {before / batch:.2f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Path queries on deep synthetic graphs: networkx vs the bidirectional BFS
+path engine, for single shortest paths, k-shortest simple paths and
+multi-source queries.
+
+    python -m benchmarks.bench_paths --nodes 50000 --layers 64 --k 5
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import networkx as nx
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import synthetic_graph
+from graph.paths import find_paths, neighbor_functions
+from graph.storage import GraphStorage
+
+
+def timed(fn, runs):
+    samples = []
+    for args in runs:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=50_000)
+    parser.add_argument("--layers", type=int, default=64)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    nodes, edges = synthetic_graph(args.nodes, layers=args.layers)
+    storage = GraphStorage(persistence_file=os.path.join(tempfile.mkdtemp(), "graph.json"))
+    for node in nodes:
+        storage.add_node(node)
+    for edge in edges:
+        storage.add_edge(edge)
+    graph = storage.graph
+    succ, pred = neighbor_functions(storage, ["calls", "connects_to"])
+    deps = nx.subgraph_view(graph, filter_edge=lambda u, v: graph[u][v].get("type") in ("calls", "connects_to"))
+
+    services = [n.id for n in nodes if n.type == "service"]
+    rng = random.Random(1)
+    top = services[: len(services) // args.layers]
+    pairs = []
+    while len(pairs) < args.queries:
+        s = rng.choice(top)
+        reachable = [n for n in nx.descendants(deps, s) if n.startswith(("database:", "cache:"))]
+        if reachable:
+            pairs.append((s, rng.choice(reachable)))
+
+    print(f"{graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges, {args.layers} layers")
+    print(f"shortest path     networkx {timed(lambda s, t: nx.shortest_path(deps, s, t), pairs):>9.2f} ms   "
+          f"bidirectional {timed(lambda s, t: find_paths(succ, pred, [s], [t]), pairs):>9.2f} ms")
+
+    k = args.k
+    print(f"{k}-shortest paths  networkx {timed(lambda s, t: list(itertools.islice(nx.shortest_simple_paths(deps, s, t), k)), pairs[:5]):>9.2f} ms   "
+          f"yen+bidir     {timed(lambda s, t: find_paths(succ, pred, [s], [t], k=k), pairs[:5]):>9.2f} ms")
+
+    def per_source(sources, t):
+        best = None
+        for s in sources:
+            try:
+                p = nx.shortest_path(deps, s, t)
+            except nx.NetworkXNoPath:
+                continue
+            if best is None or len(p) < len(best):
+                best = p
+        return best
+
+    multi = [(top, t) for _, t in pairs[:5]]
+    print(f"multi-source ({len(top)} sources)  networkx loop {timed(per_source, multi):>9.2f} ms   "
+          f"one search {timed(lambda s, t: find_paths(succ, pred, s, [t]), multi):>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+tracemalloc comparison of blast_radius allocations with per-call node copies
+(the old GraphStorage.get_node) vs shared NodeRecords.
+
+    python -m benchmarks.bench_query_allocations --nodes 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import synthetic_graph
+from graph.query import QueryEngine
+from graph.storage import GraphStorage
+
+
+class CopyingStorage(GraphStorage):
+    """GraphStorage with the previous read path: a fresh dict per node per call."""
+    def get_node(self, node_id):
+        if self.graph.has_node(node_id):
+            return dict(id=node_id, **self.graph.nodes[node_id])
+        return None
+
+
+def build(cls, nodes, edges):
+    storage = cls(persistence_file=os.path.join(tempfile.mkdtemp(), "graph.json"))
+    for node in nodes:
+        storage.add_node(node)
+    for edge in edges:
+        storage.add_edge(edge)
+    return storage
+
+
+def measure(label: str, engine: QueryEngine, target: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = engine.blast_radius(target)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    impacted = result["summary"]["upstream_count"] + result["summary"]["downstream_count"]
+    print(f"{label:<26} peak {peak / 1024:>9.0f} KiB  retained {retained / 1024:>9.0f} KiB  "
+          f"{elapsed * 1000:>8.1f} ms  ({impacted} impacted nodes)")
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=50_000)
+    args = parser.parse_args()
+
+    nodes, edges = synthetic_graph(args.nodes)
+    # The most-depended-on store has the largest upstream set
+    in_degree = {}
+    for edge in edges:
+        in_degree[edge.target] = in_degree.get(edge.target, 0) + 1
+    target = max((n.id for n in nodes if n.type in ("database", "cache")), key=lambda n: in_degree.get(n, 0))
+
+    copying = QueryEngine(build(CopyingStorage, nodes, edges))
+    shared = QueryEngine(build(GraphStorage, nodes, edges))
+
+    before = measure("per-call copies", copying, target)
+    measure("shared records (cold)", shared, target)
+    after = measure("shared records (warm)", shared, target)
+    print(f"warm peak allocation reduced {before / max(after, 1):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
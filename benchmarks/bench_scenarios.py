@@ -0,0 +1,64 @@
+"""
+Random failure scenarios on a synthetic graph: one propagation per scenario
+vs the same scenarios evaluated in batches, and the end-to-end resilience
+score (sampling, propagation and aggregation on packed bitsets).
+
+    python -m benchmarks.bench_scenarios --nodes 20000 --scenarios 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import synthetic_graph
+from graph.scenarios import ScenarioModel
+from graph.storage import GraphStorage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=20_000)
+    parser.add_argument("--scenarios", type=int, default=5000)
+    parser.add_argument("--failures", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    nodes, edges = synthetic_graph(args.nodes)
+    storage = GraphStorage(persistence_file=os.path.join(tempfile.mkdtemp(), "graph.json"))
+    for node in nodes:
+        storage.add_node(node)
+    for edge in edges:
+        storage.add_edge(edge)
+
+    start = time.perf_counter()
+    model = ScenarioModel(storage)
+    print(f"{len(model)} nodes, {len(model.levels)} levels, model built in {time.perf_counter() - start:.2f}s")
+
+    states, _ = model.random_scenarios(args.scenarios, args.failures)
+    sample = min(len(states), 200)
+    start = time.perf_counter()
+    single = [model.propagate(states[i:i + 1].copy()) for i in range(sample)]
+    one_by_one = (time.perf_counter() - start) / sample
+
+    start = time.perf_counter()
+    batched = [model.propagate(states[i:i + args.batch_size].copy())
+               for i in range(0, len(states), args.batch_size)]
+    per_scenario = (time.perf_counter() - start) / len(states)
+    assert all((a == b).all() for a, b in zip(single, batched[0][:sample]))
+
+    start = time.perf_counter()
+    score = model.resilience(args.scenarios, args.failures, batch_size=args.batch_size)
+    end_to_end = (time.perf_counter() - start) / args.scenarios
+
+    print(f"{'one at a time:':<28}{one_by_one * 1000:8.3f} ms/scenario")
+    print(f"{f'batches of {args.batch_size}:':<28}{per_scenario * 1000:8.3f} ms/scenario "
+          f"({one_by_one / per_scenario:.0f}x)")
+    print(f"{'resilience(), bitsets:':<28}{end_to_end * 1000:8.3f} ms/scenario "
+          f"({one_by_one / end_to_end:.0f}x), score {score['score']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Query workers on a synthetic graph: N processes that each load their own
+GraphStorage from graph_data.json, vs N processes mapping one shared array
+snapshot (graph.shared). Both answer QueryEngine.downstream(node, 3) and
+send the node records back. Reports the workers' combined memory (PSS, so
+shared pages are split between the processes that map them) and query
+throughput as workers are added.
+
+    python -m benchmarks.bench_shared --nodes 100000 --workers 1 2 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import synthetic_graph
+from graph.shared import SharedQueryPool, write_snapshot
+from graph.storage import GraphStorage
+
+_engine = None
+
+
+def _load_copy(path):
+    global _engine
+    from graph.query import QueryEngine
+    _engine = QueryEngine(GraphStorage(path))
+
+
+def _copy_query(node_id):
+    return _engine.downstream(node_id, 3)
+
+
+def pss_mb(pids) -> float:
+    total = 0
+    for pid in pids:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    total += int(line.split()[1])
+    return total / 1024
+
+
+def throughput(run, queries) -> float:
+    start = time.perf_counter()
+    run(queries)
+    return len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    nodes, edges = synthetic_graph(args.nodes)
+    tmp = tempfile.mkdtemp()
+    storage = GraphStorage(persistence_file=os.path.join(tmp, "graph_data.json"))
+    for node in nodes:
+        storage.add_node(node)
+    for edge in edges:
+        storage.add_edge(edge)
+    storage.save()
+    snapshot = write_snapshot(storage, os.path.join(tmp, "graph_data.csr"))
+    print(f"{args.nodes} nodes: graph_data.json {os.path.getsize(storage.persistence_file) / 1e6:.1f} MB, "
+          f"snapshot {os.path.getsize(snapshot) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+
+    rng = random.Random(0)
+    services = [n.id for n in nodes if n.type == "service"]
+    queries = [(rng.choice(services),) for _ in range(args.queries)]
+
+    print(f"{'workers':>8}{'copies PSS MB':>15}{'copies q/s':>12}{'shared PSS MB':>15}{'shared q/s':>12}")
+    for workers in args.workers:
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn"), initializer=_load_copy,
+                                 initargs=(storage.persistence_file,)) as pool:
+            # Warm up so every worker has started (and loaded) before timing
+            list(pool.map(_copy_query, [q[0] for q in queries[:workers * 16]], chunksize=4))
+            copies_qps = throughput(lambda qs: list(pool.map(_copy_query, [q[0] for q in qs], chunksize=16)),
+                                    queries)
+            copies_mb = pss_mb(p.pid for p in pool._processes.values())
+        with SharedQueryPool(snapshot, workers=workers) as pool:
+            pool.map("downstream", queries[:workers * 16], chunksize=4)
+            shared_qps = throughput(lambda qs: pool.map("downstream", [q + (3,) for q in qs]), queries)
+            shared_mb = pss_mb(pool.pids())
+        print(f"{workers:>8}{copies_mb:>15.0f}{copies_qps:>12.0f}{shared_mb:>15.0f}{shared_qps:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+App startup: import time of the UI's module set and time to first paint
+(the moment the page can render) vs time until the graph is queryable, for
+the previous eager startup (import everything, load or build synchronously)
+and the lazy one (light imports, GraphLoader on a background thread).
+
+Every case runs in a fresh interpreter so module caches don't carry over.
+
+    python -m benchmarks.bench_startup --services 5000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# What chat/interface.py imported before the first paint, before and after lazy loading
+EAGER_MODULES = ["requests", "streamlit.components.v1", "graph.storage", "graph.sqlite_storage", "graph.query",
+                 "chat.llm", "chat.visualization"]
+LAZY_MODULES = ["graph.loader", "chat.llm", "telemetry.tracing", "telemetry.profiling"]
+
+
+def _import_all(modules):
+    import importlib
+    missing = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            missing.append(name)
+    return missing
+
+
+def worker(case: str, directory: str) -> dict:
+    start = time.perf_counter()
+    if case == "eager":
+        missing = _import_all(EAGER_MODULES)
+        imported = time.perf_counter()
+        from graph.storage import GraphStorage
+        from graph.query import QueryEngine
+        from graph.loader import build, default_sources
+        storage = GraphStorage(os.path.join(directory, "graph_data.json"))
+        if storage.number_of_nodes() == 0:
+            connectors, files = default_sources(os.path.join(directory, "data"))
+            build(storage, connectors, files)
+        QueryEngine(storage)
+        # The old script only painted after get_engine() returned
+        painted = ready = time.perf_counter()
+    else:
+        missing = _import_all(LAZY_MODULES)
+        imported = time.perf_counter()
+        from graph.loader import GraphLoader, default_sources
+        loader = GraphLoader(persistence_file=os.path.join(directory, "graph_data.json"),
+                             sources=lambda: default_sources(os.path.join(directory, "data"))).start()
+        painted = time.perf_counter()
+        loader.wait()
+        ready = time.perf_counter()
+        assert loader.state == "ready", loader.status()
+    return {
+        "import_ms": round((imported - start) * 1000, 1),
+        "first_paint_ms": round((painted - start) * 1000, 1),
+        "ready_ms": round((ready - start) * 1000, 1),
+        "missing": missing,
+    }
+
+
+def run_case(case: str, directory: str) -> dict:
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--worker", case, "--dir", directory],
+                         cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--services", type=int, default=2000)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.dir)))
+        return
+
+    from benchmarks.synthetic import write_estate
+    from graph.loader import build, default_sources
+    from graph.storage import GraphStorage
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_estate(os.path.join(tmp, "data"), args.services)
+        connectors, files = default_sources(os.path.join(tmp, "data"))
+        snapshot = os.path.join(tmp, "graph_data.json")
+        build(GraphStorage(snapshot), connectors, files)
+        stale = os.path.join(tmp, "stale")
+        os.makedirs(stale)
+        shutil.copytree(os.path.join(tmp, "data"), os.path.join(stale, "data"))
+        with open(os.path.join(stale, "data", "teams.yaml"), "a") as f:
+            f.write("\n# edited\n")
+        shutil.copy(snapshot, os.path.join(stale, "graph_data.json"))
+
+        print(f"{args.services} services, snapshot {os.path.getsize(snapshot) / 1e6:.1f} MB")
+        print(f"{'case':<28}{'imports ms':>12}{'first paint ms':>16}{'ready ms':>12}")
+        for label, case, directory in (("eager, snapshot", "eager", tmp),
+                                       ("lazy, fresh snapshot", "lazy", tmp),
+                                       ("lazy, stale snapshot", "lazy", stale)):
+            result = run_case(case, directory)
+            note = f"   (not installed: {', '.join(result['missing'])})" if result["missing"] else ""
+            print(f"{label:<28}{result['import_ms']:>12.1f}{result['first_paint_ms']:>16.1f}"
+                  f"{result['ready_ms']:>12.1f}{note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+GraphStorage (networkx + JSON) vs SQLiteGraphStorage: build, save, query
+latency and peak RSS at several graph sizes.
+
+Each (backend, size) runs in its own process so peak RSS is not shared.
+
+    python -m benchmarks.bench_storage_backends --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BACKENDS = ("networkx", "sqlite")
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _latency_ms(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"p50": round(statistics.median(samples), 3), "max": round(max(samples), 3)}
+
+
+def run_worker(backend: str, size: int, queries: int) -> dict:
+    from benchmarks.synthetic import synthetic_graph
+    from graph.query import QueryEngine
+    from graph.storage import GraphStorage
+    from graph.sqlite_storage import SQLiteGraphStorage
+
+    nodes, edges = synthetic_graph(size)
+    baseline_rss = _rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        if backend == "sqlite":
+            storage = SQLiteGraphStorage(persistence_file=os.path.join(tmp, "graph.db"))
+        else:
+            storage = GraphStorage(persistence_file=os.path.join(tmp, "graph.json"))
+
+        start = time.perf_counter()
+        for node in nodes:
+            storage.add_node(node)
+        for edge in edges:
+            storage.add_edge(edge)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        storage.save()
+        save_s = time.perf_counter() - start
+
+        engine = QueryEngine(storage)
+        services = [n.id for n in nodes if n.type == "service"]
+        stores = [n.id for n in nodes if n.type in ("database", "cache")]
+        # Top-layer services have the deepest downstream, stores the widest upstream
+        sources = [(services[i],) for i in range(0, min(len(services), queries))]
+        sinks = [(stores[i % len(stores)],) for i in range(queries)]
+
+        result = {
+            "backend": backend,
+            "nodes": storage.number_of_nodes(),
+            "edges": storage.number_of_edges(),
+            "build_s": round(build_s, 3),
+            "save_s": round(save_s, 3),
+            "get_node_ms": _latency_ms(storage.get_node, sources),
+            "get_nodes_by_type_ms": _latency_ms(storage.get_nodes_by_type, [("database",)] * 5),
+            "downstream_ms": _latency_ms(engine.downstream, sources),
+            "upstream_ms": _latency_ms(engine.upstream, sinks),
+            "path_ms": _latency_ms(engine.path, [(s[0], stores[0]) for s in sources]),
+            "peak_rss_mb": round(_rss_mb(), 1),
+            "graph_rss_mb": round(_rss_mb() - baseline_rss, 1),
+        }
+        if backend == "sqlite":
+            storage.close()
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--worker", nargs=2, metavar=("BACKEND", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker[0], int(args.worker[1]), args.queries)))
+        return
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        for backend in args.backends.split(","):
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_storage_backends", "--worker", backend, str(size),
+                 "--queries", str(args.queries)],
+                capture_output=True, text=True, check=True,
+            )
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(row)
+            print(f"{backend:<9} {size:>8} nodes  build {row['build_s']:>7}s  save {row['save_s']:>6}s  "
+                  f"down p50 {row['downstream_ms']['p50']:>8}ms  up p50 {row['upstream_ms']['p50']:>8}ms  "
+                  f"by_type p50 {row['get_nodes_by_type_ms']['p50']:>8}ms  graph RSS {row['graph_rss_mb']:>7}MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
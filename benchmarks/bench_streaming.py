@@ -0,0 +1,113 @@
+"""
+Streaming an answer from a local fake token server (Ollama's NDJSON format):
+tokens handed to the UI one by one vs coalesced into time/size-bounded
+chunks (chat.streaming), reporting UI updates/sec, time to first token and
+the adapter's own overhead; plus the per-line cost of each NDJSON decoder.
+
+    python -m benchmarks.bench_streaming --tokens 2000 --rate 200
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import timeit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json.decoder import scanstring
+from urllib.request import urlopen
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chat import streaming
+from chat.streaming import StreamStats, coalesce, iter_tokens
+
+
+def token_lines(n_tokens: int):
+    words = ["the", " payment", "-service", " depends", " on", " postgres", ",", " owned", " by", " payments"]
+    lines = [json.dumps({"model": "llama3.1", "created_at": "2024-01-01T00:00:00Z",
+                         "response": words[i % len(words)], "done": False}).encode() + b"\n"
+             for i in range(n_tokens)]
+    lines.append(json.dumps({"model": "llama3.1", "response": "", "done": True,
+                             "context": list(range(2000))}).encode() + b"\n")
+    return lines
+
+
+def serve(lines, rate: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for line in lines:
+                self.wfile.write(line)
+                self.wfile.flush()
+                if rate:
+                    time.sleep(1 / rate)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def consume(url, coalesced: bool):
+    """Simulates st.write_stream: one re-render per chunk. Returns (stats, total seconds)."""
+    start = time.perf_counter()
+    with urlopen(url) as response:
+        tokens = iter_tokens(response)
+        stats = StreamStats()
+        if coalesced:
+            chunks = coalesce(tokens, stats=stats, name="bench.coalesced")
+        else:
+            chunks = tokens
+        updates, first = 0, None
+        for _ in chunks:
+            if first is None:
+                first = time.perf_counter() - start
+            updates += 1
+    total = time.perf_counter() - start
+    if not coalesced:
+        stats.updates, stats.first_token_s, stats.duration_s = updates, first, total
+    else:
+        stats.first_token_s = first
+    return stats, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200, help="tokens/sec sent by the fake server (0 = flat out)")
+    args = parser.parse_args()
+
+    lines = token_lines(args.tokens)
+    server = serve(lines, args.rate)
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+    print(f"{args.tokens} tokens at {args.rate:.0f} tokens/sec from a local fake server")
+    print(f"{'':<12}{'updates':>9}{'updates/s':>11}{'TTFT ms':>9}{'overhead ms':>13}{'total s':>9}")
+    for label, coalesced in (("raw", False), ("coalesced", True)):
+        stats, total = consume(url, coalesced)
+        print(f"{label:<12}{stats.updates:>9}{stats.updates_per_sec:>11.1f}{stats.first_token_s * 1000:>9.1f}"
+              f"{stats.overhead_s * 1000:>13.3f}{total:>9.2f}")
+    server.shutdown()
+
+    line = lines[1].rstrip()
+    key = b'"response":"'
+    decoders = {
+        "json.loads": lambda: json.loads(line).get("response", ""),
+        "scanstring": lambda: scanstring(line.decode(), line.find(key) + len(key))[0],
+    }
+    if streaming.orjson is not None:
+        decoders["orjson"] = lambda: streaming.orjson.loads(line).get("response", "")
+    print("NDJSON decode, per line:")
+    for label, decode in decoders.items():
+        per_call = min(timeit.repeat(decode, number=20_000, repeat=3)) / 20_000
+        print(f"  {label:<12}{per_call * 1e6:8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
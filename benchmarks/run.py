@@ -0,0 +1,171 @@
+"""
+End-to-end benchmark suite: writes a synthetic estate (docker-compose, k8s,
+teams.yaml), builds the graph through the real connectors and times the
+build, snapshot save/load, node resolution and the QueryEngine queries.
+
+Results are written as JSON; with a baseline, every timing is compared
+against it and the run fails (exit 1) if any median regressed by more than
+--threshold.
+
+    python -m benchmarks.run --services 5000 --output bench.json
+    python -m benchmarks.run --services 5000 --save-baseline
+    python -m benchmarks.run --services 5000 --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Sequence
+
+import networkx as nx
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import write_estate
+from connectors.docker_compose import DockerComposeConnector
+from connectors.kubernetes import KubernetesConnector
+from connectors.teams import TeamsConnector
+from graph.query import QueryEngine
+from graph.storage import GraphStorage
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def measure(fn: Callable, calls: Sequence[tuple]) -> Dict[str, float]:
+    """Times fn(*args) for each args tuple; latency stats in milliseconds."""
+    samples = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "n": len(samples),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, round(0.95 * (len(samples) - 1)))], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+    }
+
+
+def resolve_queries(rng: random.Random, storage: GraphStorage, n: int) -> List[str]:
+    """What users type: exact IDs, bare names, different case, and name fragments."""
+    ids = sorted(node_id for node_id, _ in storage.iter_nodes())
+    queries = []
+    for i in range(n):
+        node_id = rng.choice(ids)
+        name = node_id.split(":", 1)[1]
+        queries.append([node_id, name, name.upper(), name.rsplit("-", 1)[0]][i % 4])
+    return queries
+
+
+def run(args) -> Dict:
+    rng = random.Random(args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_estate(tmp, args.services, fanout=args.fanout, layers=args.layers, seed=args.seed)
+        files = [paths["docker-compose"], paths["teams"], paths["k8s"]]
+        snapshot = os.path.join(tmp, "graph_data.json")
+
+        def build():
+            if os.path.exists(snapshot):
+                os.unlink(snapshot)
+            storage = GraphStorage(persistence_file=snapshot)
+            storage.build_from_connectors([DockerComposeConnector(), TeamsConnector(), KubernetesConnector()], files)
+            return storage
+
+        # Parse all three files, upsert every node/edge and write the snapshot
+        results["build_from_connectors"] = measure(build, [()] * args.repeat)
+        storage = build()
+        results["save"] = measure(storage.save, [()] * args.repeat)
+        results["load"] = measure(storage.load, [()] * args.repeat)
+
+        engine = QueryEngine(storage)
+        graph = storage.graph
+        services = sorted(n for n, d in graph.nodes(data=True) if d.get("type") == "service")
+        stores = sorted(n for n, d in graph.nodes(data=True) if d.get("type") in ("database", "cache"))
+        entry = services[: max(1, len(services) // args.layers)]
+
+        results["resolve_node_id"] = measure(engine._resolve_node_id,
+                                             [(q,) for q in resolve_queries(rng, storage, args.queries)])
+        results["downstream"] = measure(engine.downstream, [(rng.choice(entry),) for _ in range(args.queries)])
+        results["upstream"] = measure(engine.upstream, [(rng.choice(stores),) for _ in range(args.queries)])
+        results["blast_radius"] = measure(engine.blast_radius, [(rng.choice(stores),) for _ in range(args.queries)])
+        results["path"] = measure(engine.path, [(rng.choice(entry), rng.choice(stores)) for _ in range(args.queries)])
+
+        meta = {
+            "services": args.services, "fanout": args.fanout, "layers": args.layers, "seed": args.seed,
+            "nodes": storage.number_of_nodes(), "edges": storage.number_of_edges(),
+            "snapshot_bytes": os.path.getsize(snapshot),
+            "python": platform.python_version(), "networkx": nx.__version__, "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+    return {"meta": meta, "results": results}
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Prints current vs baseline medians; returns the names that regressed beyond threshold."""
+    scale = ("services", "fanout", "layers", "seed")
+    if any(current["meta"].get(k) != baseline["meta"].get(k) for k in scale):
+        print("warning: baseline was recorded at a different scale: "
+              + ", ".join(f"{k}={baseline['meta'].get(k)}" for k in scale))
+    regressions = []
+    print(f"{'benchmark':<24}{'baseline ms':>14}{'current ms':>14}{'change':>10}")
+    for name, stats in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<24}{'-':>14}{stats['median_ms']:>14.3f}{'new':>10}")
+            continue
+        change = stats["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<24}{before['median_ms']:>14.3f}{stats['median_ms']:>14.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--services", type=int, default=2000)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--layers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs of build/save/load")
+    parser.add_argument("--queries", type=int, default=50, help="calls per query benchmark")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help=f"compare against this results JSON (default: {DEFAULT_BASELINE} if present)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown (0.25 = +25%%)")
+    args = parser.parse_args()
+
+    report = run(args)
+    meta = report["meta"]
+    print(f"{meta['nodes']} nodes, {meta['edges']} edges, snapshot {meta['snapshot_bytes'] / 1e6:.1f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline or DEFAULT_BASELINE, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline or DEFAULT_BASELINE}")
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if not args.save_baseline and os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"Regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        for name, stats in report["results"].items():
+            print(f"{name:<24}median {stats['median_ms']:>10.3f} ms   p95 {stats['p95_ms']:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
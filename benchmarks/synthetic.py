@@ -0,0 +1,167 @@
+"""
+Deterministic synthetic estates for the benchmarks.
+
+`synthetic_graph` returns connector-style Node/Edge lists: services in layers
+calling deeper layers (so traversals have real depth), databases and caches
+as leaves, and teams owning everything.
+
+`write_estate` writes the same kind of estate as the source files the
+connectors read (docker-compose.yml, k8s-deployments.yaml, teams.yaml), so a
+benchmark can time the whole ingest path.
+"""
+import os
+import random
+import sys
+from typing import Dict, List, Tuple
+
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from connectors.base import Node, Edge
+
+WORDS = [
+    "amber", "birch", "cedar", "delta", "ember", "falcon", "granite", "harbor", "indigo", "jasper",
+    "kestrel", "lumen", "maple", "nimbus", "onyx", "pixel", "quartz", "raven", "sierra", "tundra",
+    "umber", "vertex", "willow", "xenon", "yarrow", "zephyr",
+]
+DOMAINS = ["payment", "order", "auth", "search", "catalog", "billing", "shipping", "profile", "ledger", "notify"]
+NAMESPACES = ["ecommerce", "platform", "identity", "data", "ml"]
+
+
+def service_name(i: int) -> str:
+    return f"{WORDS[i % len(WORDS)]}-{DOMAINS[(i // len(WORDS)) % len(DOMAINS)]}-service-{i}"
+
+
+def synthetic_graph(n_nodes: int, fanout: int = 3, layers: int = 8, seed: int = 0) -> Tuple[List[Node], List[Edge]]:
+    rng = random.Random(seed)
+    n_teams = max(1, n_nodes // 100)
+    n_stores = max(2, n_nodes // 10)
+    n_services = max(1, n_nodes - n_teams - n_stores)
+
+    nodes: List[Node] = []
+    edges: List[Edge] = []
+    teams = [f"team-{i}" for i in range(n_teams)]
+    services = [service_name(i) for i in range(n_services)]
+    stores = []
+
+    for i in range(n_stores):
+        is_db = i % 3 != 0
+        name = f"{WORDS[i % len(WORDS)]}-{DOMAINS[i % len(DOMAINS)]}-{'db' if is_db else 'redis'}-{i}"
+        node_type = "database" if is_db else "cache"
+        stores.append(f"{node_type}:{name}")
+        nodes.append(Node(stores[-1], node_type, name, {"team": rng.choice(teams)}))
+
+    layer_size = max(1, n_services // layers)
+    for i, name in enumerate(services):
+        nodes.append(Node(f"service:{name}", "service", name, {
+            "team": teams[i % n_teams],
+            "oncall": f"@{WORDS[i % len(WORDS)]}",
+            "namespace": NAMESPACES[i % len(NAMESPACES)],
+            "replicas": 1 + i % 3,
+        }))
+        layer = i // layer_size
+        deeper = range((layer + 1) * layer_size, min(n_services, (layer + 2) * layer_size))
+        for _ in range(fanout if len(deeper) else 0):
+            callee = services[rng.choice(deeper)]
+            edges.append(Edge(f"edge:{name}-calls-{callee}", "calls", f"service:{name}", f"service:{callee}"))
+        store = rng.choice(stores)
+        edges.append(Edge(f"edge:{name}-connects_to-{store}", "connects_to", f"service:{name}", store))
+
+    for team in teams:
+        nodes.append(Node(f"team:{team}", "team", team, {"slack": f"#{team}"}))
+    for i, name in enumerate(services):
+        team = teams[i % n_teams]
+        edges.append(Edge(f"edge:{team}-owns-{name}", "owns", f"team:{team}", f"service:{name}"))
+
+    return nodes, edges
+
+
+def _env_name(service: str) -> str:
+    return service.upper().replace("-", "_")
+
+
+def write_estate(directory: str, n_services: int, fanout: int = 3, layers: int = 8, seed: int = 0) -> Dict[str, str]:
+    """
+    Writes docker-compose.yml, k8s-deployments.yaml and teams.yaml for
+    `n_services` layered services (each calling `fanout` services one layer
+    deeper and using one database or cache), and returns their paths.
+    """
+    rng = random.Random(seed)
+    n_teams = max(1, n_services // 20)
+    n_stores = max(2, n_services // 4)
+    teams = [f"team-{i}" for i in range(n_teams)]
+    services = [service_name(i) for i in range(n_services)]
+    # Named the way the connectors infer types: "...-db" is a database, "redis" a cache
+    stores = [f"{WORDS[i % len(WORDS)]}-{DOMAINS[i % len(DOMAINS)]}-{i}-db" if i % 3 else
+              f"{WORDS[i % len(WORDS)]}-{DOMAINS[i % len(DOMAINS)]}-redis-{i}" for i in range(n_stores)]
+    owned: Dict[str, List[str]] = {team: [] for team in teams}
+
+    compose: Dict[str, Dict] = {}
+    deployments = []
+    layer_size = max(1, n_services // layers)
+    for i, name in enumerate(services):
+        team = teams[i % n_teams]
+        namespace = NAMESPACES[i % len(NAMESPACES)]
+        owned[team].append(name)
+        layer = i // layer_size
+        deeper = range((layer + 1) * layer_size, min(n_services, (layer + 2) * layer_size))
+        callees = sorted({rng.choice(deeper) for _ in range(fanout if len(deeper) else 0)})
+        store = rng.choice(stores)
+
+        environment = [f"{_env_name(services[c])}_URL=http://{services[c]}:8080" for c in callees]
+        if "-redis-" in store:
+            environment.append(f"REDIS_URL=redis://{store}:6379")
+        else:
+            environment.append(f"DATABASE_URL=postgresql://app:secret@{store}:5432/app")
+        compose[name] = {
+            "build": f"./services/{name}",
+            "ports": [f"{8000 + i % 1000}:8080"],
+            "environment": environment,
+            "depends_on": [services[c] for c in callees] + [store],
+            "labels": {"team": team, "oncall": f"@{WORDS[i % len(WORDS)]}"},
+        }
+        deployments.append({
+            "apiVersion": "apps/v1",
+            "kind": "Deployment",
+            "metadata": {"name": name, "namespace": namespace, "labels": {"app": name, "team": team}},
+            "spec": {
+                "replicas": 1 + i % 3,
+                "template": {"spec": {"containers": [{
+                    "name": name,
+                    "image": f"{namespace}/{name}:v1",
+                    "env": [{"name": f"{_env_name(services[c])}_SERVICE_URL",
+                             "value": f"http://{services[c]}.{NAMESPACES[c % len(NAMESPACES)]}.svc.cluster.local:8080"}
+                            for c in callees],
+                }]}},
+            },
+        })
+
+    for i, store in enumerate(stores):
+        team = teams[i % n_teams]
+        owned[team].append(store)
+        image = "redis:7" if "-redis-" in store else "postgres:15"
+        compose[store] = {"image": image, "labels": {"team": team}}
+
+    team_docs = [{
+        "name": team,
+        "lead": f"@{WORDS[i % len(WORDS)]}",
+        "slack_channel": f"#{team}",
+        "pagerduty_schedule": f"{team}-oncall",
+        "owns": owned[team],
+    } for i, team in enumerate(teams)]
+
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "docker-compose": os.path.join(directory, "docker-compose.yml"),
+        "k8s": os.path.join(directory, "k8s-deployments.yaml"),
+        "teams": os.path.join(directory, "teams.yaml"),
+    }
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    with open(paths["docker-compose"], "w") as f:
+        yaml.dump({"version": "3.8", "services": compose}, f, Dumper=dumper, sort_keys=False)
+    with open(paths["k8s"], "w") as f:
+        yaml.dump_all(deployments, f, Dumper=dumper, sort_keys=False)
+    with open(paths["teams"], "w") as f:
+        yaml.dump({"teams": team_docs}, f, Dumper=dumper, sort_keys=False)
+    return paths
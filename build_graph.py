@@ -1,37 +1,61 @@
-from connectors.docker_compose import DockerComposeConnector
-from connectors.teams import TeamsConnector
-from connectors.kubernetes import KubernetesConnector
-from graph.storage import GraphStorage
+from graph.loader import build, default_sources, is_fresh, open_storage
+from telemetry.profiling import MODES, profiler
+import argparse
 import os
 
 def main():
-    print("Initializing Connectors...")
-    dc_conn = DockerComposeConnector()
-    teams_conn = TeamsConnector()
-    k8s_conn = KubernetesConnector()
+    parser = argparse.ArgumentParser(description="Build graph_data.json from the files in data/")
+    parser.add_argument("--wal", action="store_true",
+                        help="Append only the changed nodes/edges to graph_data.json.wal instead of rewriting the snapshot")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default=os.getenv("GRAPH_BACKEND", "json"),
+                        help="json: networkx + graph_data.json, sqlite: graph_data.db")
+    parser.add_argument("--if-stale", action="store_true",
+                        help="Skip the build if the snapshot was built from the current data/ files")
+    parser.add_argument("--shared-snapshot", nargs="?", const="graph_data.csr", metavar="PATH",
+                        help="Also write the memory-mapped array snapshot served by graph.shared workers "
+                             "(default: graph_data.csr)")
+    parser.add_argument("--history-dir", default=os.getenv("GRAPH_HISTORY_DIR", "graph_history"),
+                        help="Record each build as a version here, for as_of queries (default: graph_history)")
+    parser.add_argument("--no-history", action="store_true", help="Don't record this build in the graph history")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=MODES,
+                        help="Profile each connector parse (default: cprofile; same as EKG_PROFILE)")
+    parser.add_argument("--profile-dir", default=None, help="Where profile files go (default: profiles/)")
+    args = parser.parse_args()
+    if args.profile:
+        profiler.enable(args.profile, args.profile_dir)
 
+    print("Initializing Connectors...")
     data_dir = os.path.join(os.getcwd(), 'data')
-    
-    files = [
-        os.path.join(data_dir, 'docker-compose.yml'),
-        os.path.join(data_dir, 'teams.yaml'),
-        os.path.join(data_dir, 'k8s-deployments.yaml')
-    ]
+    connectors, files = default_sources(data_dir)
     
     print(f"Reading from {data_dir}...")
     
-    storage = GraphStorage()
+    # Without --wal an existing log is still replayed first; the full snapshot saved below then supersedes it
+    storage = open_storage(args.backend, wal=True if args.wal else None)
+    if args.if_stale and is_fresh(storage, files):
+        print(f"{storage.persistence_file} is up to date ({storage.number_of_nodes()} nodes); nothing to build.")
+        return
+
     print("Building Graph...")
     
     # We run connectors sequentially. 
     # Note: simple merging logic (last write wins for same ID)
-    storage.build_from_connectors(
-        [dc_conn, teams_conn, k8s_conn],
-        files
-    )
+    build(storage, connectors, files)
     
-    print(f"Graph built successfully with {storage.graph.number_of_nodes()} nodes and {storage.graph.number_of_edges()} edges.")
-    print("Saved to graph_data.json")
+    print(f"Graph built successfully with {storage.number_of_nodes()} nodes and {storage.number_of_edges()} edges.")
+    print(f"Saved to {storage.persistence_file}.wal" if args.wal else f"Saved to {storage.persistence_file}")
+    if not args.no_history:
+        from graph.history import GraphHistory
+        entry = GraphHistory(args.history_dir).record(storage)
+        print(f"Recorded as version {entry['version']} in {args.history_dir}/ "
+              f"({entry['kind']}, {entry['changes']} changes, {entry['bytes'] / 1024:.1f} KB)")
+    if args.shared_snapshot:
+        from graph.shared import write_snapshot
+        print(f"Shared snapshot written to {write_snapshot(storage, args.shared_snapshot)}")
+    if profiler.enabled:
+        for call in profiler.slowest():
+            print(f"  {call['name']} {call['params']}: {call['duration_ms']:.1f} ms -> {call['profile']}")
+        print(f"Profiles written to {profiler.directory}/ (slowest calls: {profiler.dump_slowest()})")
 
 if __name__ == "__main__":
     main()
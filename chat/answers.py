@@ -0,0 +1,112 @@
+from typing import Any, Dict, List, Optional
+
+try:
+    from telemetry.tracing import ANSWER_METRIC
+except ImportError:
+    from ..telemetry.tracing import ANSWER_METRIC
+
+# Deterministic answers for simple tool results, so they skip the summarization
+# LLM call. Anything bigger or more structured than this still goes to the LLM.
+MAX_ITEMS = 15
+MAX_PATH_NODES = 8
+TEMPLATE = "template"
+LLM = "llm"
+
+# Tool -> the params that name a node, which the templates show as the engine resolved them
+NODE_PARAMS = {
+    "get_owner": ("node_id",),
+    "upstream": ("node_id",),
+    "downstream": ("node_id",),
+    "path": ("from_id", "to_id"),
+}
+
+def render(tool: Optional[str], params: Dict[str, Any], result: Any,
+           resolved: Optional[Dict[str, Optional[str]]] = None, max_items: int = MAX_ITEMS) -> Optional[str]:
+    """
+    Markdown answer for a simple tool result (an owner, a short node list or
+    path, an error), or None when the result needs the LLM summarizer.
+
+    `resolved` maps the tool's node params (NODE_PARAMS) to the node IDs the
+    engine resolved them to, None for a name that matched nothing. Without
+    it, tools that name a node are left to the LLM.
+    """
+    if isinstance(result, dict) and set(result) == {"error"}:
+        return f"⚠️ {result['error']}"
+    names = {}
+    for key in NODE_PARAMS.get(tool, ()):
+        if resolved is None or key not in resolved:
+            return None
+        if resolved[key] is None:
+            return f"I could not find `{params.get(key)}` in the graph."
+        names[key] = _name(resolved[key])
+    if tool == "get_owner" and isinstance(result, str):
+        if result == "Unknown":
+            return f"No owner is recorded for `{names['node_id']}` in the graph."
+        return f"**{result}** owns `{names['node_id']}`."
+    if tool == "path" and isinstance(result, list) and len(result) <= MAX_PATH_NODES:
+        source, target = names["from_id"], names["to_id"]
+        if not result:
+            return f"No path found from `{source}` to `{target}`."
+        hops = len(result) - 1
+        return f"`{source}` reaches `{target}` in {hops} hop{'s' if hops != 1 else ''}:\n\n" + \
+            " → ".join(f"`{_name(node_id)}`" for node_id in result)
+    if tool in ("get_nodes", "upstream", "downstream") and isinstance(result, list) and len(result) <= max_items:
+        if not all(isinstance(node, dict) for node in result):
+            return None
+        name = names.get("node_id")
+        if tool == "get_nodes":
+            kind = params.get("type") or "node"
+            filters = ", ".join(f"{k}={v}" for k, v in (params.get("filters") or {}).items())
+            where = f" with {filters}" if filters else ""
+            if not result:
+                return f"I could not find any {kind}s{where} in the graph."
+            heading = f"{len(result)} {kind}{'s' if len(result) != 1 else ''}{where}:"
+        elif tool == "upstream":
+            if not result:
+                return f"Nothing in the graph depends on `{name}`."
+            heading = f"{len(result)} component{'s depend' if len(result) != 1 else ' depends'} on `{name}`:"
+        else:
+            if not result:
+                return f"`{name}` has no dependencies in the graph."
+            heading = f"`{name}` depends on {len(result)} component{'s' if len(result) != 1 else ''}:"
+        return heading + "\n\n" + "\n".join(_bullet(node) for node in result)
+    return None
+
+def _name(node_id: Any) -> str:
+    text = str(node_id or "?")
+    return text.split(":", 1)[1] if ":" in text else text
+
+def _bullet(node: Dict[str, Any]) -> str:
+    line = f"- `{node.get('name') or _name(node.get('id'))}` ({node.get('type', 'node')})"
+    details = [f"{key}: {node[key]}" for key in ("team", "namespace") if node.get(key)]
+    return line + (" — " + ", ".join(details) if details else "")
+
+def bypass_stats(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Per tool, from tracer.stats() rows: how many answers were templated vs
+    summarized, their p50 latency, and the time saved by the templated ones
+    (each counted at the LLM's p50 for that tool, else its mean across tools).
+    """
+    by_tool: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for row in rows:
+        if row["metric"] == ANSWER_METRIC:
+            by_tool.setdefault(row["tool"], {})[row["answer"]] = row
+    llm_rows = [answers[LLM] for answers in by_tool.values() if LLM in answers]
+    llm_count = sum(row["count"] for row in llm_rows)
+    overall_llm = sum(row["sum"] for row in llm_rows) / llm_count if llm_count else None
+    stats = []
+    for tool, answers in sorted(by_tool.items()):
+        template, llm = answers.get(TEMPLATE), answers.get(LLM)
+        templated = template["count"] if template else 0
+        total = templated + (llm["count"] if llm else 0)
+        llm_p50 = llm["p50"] if llm else overall_llm
+        saved = templated * max(0.0, llm_p50 - template["p50"]) if template and llm_p50 is not None else None
+        stats.append({
+            "tool": tool,
+            "answers": total,
+            "bypass_rate": templated / total if total else 0.0,
+            "template_p50": template["p50"] if template else None,
+            "llm_p50": llm["p50"] if llm else None,
+            "saved_s": saved,
+        })
+    return stats
@@ -0,0 +1,212 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'chat_history')
+LEGACY_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'chat_history.json')
+LEGACY_SESSION = "legacy"
+
+_SESSION_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9_.-]*")
+
+def tokenize(text: str) -> List[str]:
+    return [token.strip(".-") for token in _TOKEN_RE.findall(text.lower()) if token.strip(".-")]
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+def valid_session_id(session_id: Optional[str]) -> bool:
+    # Session ids come from the URL and become file names
+    return bool(session_id) and bool(_SESSION_RE.match(session_id))
+
+class ChatHistory:
+    """
+    Append-only chat log: one JSONL file per session under `directory`.
+
+    Each message is one appended line, so a turn costs O(message) I/O no matter
+    how long the history is, and sessions never write to the same file. When a
+    session's file would grow past `max_bytes` it is renamed to
+    `<session>.<n>.jsonl` and a new one is started; `keep_segments` (if set)
+    bounds how many rotated files are kept per session.
+
+    User questions from every session go into an in-memory inverted index
+    (built by one scan of the directory, then updated on append) for `search`.
+    """
+    def __init__(self, directory: str = DEFAULT_DIR, max_bytes: int = 1 << 20,
+                 keep_segments: Optional[int] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep_segments = keep_segments
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._docs: List[Optional[Dict[str, Any]]] = []
+        self._index: Dict[str, List[int]] = defaultdict(list)
+        self._indexed = False
+
+    # --- Files ------------------------------------------------------------
+
+    def _path(self, session_id: str, segment: Optional[int] = None) -> str:
+        if not valid_session_id(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        name = f"{session_id}.jsonl" if segment is None else f"{session_id}.{segment}.jsonl"
+        return os.path.join(self.directory, name)
+
+    def _segments(self, session_id: str) -> List[int]:
+        prefix = f"{session_id}."
+        numbers = []
+        for name in os.listdir(self.directory):
+            middle = name[len(prefix):-len(".jsonl")] if name.startswith(prefix) and name.endswith(".jsonl") else ""
+            if middle.isdigit():
+                numbers.append(int(middle))
+        return sorted(numbers)
+
+    def _files(self, session_id: str) -> List[str]:
+        """The session's files, oldest first."""
+        files = [self._path(session_id, n) for n in self._segments(session_id)]
+        current = self._path(session_id)
+        return files + [current] if os.path.exists(current) else files
+
+    def _rotate(self, session_id: str):
+        segments = self._segments(session_id)
+        os.replace(self._path(session_id), self._path(session_id, (segments[-1] + 1) if segments else 1))
+        if self.keep_segments is not None:
+            for n in segments[:max(0, len(segments) + 1 - self.keep_segments)]:
+                os.remove(self._path(session_id, n))
+
+    @staticmethod
+    def _read(path: str) -> List[Dict[str, Any]]:
+        messages = []
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        messages.append(json.loads(line))
+                    except ValueError:
+                        continue  # A torn last line from a crash mid-append
+        except OSError:
+            pass
+        return messages
+
+    # --- Messages ---------------------------------------------------------
+
+    def append(self, session_id: str, role: str, content: str) -> Dict[str, Any]:
+        message = {"role": role, "content": content, "ts": time.time()}
+        line = json.dumps(message) + "\n"
+        path = self._path(session_id)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = 0
+            if size and size + len(line) > self.max_bytes:
+                self._rotate(session_id)
+            with open(path, 'a') as f:
+                f.write(line)
+            if self._indexed and role == "user":
+                self._add_doc(session_id, message)
+        return message
+
+    def load(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The session's messages, oldest first; only the last `limit` if given (newest files are read first)."""
+        messages: List[Dict[str, Any]] = []
+        for path in reversed(self._files(session_id)):
+            messages = self._read(path) + messages
+            if limit is not None and len(messages) >= limit:
+                return messages[-limit:]
+        return messages
+
+    def page(self, session_id: str, page: int = 0, page_size: int = 10, role: Optional[str] = "user"
+             ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Page `page` (0 = most recent) of the session's messages, newest first,
+        and whether there are older ones.
+        """
+        wanted = (page + 1) * page_size + 1
+        matched: List[Dict[str, Any]] = []
+        for path in reversed(self._files(session_id)):
+            matched = [m for m in self._read(path) if role is None or m.get("role") == role] + matched
+            if len(matched) >= wanted:
+                break
+        newest_first = matched[::-1]
+        return newest_first[page * page_size:(page + 1) * page_size], len(newest_first) > (page + 1) * page_size
+
+    def clear(self, session_id: str):
+        with self._lock:
+            for path in self._files(session_id):
+                os.remove(path)
+            for doc_id, doc in enumerate(self._docs):
+                if doc is not None and doc["session"] == session_id:
+                    self._docs[doc_id] = None
+
+    def sessions(self) -> List[str]:
+        return sorted({name.split(".", 1)[0] for name in os.listdir(self.directory) if name.endswith(".jsonl")})
+
+    # --- Search -----------------------------------------------------------
+
+    def _add_doc(self, session_id: str, message: Dict[str, Any]):
+        doc_id = len(self._docs)
+        self._docs.append({"session": session_id, "content": message["content"], "ts": message.get("ts")})
+        for token in set(tokenize(message["content"])):
+            self._index[token].append(doc_id)
+
+    def _build_index(self):
+        with self._lock:
+            if self._indexed:
+                return
+            for session_id in self.sessions():
+                for path in self._files(session_id):
+                    for message in self._read(path):
+                        if message.get("role") == "user":
+                            self._add_doc(session_id, message)
+            self._indexed = True
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Past questions (from any session) containing every word of `query`, most recent first."""
+        self._build_index()
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            postings = sorted((self._index.get(token, []) for token in set(tokens)), key=len)
+            hits = set(postings[0])
+            for posting in postings[1:]:
+                hits.intersection_update(posting)
+            results = []
+            for doc_id in sorted(hits, reverse=True):
+                doc = self._docs[doc_id]
+                if doc is not None:
+                    results.append(doc)
+                    if len(results) >= limit:
+                        break
+        return sorted(results, key=lambda doc: doc["ts"] or 0, reverse=True)
+
+    # --- Migration --------------------------------------------------------
+
+    def migrate_legacy(self, path: str = LEGACY_FILE, session_id: str = LEGACY_SESSION) -> int:
+        """
+        Imports the old single-file history (a JSON list of messages) as one
+        session and renames the file to `.migrated`. Returns the number of
+        messages imported.
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, 'r') as f:
+                messages = json.load(f)
+        except Exception as e:
+            print(f"Failed to read legacy chat history: {e}")
+            return 0
+        lines = "".join(json.dumps({"role": m.get("role"), "content": m.get("content"), "ts": None}) + "\n"
+                        for m in messages if isinstance(m, dict))
+        with self._lock:
+            with open(self._path(session_id), 'a') as f:
+                f.write(lines)
+            self._indexed = False
+            self._docs, self._index = [], defaultdict(list)
+        os.replace(path, path + ".migrated")
+        return len(messages)
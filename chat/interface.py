@@ -2,14 +2,20 @@ import streamlit as st
 import sys
 import os
 import json
-import streamlit.components.v1 as components
+import time
 
 # Add parent dir to path to import modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from graph.storage import GraphStorage
-from graph.query import QueryEngine
+# Only light modules at import time: networkx, the storage backends, requests,
+# numpy and pyvis are imported by the loader thread or where they are first used
+from graph.loader import GraphLoader
 from chat.llm import LLMClient
+from chat.streaming import coalesce
+from chat.answers import LLM, NODE_PARAMS, TEMPLATE, bypass_stats, render
+from telemetry.tracing import ANSWER_METRIC, observe, span, tracer
+from telemetry.profiling import profiler
+from chat.history import ChatHistory, LEGACY_SESSION, new_session_id, valid_session_id
 
 # Page Config
 st.set_page_config(
@@ -43,60 +49,115 @@ st.markdown("""
 st.title("🕸️ Vertex Clarity")
 st.caption("AI-Powered Engineering Knowledge Graph")
 
-# Chat History Persistence
-HISTORY_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'chat_history.json')
+# Chat History Persistence: append-only JSONL per session (chat/history.py)
+HISTORY_LOAD_LIMIT = 100  # messages restored into the chat when a session is reopened
+HISTORY_PAGE_SIZE = 10
 
-def load_history():
-    if os.path.exists(HISTORY_FILE):
-        try:
-            with open(HISTORY_FILE, 'r') as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
+@st.cache_resource
+def get_chat_history():
+    history = ChatHistory()
+    migrated = history.migrate_legacy()
+    if migrated:
+        print(f"Migrated {migrated} messages from chat_history.json into session '{LEGACY_SESSION}'")
+    return history
 
-def save_history(messages):
-    try:
-        data_dir = os.path.dirname(HISTORY_FILE)
-        if not os.path.exists(data_dir):
-            os.makedirs(data_dir)
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(messages, f)
-    except Exception as e:
-        print(f"Failed to save history: {e}")
+chat_history = get_chat_history()
+
+# The session id lives in the URL, so a refresh (or a bookmarked link) resumes the conversation
+session_id = st.query_params.get("session")
+if not valid_session_id(session_id):
+    session_id = new_session_id()
+    st.query_params["session"] = session_id
 
 # Initialize Session State
-if "messages" not in st.session_state:
-    st.session_state.messages = load_history()
+if st.session_state.get("session_id") != session_id:
+    st.session_state.session_id = session_id
+    st.session_state.history_page = 0
+    st.session_state.messages = [{"role": m["role"], "content": m["content"]}
+                                 for m in chat_history.load(session_id, limit=HISTORY_LOAD_LIMIT)]
 
-# Load Graph & Engine only once
+def record_message(role, content):
+    st.session_state.messages.append({"role": role, "content": content})
+    chat_history.append(session_id, role, content)
+    st.session_state.history_page = 0
+
+# Load Graph & Engine only once, on a background thread (rebuilt from data/ if the snapshot is stale).
+# The loader then watches the snapshot and swaps in a new engine when build_graph.py writes one.
 @st.cache_resource
-def get_engine():
-    storage = GraphStorage()
-    # Check if graph is empty, if so, maybe build it? 
-    if storage.graph.number_of_nodes() == 0:
-         # Try to load again just in case build_graph ran recently
-         storage.load()
-    return QueryEngine(storage)
+def get_loader():
+    # GRAPH_BACKEND=sqlite serves graph_data.db (see build_graph.py --backend); GRAPH_RELOAD_INTERVAL=0 disables reloads
+    # GRAPH_HISTORY_DIR is where build_graph.py records every build, for questions about past versions
+    return GraphLoader(backend=os.getenv("GRAPH_BACKEND", "json"),
+                       watch_interval=float(os.getenv("GRAPH_RELOAD_INTERVAL", "2")),
+                       history_dir=os.getenv("GRAPH_HISTORY_DIR", "graph_history")).start()
+
+# Views, layouts and HTML are computed once per graph version; `_engine` is excluded from the cache key
+@st.cache_data(max_entries=16)
+def get_view(_engine, version, view_key):
+    from chat.visualization import cluster_view, ego_view, full_view
+    mode, group_by, expanded, focus, hops = view_key
+    if mode == "Ego network":
+        return ego_view(_engine, focus, hops=hops)
+    if mode == "Full graph":
+        return full_view(_engine)
+    return cluster_view(_engine, group_by=group_by, expanded=expanded)
+
+@st.cache_data(max_entries=16)
+def get_view_layout(_engine, version, view_key):
+    from chat.visualization import compute_layout
+    return compute_layout(get_view(_engine, version, view_key))
+
+@st.cache_data(max_entries=16)
+def get_view_html(_engine, version, style_key, view_key):
+    from chat.visualization import render_network_html
+    return render_network_html(get_view(_engine, version, view_key), get_view_layout(_engine, version, view_key))
+
+@st.cache_data(max_entries=4)
+def get_group_names(_engine, version, group_by):
+    from chat.visualization import group_names
+    return group_names(_engine, group_by)
 
 @st.cache_resource
 def get_llm():
     return LLMClient()
 
-engine = get_engine()
+loader = get_loader()
 llm = get_llm()
 
-engine = get_engine()
-llm = get_llm()
+def drop_view_caches(old_engine, new_engine):
+    # Keys include the graph version, so entries for the old graph would never be hit again
+    for cached in (get_view, get_view_layout, get_view_html, get_group_names):
+        cached.clear()
+
+loader.on_reload("views", drop_view_caches)
+
+# The header above is already on screen; hold the rest of the page until the graph is in
+if not loader.ready:
+    loading = st.empty()
+    while not loader.wait(timeout=0.25):
+        loading.info(f"⏳ {loader.status()}")
+    loading.empty()
+if loader.state == "failed":
+    st.error(loader.status())
+    st.stop()
+# Read once per rerun: this run keeps answering from this engine even if a reload swaps in a newer one
+engine = loader.engine
 
 # Sidebar - Graph Stats & Tools
 with st.sidebar:
     st.header("Graph Status")
-    if engine.graph.number_of_nodes() > 0:
+    if engine.storage.number_of_nodes() > 0:
         col1, col2 = st.columns(2)
-        col1.metric("Nodes", engine.graph.number_of_nodes())
-        col2.metric("Edges", engine.graph.number_of_edges())
+        col1.metric("Nodes", engine.storage.number_of_nodes())
+        col2.metric("Edges", engine.storage.number_of_edges())
         st.success("Graph Loaded")
+        reload_note = f"Graph version {engine.storage.version}"
+        if loader.last_reload.get("latency_s") is not None:
+            reload_note += (f" · reloaded {loader.reloads}x, last in {loader.last_reload['latency_s'] * 1000:.0f} ms"
+                            f" at {time.strftime('%H:%M:%S', time.localtime(loader.last_reload['at']))}")
+        st.caption(reload_note)
+        if loader.last_reload.get("error"):
+            st.warning(f"Last reload failed, still serving the previous graph: {loader.last_reload['error']}")
     else:
         st.error("Graph Empty")
         st.info("Run `python build_graph.py` or restart the container.")
@@ -106,23 +167,88 @@ with st.sidebar:
     history_container = st.empty()
 
     def update_sidebar_history():
+        # One page of this session's questions, newest first, read from the log rather than re-rendering everything
         with history_container.container():
-            for msg in st.session_state.messages:
-                if msg["role"] == "user":
-                    # Truncate if long
-                    content = msg["content"]
-                    display_text = content[:40] + "..." if len(content) > 40 else content
-                    st.caption(f"👤 {display_text}")
+            page = st.session_state.history_page
+            questions, has_older = chat_history.page(session_id, page, HISTORY_PAGE_SIZE)
+            for msg in questions:
+                # Truncate if long
+                content = msg["content"]
+                display_text = content[:40] + "..." if len(content) > 40 else content
+                st.caption(f"👤 {display_text}")
+            if page or has_older:
+                newer, older = st.columns(2)
+                if newer.button("← Newer", disabled=page == 0, key=f"history_newer_{len(st.session_state.messages)}"):
+                    st.session_state.history_page -= 1
+                    st.rerun()
+                if older.button("Older →", disabled=not has_older, key=f"history_older_{len(st.session_state.messages)}"):
+                    st.session_state.history_page += 1
+                    st.rerun()
     
     # Initial Render
     update_sidebar_history()
 
+    search = st.text_input("Search past questions", placeholder="e.g. orders-db")
+    if search:
+        hits = chat_history.search(search)
+        if not hits:
+            st.caption("No matching questions.")
+        for hit in hits:
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(hit["ts"])) if hit["ts"] else "imported"
+            st.caption(f"🔎 {hit['content'][:60]} · [{when}](?session={hit['session']})")
+
     st.markdown("---")
     if st.button("Clear Chat History"):
+        chat_history.clear(session_id)
         st.session_state.messages = []
-        save_history([])
+        st.session_state.history_page = 0
         st.rerun()
 
+    # Latency per pipeline stage (rolling window), from telemetry.tracing
+    with st.expander("⏱️ Diagnostics"):
+        stats = [row for row in tracer.stats() if row["metric"] == "ekg_span_duration_seconds"]
+        if not stats:
+            st.caption("No requests traced yet.")
+        else:
+            st.dataframe([
+                {"stage": row["span"], "calls": row["count"],
+                 "p50 ms": round(row["p50"] * 1000, 2), "p95 ms": round(row["p95"] * 1000, 2),
+                 "p99 ms": round(row["p99"] * 1000, 2), "errors": row["errors"]}
+                for row in stats
+            ], hide_index=True)
+            for row in tracer.stats():
+                if row["metric"] == "ekg_llm_time_to_first_token_seconds":
+                    st.caption(f"{row['call']}: time to first token p50 {row['p50']:.2f}s")
+                elif row["metric"] == "ekg_llm_tokens_per_second":
+                    st.caption(f"{row['call']}: {row['p50']:.1f} tokens/sec (p50)")
+                elif row["metric"] == "ekg_stream_updates_per_second":
+                    st.caption(f"{row['call']}: {row['p50']:.1f} UI updates/sec (p50)")
+                elif row["metric"] == "ekg_stream_overhead_seconds":
+                    st.caption(f"{row['call']}: stream overhead p50 {row['p50'] * 1000:.2f} ms")
+            answers = bypass_stats(tracer.stats())
+            if answers:
+                st.caption("Answers without the summarizer LLM (templated)")
+                st.dataframe([
+                    {"tool": row["tool"], "answers": row["answers"], "templated %": round(row["bypass_rate"] * 100),
+                     "template p50 ms": round(row["template_p50"] * 1000, 2) if row["template_p50"] is not None else None,
+                     "LLM p50 s": round(row["llm_p50"], 2) if row["llm_p50"] is not None else None,
+                     "saved s": round(row["saved_s"], 1) if row["saved_s"] is not None else None}
+                    for row in answers
+                ], hide_index=True)
+            traces = [t for t in tracer.recent_traces() if t["name"] == "chat.request"]
+            if traces:
+                st.caption("Last request")
+                st.json(traces[0], expanded=False)
+            st.download_button("Prometheus metrics", tracer.to_prometheus(), file_name="metrics.prom", mime="text/plain")
+        slowest = profiler.slowest()
+        if slowest:
+            st.caption("Slowest queries" + (f" (profiles in `{profiler.directory}/`)" if profiler.enabled else ""))
+            st.dataframe([
+                {"call": call["name"], "ms": call["duration_ms"], "params": ", ".join(call["params"]),
+                 "graph version": call["graph_version"]}
+                for call in slowest[:10]
+            ], hide_index=True)
+
 # Tabs for Chat and Visualization
 tab1, tab2 = st.tabs(["💬 Chat", "🕸️ Architecture"])
 
@@ -134,71 +260,112 @@ with tab1:
 
     if prompt := st.chat_input("Ex: What breaks if orders-db fails?"):
         # 1. User Message
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        save_history(st.session_state.messages)
+        record_message("user", prompt)
         update_sidebar_history()  # Update sidebar immediately
         
         with st.chat_message("user"):
             st.markdown(prompt)
 
         # 2. Processing
+        import requests  # for the connection error below; loaded on the first question, not at startup
         with st.chat_message("assistant"):
             
-            # Use spinner for the "thinking" state
-            with st.spinner("Analyzing graph..."):
-                try:
-                    # A. Intent Parsing
-                    intent = llm.parse_intent(prompt)
-                    tool = intent.get("tool")
-                    params = intent.get("params", {})
+            # One trace per question: parse_intent, resolution, the graph query and the streamed answer
+            with span("chat.request") as request_span:
+                answered_by = None  # TEMPLATE or LLM once a tool result is being answered
+                # Use spinner for the "thinking" state
+                with st.spinner("Analyzing graph..."):
+                    try:
+                        # A. Intent Parsing
+                        intent = llm.parse_intent(prompt)
+                        tool = intent.get("tool")
+                        params = intent.get("params", {})
                     
-                    # B. Execute Tool
-                    result = None
-                    debug_info = f"Tool: `{tool}`\nParams: `{params}`"
+                        # B. Execute Tool
+                        result = None
+                        debug_info = f"Tool: `{tool}`\nParams: `{params}`"
+                        request_span.attrs["tool"] = tool
                     
-                    if tool == "get_owner":
-                        result = engine.get_owner(params.get("node_id"))
-                    elif tool == "upstream":
-                        result = engine.upstream(params.get("node_id"))
-                    elif tool == "downstream":
-                        result = engine.downstream(params.get("node_id"))
-                    elif tool == "blast_radius":
-                        result = engine.blast_radius(params.get("node_id"))
-                    elif tool == "path":
-                        result = engine.path(params.get("from_id"), params.get("to_id"))
-                    elif tool == "get_nodes":
-                        result = engine.get_nodes(params.get("type"))
-                    elif tool == "chat":
-                            result = params.get("response")
-                    else:
-                        result = {"error": f"Unknown tool: {tool}"}
+                        # "as_of" asks about a past build: the same query on that version's engine
+                        target = engine
+                        if params.get("as_of") and tool not in ("chat", "unknown", None):
+                            try:
+                                target = engine.at(params["as_of"])
+                                debug_info += f"\nGraph version: {target.history_version}"
+                            except ValueError as e:
+                                tool, result = "error", {"error": str(e)}
+
+                        if tool == "error":
+                            pass
+                        elif tool == "get_owner":
+                            result = target.get_owner(params.get("node_id"))
+                        elif tool == "upstream":
+                            result = target.upstream(params.get("node_id"))
+                        elif tool == "downstream":
+                            result = target.downstream(params.get("node_id"))
+                        elif tool == "blast_radius":
+                            result = target.blast_radius(params.get("node_id"))
+                        elif tool == "path":
+                            result = target.path(params.get("from_id"), params.get("to_id"))
+                        elif tool == "paths":
+                            result = target.paths(params.get("from_id"), params.get("to_id"), k=params.get("k") or 3,
+                                                  max_length=params.get("max_length"), edge_types=params.get("edge_types"))
+                        elif tool == "what_if":
+                            result = target.what_if(params.get("failures") or [])
+                        elif tool == "resilience":
+                            result = target.resilience(scenarios=min(int(params.get("scenarios") or 1000), 20000),
+                                                       failures=max(1, min(int(params.get("failures") or 1), 100)))
+                        elif tool == "single_points_of_failure":
+                            result = target.single_points_of_failure(params.get("node_id"), entries=params.get("entries"))
+                        elif tool == "query":
+                            try:
+                                result = target.query(params.get("steps") or [])
+                            except ValueError as e:
+                                result = {"error": f"Invalid query: {e}"}
+                        elif tool == "get_nodes":
+                            result = target.get_nodes(params.get("type"), **(params.get("filters") or {}))
+                        elif tool == "chat":
+                                result = params.get("response")
+                        else:
+                            result = {"error": f"Unknown tool: {tool}"}
                     
-                    # C. Synthesize Response (Streaming)
-                    if tool == "chat":
-                        final_response_stream = result # String (not stream)
-                    elif tool == "unknown" or tool is None:
-                        final_response_stream = "I'm not sure which service or component you are referring to. Could you try specifying the full name (e.g., 'payment-service')?"
-                    else:
-                        # Returns a generator for streaming
-                        final_response_stream = llm.summarize_results(prompt, result)
+                        # C. Synthesize Response (Streaming)
+                        answer_start = time.perf_counter()
+                        if tool == "chat":
+                            final_response_stream = result # String (not stream)
+                        elif tool == "unknown" or tool is None:
+                            final_response_stream = "I'm not sure which service or component you are referring to. Could you try specifying the full name (e.g., 'payment-service')?"
+                        else:
+                            # Simple results (an owner, a short list or path) get a fixed-format answer, no LLM call
+                            resolved = {key: target.resolve(params[key]) for key in NODE_PARAMS.get(tool, ())
+                                        if isinstance(params.get(key), str)}
+                            final_response_stream = render(tool, params, result, resolved)
+                            answered_by = TEMPLATE
+                            if final_response_stream is None:
+                                # Returns a generator for streaming
+                                final_response_stream = llm.summarize_results(prompt, result)
+                                answered_by = LLM
+                            request_span.attrs["answer"] = answered_by
                     
-                except (requests.RequestException, json.JSONDecodeError) as e:
-                    st.error(f"LLM Connection Error: {e}")
-                    final_response_stream = "Sorry, I'm having trouble connecting to the language model. Please check the connection."
-                except Exception as e:
-                    st.error(f"An unexpected error occurred: {e}")
-                    final_response_stream = "An unexpected error occurred. Please try again later."
-            
-            # Stream the output
-            if isinstance(final_response_stream, str):
-                st.markdown(final_response_stream)
-                st.session_state.messages.append({"role": "assistant", "content": final_response_stream})
-            else:
-                response = st.write_stream(final_response_stream)
-                st.session_state.messages.append({"role": "assistant", "content": response})
+                    except (requests.RequestException, json.JSONDecodeError) as e:
+                        st.error(f"LLM Connection Error: {e}")
+                        final_response_stream = "Sorry, I'm having trouble connecting to the language model. Please check the connection."
+                        answered_by = None
+                    except Exception as e:
+                        st.error(f"An unexpected error occurred: {e}")
+                        final_response_stream = "An unexpected error occurred. Please try again later."
+                        answered_by = None
             
-            save_history(st.session_state.messages)
-            update_sidebar_history()  # Update sidebar immediately
+                # Stream the output
+                if isinstance(final_response_stream, str):
+                    st.markdown(final_response_stream)
+                    record_message("assistant", final_response_stream)
+                else:
+                    # Tokens are batched into ~50 ms chunks so the page re-renders less often
+                    response = st.write_stream(coalesce(final_response_stream))
+                    record_message("assistant", response)
+                if answered_by:
+                    observe(ANSWER_METRIC, time.perf_counter() - answer_start, tool=tool, answer=answered_by)
 
             # Debug Info (Collapsed) - Show AFTER extraction
             with st.expander("🛠️ Debug Info"):
@@ -214,120 +381,46 @@ with tab1:
 with tab2:
     st.header("Graph Visualization")
     try:
-        from pyvis.network import Network
-        import tempfile
-        
-        # Create Pyvis network with Dark Modern Theme
-        net = Network(height="750px", width="100%", bgcolor="#0E1117", font_color="white", directed=True)
-        net.from_nx(engine.graph)
-        
-        # Physics: Optimized for stability and aesthetics (Constellation look)
-        net.set_options("""
-        {
-          "nodes": {
-            "font": {
-              "strokeWidth": 0,
-              "color": "white"
-            }
-          },
-          "edges": {
-            "color": {
-              "color": "#666666",
-              "highlight": "#ffffff",
-              "hover": "#ffffff",
-              "inherit": false,
-              "opacity": 0.8
-            },
-            "width": 2,
-            "smooth": {
-              "type": "continuous"
-            },
-            "arrows": {
-              "to": {
-                "enabled": true,
-                "scaleFactor": 0.8
-              }
-            }
-          },
-          "physics": {
-            "solver": "forceAtlas2Based",
-            "forceAtlas2Based": {
-              "gravitationalConstant": -50,
-              "centralGravity": 0.01,
-              "springLength": 100,
-              "springConstant": 0.08,
-              "damping": 0.4
-            },
-            "minVelocity": 0.75,
-            "stabilization": {
-              "enabled": true,
-              "iterations": 1000,
-              "updateInterval": 25,
-              "onlyDynamicEdges": false,
-              "fit": true
-            }
-          }
-        }
-        """)
-        
-        # Color & Icon Scheme - Deep Space Neon
-        type_colors = {
-            'service': {'color': '#00d4ff', 'highlight': '#80eaff'},   # Cyber Blue
-            'database': {'color': '#ff0055', 'highlight': '#ff80aa'},  # Neon Pink
-            'team': {'color': '#ffffff', 'highlight': '#e0e0e0'},      # White
-            'cache': {'color': '#ffbd00', 'highlight': '#ffe280'},     # Bright Yellow
-            'unknown': {'color': '#999999'}
-        }
-        
-        for node in net.nodes:
-            n_attributes = engine.graph.nodes[node['id']]
-            n_type = n_attributes.get('type', 'unknown')
-            colors = type_colors.get(n_type, type_colors['unknown'])
-            
-            # Node Styling
-            node['color'] = {
-                'background': colors['color'],
-                'border': '#1A1A1A',
-                'highlight': {'background': colors['highlight'], 'border': '#FFFFFF'},
-                'hover': {'background': colors['highlight'], 'border': '#FFFFFF'}
-            }
-            node['title'] = f"<b>{n_type.upper()}</b>: {node['label']}"
-            node['borderWidth'] = 1
-            node['shadow'] = True
-            node['font'] = {
-                'size': 16, 
-                'color': 'white', 
-                'face': 'Verdana',
-                'background': '#0E1117'
-            }
-            
-            # Size and Shape
-            if n_type == 'team':
-                node['size'] = 35
-                node['shape'] = 'box'
-                node['font']['size'] = 20
-                node['mass'] = 4
-                node['font']['background'] = 'none' # Box handles contrast
-                node['color']['background'] = '#2b2b2b' # Dark grey box for team
-                node['color']['border'] = 'white'
-                node['font']['color'] = 'white' # Team text inside dark box
-            elif n_type == 'database':
-                node['size'] = 12
-                node['shape'] = 'database'
+        import streamlit.components.v1 as components
+        from chat.visualization import CLUSTER_PREFIX, MAX_NODES, STYLE_KEY
+
+        version = engine.storage.version
+        # Small graphs are drawn whole; larger ones start from the clustered overview
+        modes = ["Clusters", "Ego network"]
+        if engine.storage.number_of_nodes() <= MAX_NODES:
+            modes.insert(0, "Full graph")
+        mode = st.radio("View", modes, horizontal=True)
+
+        group_by, expanded, focus, hops = "team", (), None, 2
+        if mode == "Clusters":
+            col1, col2 = st.columns([1, 3])
+            group_by = col1.selectbox("Group by", ["team", "namespace"])
+            expanded = tuple(col2.multiselect("Expand clusters", get_group_names(engine, version, group_by)))
+        elif mode == "Ego network":
+            col1, col2 = st.columns([3, 1])
+            focus = col1.text_input("Center node", placeholder="e.g. order-service")
+            hops = col2.slider("Hops", 1, 5, 2)
+
+        if mode == "Ego network" and not focus:
+            st.info("Enter a node to show its neighborhood.")
+        else:
+            view_key = (mode, group_by, expanded, focus, hops)
+            view = get_view(engine, version, view_key)
+            if view is None:
+                st.warning(f"No node matching '{focus}'.")
             else:
-                node['size'] = 15
-                node['shape'] = 'dot'
-
-        # Generate HTML
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp:
-            net.save_graph(tmp.name)
-            tmp.close()
-            with open(tmp.name, 'r', encoding='utf-8') as f:
-                html_data = f.read()
-            os.unlink(tmp.name)
-            
-        components.html(html_data, height=720, scrolling=False)
-        st.info("💡 **Interaction**: Drag nodes to rearrange, scroll to zoom, hover for details.")
+                html_data = get_view_html(engine, version, STYLE_KEY, view_key)
+                components.html(html_data, height=720, scrolling=False)
+                hidden_nodes, hidden_edges = view.graph.get('hidden_nodes', 0), view.graph.get('hidden_edges', 0)
+                if mode == "Clusters" and len(view.graph['expanded']) < len(expanded):
+                    st.caption("Some clusters stayed collapsed to keep the view under the element limit.")
+                if mode == "Clusters" and any(CLUSTER_PREFIX + g in view for g in view.graph['expanded']):
+                    st.caption("Large clusters are partly expanded: their best-connected members are shown.")
+                if mode == "Ego network" and view.graph['hops'] < hops:
+                    st.caption(f"Showing {view.graph['hops']} hop(s): a wider radius exceeds the element limit.")
+                if hidden_nodes or hidden_edges:
+                    st.caption(f"Not shown: {hidden_nodes} nodes, {hidden_edges} edges.")
+                st.info("💡 **Interaction**: Drag nodes to rearrange, scroll to zoom, hover for details.")
         
     except ImportError:
         st.warning("Install `pyvis` to see the graph.")
@@ -1,7 +1,14 @@
-import requests
 import json
 import os
+from datetime import date
 from typing import Dict, Any, List
+# Adjust import for local vs package
+try:
+    from telemetry.tracing import instrument_stream, traced
+    from chat.streaming import iter_tokens
+except ImportError:
+    from ..telemetry.tracing import instrument_stream, traced
+    from .streaming import iter_tokens
 
 class LLMClient:
     def __init__(self, base_url: str = None, model: str = None):
@@ -9,7 +16,9 @@ class LLMClient:
         self.model = model or os.getenv("LLM_MODEL", "llama3.1")
         self.api_url = f"{self.base_url}/api/generate"
 
+    @traced("llm.generate")
     def generate(self, prompt: str) -> str:
+        import requests  # deferred: keeps it off the app's startup path
         payload = {
             "model": self.model,
             "prompt": prompt,
@@ -26,6 +35,7 @@ class LLMClient:
             print(f"LLM Error: {e}")
             return str(e)
 
+    @traced("llm.parse_intent")
     def parse_intent(self, user_query: str) -> Dict[str, Any]:
         """
         Translates natural language to formatted JSON for graph queries.
@@ -40,12 +50,18 @@ Available Tools/Queries:
 3. `downstream(node_id)`: What does this depend on?
 4. `blast_radius(node_id)`: Full impact analysis if this fails.
 5. `path(from_id, to_id)`: How does X connect to Y?
-6. `get_nodes(type)`: List all services/databases/teams.
-7. `unknown`: If you cannot determine the intent.
+6. `get_nodes(type, filters)`: List all services/databases/teams, optionally filtered by properties such as team, namespace or oncall.
+7. `paths(from_id, to_id, k, max_length, edge_types)`: Several alternative routes from X to Y. `from_id`/`to_id` may be lists (e.g. every edge service).
+8. `what_if(failures)`: Impact of several simultaneous failures. Each failure is a node name, optionally with "state": "degraded" or "replicas_lost": n (losing some replicas degrades a service, losing all takes it down).
+9. `resilience(scenarios, failures)`: Resilience score over random failure scenarios, and the riskiest components.
+10. `query(steps)`: Compound questions that need several conditions at once. `steps` is a list applied in order: {"start": name} or {"match": {criteria}} first, then any of {"traverse": "downstream"|"upstream"} (or {"traverse": {"direction": ..., "depth": n, "edge_types": [...]}}), {"filter": {criteria}}, {"intersect": [steps]}, {"group_by": "team"}, {"limit": n}. Criteria map type, team, namespace or any property to a value, {"not": value} or {"in": [values]}.
+11. `single_points_of_failure(node_id, entries)`: Components every path from the edge (api-gateway by default, or `entries`) must pass through, overall or on the way to `node_id`; also components and links whose loss splits the estate.
+12. `unknown`: If you cannot determine the intent.
 
 Instructions:
 - Extract the `node_id` or `type` from the text.
 - `node_id` should try to include type prefix if obvious (e.g. service:order-service), otherwise just the name.
+- For questions about the past ("last Tuesday", "before the migration on 2024-05-02"), add "as_of" to the params: an ISO date (YYYY-MM-DD, or a full timestamp) or a graph version number. Today is {today}.
 - Return ONLY valid JSON.
 
 Examples:
@@ -67,17 +83,45 @@ JSON: {"tool": "blast_radius", "params": {"node_id": "cache:redis-main"}}
 Q: "What happens if payment fails?"
 JSON: {"tool": "blast_radius", "params": {"node_id": "service:payment-service"}}
 
+Q: "Zone A lost redis-main and two of three order-service replicas. What is degraded and what is down?"
+JSON: {"tool": "what_if", "params": {"failures": [{"node_id": "cache:redis-main"}, {"node_id": "service:order-service", "replicas_lost": 2}]}}
+
+Q: "How resilient are we to two random failures?"
+JSON: {"tool": "resilience", "params": {"scenarios": 2000, "failures": 2}}
+
+Q: "Which databases are reachable from api-gateway and owned by teams other than platform-team?"
+JSON: {"tool": "query", "params": {"steps": [{"start": "service:api-gateway"}, {"traverse": "downstream"}, {"filter": {"type": "database", "team": {"not": "platform-team"}}}]}}
+
+Q: "Services within two hops of order-service, grouped by team"
+JSON: {"tool": "query", "params": {"steps": [{"start": "service:order-service"}, {"traverse": {"direction": "downstream", "depth": 2}}, {"filter": {"type": "service"}}, {"group_by": "team"}]}}
+
+Q: "What are our single points of failure?"
+JSON: {"tool": "single_points_of_failure", "params": {}}
+
+Q: "Which components does every request from api-gateway to payments-db go through?"
+JSON: {"tool": "single_points_of_failure", "params": {"node_id": "database:payments-db", "entries": ["service:api-gateway"]}}
+
+Q: "What did the blast radius of payments-db look like on 2024-05-14?"
+JSON: {"tool": "blast_radius", "params": {"node_id": "database:payments-db", "as_of": "2024-05-14"}}
+
 Q: "Show me all databases"
 JSON: {"tool": "get_nodes", "params": {"type": "database"}}
 
+Q: "Which services does payments-team own in namespace ecommerce?"
+JSON: {"tool": "get_nodes", "params": {"type": "service", "filters": {"team": "payments-team", "namespace": "ecommerce"}}}
+
 Q: "How does api-gateway connect to payments-db?"
 JSON: {"tool": "path", "params": {"from_id": "service:api-gateway", "to_id": "database:payment-service"}}
 
+Q: "Show me all paths up to length 4 from api-gateway to payments-db"
+JSON: {"tool": "paths", "params": {"from_id": "service:api-gateway", "to_id": "database:payments-db", "k": 5, "max_length": 4}}
+
 Q: "Hi"
 JSON: {"tool": "chat", "params": {"response": "Hello! Ask me about your engineering infrastructure."}}
 """
         
-        # Safer prompt construction
+        # Safer prompt construction; relative dates ("last Tuesday") need today's date to become an as_of
+        system_prompt = system_prompt.replace("{today}", date.today().strftime("%A %Y-%m-%d"))
         full_prompt = f"{system_prompt}\n\nUser query: {json.dumps(user_query)}\n\nJSON:"
         
         response = self.generate(full_prompt)
@@ -101,7 +145,12 @@ JSON: {"tool": "chat", "params": {"response": "Hello! Ask me about your engineer
              # Fallback if valid JSON structure but decode fails
             return {"tool": "chat", "params": {"response": "I couldn't parse the intent. Please try again."}}
 
-    def generate_stream(self, prompt: str):
+    def generate_stream(self, prompt: str, span_name: str = "llm.stream"):
+        """Yields response tokens as they arrive; time to first token and tokens/sec are traced."""
+        return instrument_stream(self._stream_tokens(prompt), span_name)
+
+    def _stream_tokens(self, prompt: str):
+        import requests
         payload = {
             "model": self.model,
             "prompt": prompt,
@@ -113,12 +162,7 @@ JSON: {"tool": "chat", "params": {"response": "Hello! Ask me about your engineer
         try:
             with requests.post(self.api_url, json=payload, stream=True) as response:
                 response.raise_for_status()
-                for line in response.iter_lines():
-                    if line:
-                        body = json.loads(line)
-                        token = body.get("response", "")
-                        if token:
-                            yield token
+                yield from iter_tokens(response.iter_lines())
         except requests.RequestException as e:
             yield f"LLM Error: {e}"
 
@@ -136,10 +180,10 @@ System Data: {json.dumps(tool_output)}
 
 Instructions:
 - Use STRICTLY the System Data to answer the User Question.
-- If the System Data is empty `{}`, `[]`, or `null`: You MUST say "I could not find that service or component in the graph."
+- If the System Data is empty `{{}}`, `[]`, or `null`: You MUST say "I could not find that service or component in the graph."
 - Do NOT invent services (like "Service A", "Service B") that are not in the data.
 - Do NOT make general statements about technology (e.g. "Redis is usually used for caching") unless you explicitly state it's general knowledge and NOT from the graph.
-- If the data contains an error (like "Node not found"), report it.
+- If the data contains an error (like "Node not found"), report it, and suggest any `candidates` it lists as what the user may have meant.
 - Keep it concise and technical.
 """
-        return self.generate_stream(prompt)
+        return self.generate_stream(prompt, span_name="llm.summarize_results")
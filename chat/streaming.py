@@ -0,0 +1,125 @@
+import json
+import time
+from json.decoder import scanstring
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+try:
+    from telemetry.tracing import STREAM_OVERHEAD_METRIC, UPDATE_RATE_METRIC, observe
+except ImportError:
+    from ..telemetry.tracing import STREAM_OVERHEAD_METRIC, UPDATE_RATE_METRIC, observe
+
+# orjson is optional: decode_token falls back to a stdlib fast path
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# A UI update at most every 50 ms, or sooner once 512 bytes are waiting
+DEFAULT_INTERVAL = 0.05
+DEFAULT_MAX_BYTES = 512
+
+_RESPONSE_KEY = '"response":"'
+
+def decode_token(line: Union[bytes, str]) -> str:
+    """
+    The "response" text of one Ollama NDJSON line ("" if there is none).
+
+    With orjson the line is decoded outright. Without it, the string value is
+    read straight off the line with the C string scanner the json module
+    uses, skipping the rest of the object (model, created_at, and the long
+    context array on the last line); anything unexpected goes through
+    json.loads.
+    """
+    if orjson is not None:
+        body = orjson.loads(line)
+        return body.get("response", "") if isinstance(body, dict) else ""
+    text = line.decode() if isinstance(line, bytes) else line
+    start = text.find(_RESPONSE_KEY)
+    if start >= 0:
+        try:
+            return scanstring(text, start + len(_RESPONSE_KEY))[0]
+        except ValueError:
+            pass
+    body = json.loads(text)
+    return body.get("response", "") if isinstance(body, dict) else ""
+
+def iter_tokens(lines: Iterable[Union[bytes, str]]) -> Iterator[str]:
+    """Non-empty response tokens from a stream of NDJSON lines."""
+    for line in lines:
+        if line:
+            token = decode_token(line)
+            if token:
+                yield token
+
+class StreamStats:
+    """What one coalesced stream cost: tokens in, UI updates out, and the adapter's own time."""
+    def __init__(self):
+        self.tokens = 0
+        self.updates = 0
+        self.bytes = 0
+        self.first_token_s: Optional[float] = None
+        self.duration_s = 0.0
+        self.overhead_s = 0.0
+
+    @property
+    def updates_per_sec(self) -> float:
+        return self.updates / self.duration_s if self.duration_s > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tokens": self.tokens,
+            "updates": self.updates,
+            "bytes": self.bytes,
+            "first_token_ms": round(self.first_token_s * 1000, 1) if self.first_token_s is not None else None,
+            "duration_ms": round(self.duration_s * 1000, 1),
+            "updates_per_sec": round(self.updates_per_sec, 1),
+            "overhead_ms": round(self.overhead_s * 1000, 3),
+        }
+
+def coalesce(tokens: Iterable[str], interval: float = DEFAULT_INTERVAL, max_bytes: int = DEFAULT_MAX_BYTES,
+             stats: Optional[StreamStats] = None, name: str = "llm.stream") -> Iterator[str]:
+    """
+    Re-yields a token stream as fewer, larger chunks for st.write_stream.
+
+    The first token is passed through as soon as it arrives, so time to first
+    token is unchanged. After that, tokens are buffered and flushed once
+    `interval` seconds have passed since the last update or `max_bytes` are
+    waiting, whichever comes first. Flushes happen as tokens arrive, so a
+    chunk can be held back by at most one inter-token gap. Updates/sec and the
+    adapter's overhead are recorded in `stats` and in the tracer.
+    """
+    stats = stats if stats is not None else StreamStats()
+    start = time.perf_counter()
+    buffer = []
+    waiting = 0
+    last_update = None
+    try:
+        for token in tokens:
+            now = time.perf_counter()
+            stats.tokens += 1
+            size = len(token.encode())
+            stats.bytes += size
+            if last_update is None:
+                stats.first_token_s = now - start
+                chunk = token
+            else:
+                buffer.append(token)
+                waiting += size
+                if waiting < max_bytes and now - last_update < interval:
+                    stats.overhead_s += time.perf_counter() - now
+                    continue
+                chunk = "".join(buffer)
+                buffer.clear()
+                waiting = 0
+            stats.updates += 1
+            stats.overhead_s += time.perf_counter() - now
+            yield chunk
+            last_update = time.perf_counter()
+        if buffer:
+            stats.updates += 1
+            yield "".join(buffer)
+    finally:
+        stats.duration_s = time.perf_counter() - start
+        if stats.updates:
+            observe(UPDATE_RATE_METRIC, stats.updates_per_sec, call=name)
+            observe(STREAM_OVERHEAD_METRIC, stats.overhead_s, call=name)
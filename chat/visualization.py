@@ -0,0 +1,345 @@
+import hashlib
+import json
+import math
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import networkx as nx
+import numpy as np
+
+Positions = Dict[str, Tuple[float, float]]
+
+# Hard cap on what the browser receives, whichever view is shown
+MAX_NODES = 300
+MAX_EDGES = 1500
+
+CLUSTER_PREFIX = "cluster:"
+UNGROUPED = "(unassigned)"
+OTHER = "(other)"
+
+# Above this many nodes the O(n^2) spring layout is swapped for the layered one
+SPRING_MAX_NODES = 500
+
+# Color & Icon Scheme - Deep Space Neon
+TYPE_COLORS = {
+    'service': {'color': '#00d4ff', 'highlight': '#80eaff'},   # Cyber Blue
+    'database': {'color': '#ff0055', 'highlight': '#ff80aa'},  # Neon Pink
+    'team': {'color': '#ffffff', 'highlight': '#e0e0e0'},      # White
+    'cache': {'color': '#ffbd00', 'highlight': '#ffe280'},     # Bright Yellow
+    'cluster': {'color': '#7c4dff', 'highlight': '#b39dff'},   # Violet super-node
+    'unknown': {'color': '#999999', 'highlight': '#999999'}
+}
+
+# Positions are computed server-side, so the browser runs no physics at all
+VIS_OPTIONS = {
+    "nodes": {
+        "font": {"strokeWidth": 0, "color": "white"}
+    },
+    "edges": {
+        "color": {"color": "#666666", "highlight": "#ffffff", "hover": "#ffffff", "inherit": False, "opacity": 0.8},
+        "width": 2,
+        "smooth": False,
+        "arrows": {"to": {"enabled": True, "scaleFactor": 0.8}}
+    },
+    "physics": {"enabled": False},
+    "interaction": {"hideEdgesOnDrag": True}
+}
+
+# Cache key for the rendered HTML: changes whenever the styling above does
+STYLE_KEY = hashlib.sha1(json.dumps([TYPE_COLORS, VIS_OPTIONS], sort_keys=True).encode()).hexdigest()[:12]
+
+def spring_layout(graph: nx.DiGraph, iterations: int = 50, seed: int = 0) -> Positions:
+    """Vectorized Fruchterman-Reingold (dense, O(n^2) per iteration) in [-1, 1]^2."""
+    nodes = list(graph.nodes)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    if n == 1:
+        return {nodes[0]: (0.0, 0.0)}
+    index = {node: i for i, node in enumerate(nodes)}
+    adjacency = np.zeros((n, n))
+    for u, v in graph.edges():
+        adjacency[index[u], index[v]] = adjacency[index[v], index[u]] = 1.0
+
+    pos = np.random.default_rng(seed).random((n, 2))
+    k = np.sqrt(1.0 / n)
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        distance = np.clip(np.linalg.norm(delta, axis=-1), 0.01, None)
+        # Repulsion between every pair, attraction along edges
+        displacement = np.einsum('ijk,ij->ik', delta, k * k / distance ** 2 - adjacency * distance / k)
+        length = np.clip(np.linalg.norm(displacement, axis=-1), 0.01, None)
+        pos += displacement * (temperature / length)[:, None]
+        temperature -= cooling
+    return _normalize(nodes, pos)
+
+def hierarchical_layout(graph: nx.DiGraph, sweeps: int = 4) -> Positions:
+    """
+    Layered layout in O((n + m) log n): rank = longest path from a source in
+    the SCC condensation, order within each rank by barycenter sweeps.
+    """
+    nodes = list(graph.nodes)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    condensation = nx.condensation(graph)
+    mapping = condensation.graph['mapping']
+    component_rank = {}
+    for c in nx.topological_sort(condensation):
+        component_rank[c] = max((component_rank[p] + 1 for p in condensation.predecessors(c)), default=0)
+
+    index = {node: i for i, node in enumerate(nodes)}
+    rank = np.array([component_rank[mapping[node]] for node in nodes])
+    edges = np.array([(index[u], index[v]) for u, v in graph.edges()], dtype=np.int64).reshape(-1, 2)
+
+    # Initial order: by ID within each rank
+    order = np.lexsort((np.arange(n), rank))
+    x = _rank_positions(order, rank)
+    for sweep in range(sweeps):
+        # Alternate pulling nodes toward their parents' and their children's mean x
+        src, dst = (edges[:, 0], edges[:, 1]) if sweep % 2 == 0 else (edges[:, 1], edges[:, 0])
+        weight = np.bincount(dst, minlength=n)
+        barycenter = np.bincount(dst, weights=x[src], minlength=n)
+        barycenter = np.where(weight > 0, barycenter / np.maximum(weight, 1), x)
+        order = np.lexsort((barycenter, rank))
+        x = _rank_positions(order, rank)
+
+    pos = np.column_stack([x, rank.astype(float)])
+    return _normalize(nodes, pos)
+
+def _rank_positions(order: np.ndarray, rank: np.ndarray) -> np.ndarray:
+    """x = index within the node's rank, centered on 0, for nodes sorted by (rank, key)."""
+    sorted_rank = rank[order]
+    starts = np.searchsorted(sorted_rank, sorted_rank, side='left')
+    ends = np.searchsorted(sorted_rank, sorted_rank, side='right')
+    x = np.empty(len(order))
+    x[order] = np.arange(len(order)) - starts - (ends - starts - 1) / 2.0
+    return x
+
+def _normalize(nodes, pos: np.ndarray) -> Positions:
+    pos = pos - pos.mean(axis=0)
+    scale = np.abs(pos).max(axis=0)
+    pos = pos / np.where(scale > 0, scale, 1.0)
+    return {node: (float(px), float(py)) for node, (px, py) in zip(nodes, pos)}
+
+def compute_layout(graph: nx.DiGraph, method: str = "auto") -> Positions:
+    if method == "auto":
+        method = "spring" if graph.number_of_nodes() <= SPRING_MAX_NODES else "hierarchical"
+    if method == "spring":
+        return spring_layout(graph)
+    return hierarchical_layout(graph)
+
+def style_node(node: Dict, attrs: Dict):
+    """Applies the per-type look to a pyvis node dict in place."""
+    n_type = attrs.get('type') or 'unknown'
+    colors = TYPE_COLORS.get(n_type, TYPE_COLORS['unknown'])
+
+    # Node Styling
+    node['color'] = {
+        'background': colors['color'],
+        'border': '#1A1A1A',
+        'highlight': {'background': colors['highlight'], 'border': '#FFFFFF'},
+        'hover': {'background': colors['highlight'], 'border': '#FFFFFF'}
+    }
+    node['title'] = f"<b>{n_type.upper()}</b>: {node['label']}"
+    node['borderWidth'] = 1
+    node['shadow'] = True
+    node['font'] = {
+        'size': 16,
+        'color': 'white',
+        'face': 'Verdana',
+        'background': '#0E1117'
+    }
+
+    # Size and Shape
+    if n_type == 'team':
+        node['size'] = 35
+        node['shape'] = 'box'
+        node['font']['size'] = 20
+        node['font']['background'] = 'none' # Box handles contrast
+        node['color']['background'] = '#2b2b2b' # Dark grey box for team
+        node['color']['border'] = 'white'
+        node['font']['color'] = 'white' # Team text inside dark box
+    elif n_type == 'cluster':
+        # Super-node: area grows with the number of collapsed members
+        node['size'] = 20 + 6 * math.log2(attrs.get('members', 1))
+        node['shape'] = 'dot'
+        node['title'] = f"<b>{attrs['group_by'].upper()}</b>: {attrs['name']} ({attrs['members']} nodes)"
+    elif n_type == 'database':
+        node['size'] = 12
+        node['shape'] = 'database'
+    else:
+        node['size'] = 15
+        node['shape'] = 'dot'
+
+    if attrs.get('focus'):
+        node['borderWidth'] = 4
+        node['color']['border'] = '#FFFFFF'
+
+def render_network_html(graph: nx.DiGraph, positions: Positions, height: str = "750px") -> str:
+    """pyvis HTML for `graph` with nodes pinned at `positions` and physics disabled."""
+    from pyvis.network import Network
+
+    net = Network(height=height, width="100%", bgcolor="#0E1117", font_color="white", directed=True)
+    net.set_options(json.dumps(VIS_OPTIONS))
+
+    # Spread [-1, 1] coordinates so labels don't overlap (~60px per node across)
+    spread = max(600.0, 60.0 * graph.number_of_nodes() ** 0.5)
+    # add_node/add_edge rather than from_nx, which writes 'size' into the graph's own node attrs
+    for node_id, attrs in graph.nodes(data=True):
+        x, y = positions.get(node_id, (0.0, 0.0))
+        net.add_node(node_id, label=attrs.get('label', node_id), x=x * spread, y=y * spread, physics=False)
+    for node in net.nodes:
+        style_node(node, graph.nodes[node['id']])
+    for source, target, attrs in graph.edges(data=True):
+        count = attrs.get('count', 1)
+        title = attrs.get('type') or ''
+        if count > 1:
+            title = f"{count} edges ({title})"
+        net.add_edge(source, target, title=title, width=1 + math.log2(count))
+    return net.generate_html()
+
+def _group_of(engine, node_id: str, attrs: Dict, group_by: str) -> str:
+    if group_by == 'team':
+        if attrs.get('type') == 'team':
+            return attrs.get('name') or node_id
+        group = engine.ownership.owner(node_id)
+    else:
+        group = attrs.get(group_by)
+    return group if group else UNGROUPED
+
+def _copy_node(view: nx.DiGraph, node_id: str, attrs: Dict):
+    view.add_node(node_id, **{k: v for k, v in attrs.items() if k != 'id'})
+
+def _cap_edges(view: nx.DiGraph, edges: Dict[Tuple[str, str], Dict], max_edges: int):
+    """Adds the `max_edges` heaviest edges to `view`, recording how many were dropped."""
+    ranked = sorted(edges.items(), key=lambda item: -item[1].get('count', 1))
+    view.add_edges_from((s, t, attrs) for (s, t), attrs in ranked[:max_edges])
+    view.graph['hidden_edges'] = max(0, len(ranked) - max_edges)
+
+def cluster_view(engine, group_by: str = 'team', expanded: Iterable[str] = (),
+                 max_nodes: int = MAX_NODES, max_edges: int = MAX_EDGES) -> nx.DiGraph:
+    """
+    Overview graph with one super-node per team (or `group_by` property) and
+    edges aggregated between them. Groups in `expanded` show their members
+    instead, as many as fit within `max_nodes`.
+    """
+    storage = engine.storage
+    members: Dict[str, List[str]] = {}
+    group_of: Dict[str, str] = {}
+    for node_id, attrs in storage.iter_nodes():
+        group = _group_of(engine, node_id, attrs, group_by)
+        group_of[node_id] = group
+        members.setdefault(group, []).append(node_id)
+
+    # Too many groups to draw: keep the largest, fold the rest into one
+    if len(members) > max_nodes:
+        ranked = sorted(members, key=lambda g: -len(members[g]))
+        other = [n for g in ranked[max_nodes - 1:] for n in members.pop(g)]
+        members[OTHER] = other
+        for node_id in other:
+            group_of[node_id] = OTHER
+
+    view = nx.DiGraph(group_by=group_by, expanded=[], hidden_nodes=0)
+    budget = max_nodes - len(members)
+    # group -> members drawn individually; a partly expanded group keeps a
+    # super-node for the rest, and shows its best-connected members first
+    open_groups: Dict[str, Set[str]] = {}
+    for group in expanded:
+        ids = members.get(group)
+        if not ids or group in open_groups or budget <= 0:
+            continue
+        if len(ids) - 1 <= budget:
+            open_groups[group] = set(ids)
+            budget -= len(ids) - 1
+        else:
+            ranked = sorted(ids, key=lambda n: (-len(storage.successors(n)) - len(storage.predecessors(n)), n))
+            open_groups[group] = set(ranked[:budget])
+            budget = 0
+        view.graph['expanded'].append(group)
+
+    def shown(node_id: str) -> str:
+        group = group_of[node_id]
+        return node_id if node_id in open_groups.get(group, ()) else CLUSTER_PREFIX + group
+
+    for group, ids in members.items():
+        visible = open_groups.get(group, set())
+        for node_id in visible:
+            _copy_node(view, node_id, storage.get_node(node_id))
+        rest = len(ids) - len(visible)
+        if rest:
+            label = f"{group} (+{rest})" if visible else f"{group} ({rest})"
+            view.add_node(CLUSTER_PREFIX + group, type='cluster', name=group, group_by=group_by,
+                          members=rest, label=label)
+
+    edges: Dict[Tuple[str, str], Dict] = {}
+    for source, target, attrs in storage.iter_edges():
+        a, b = shown(source), shown(target)
+        if a == b:
+            continue
+        edge = edges.get((a, b))
+        if edge is None:
+            edges[(a, b)] = {'type': attrs.get('type'), 'count': 1}
+        else:
+            edge['count'] += 1
+            if edge['type'] != attrs.get('type'):
+                edge['type'] = 'mixed'
+    _cap_edges(view, edges, max_edges)
+    return view
+
+def ego_view(engine, node_id: str, hops: int = 2,
+             max_nodes: int = MAX_NODES, max_edges: int = MAX_EDGES) -> Optional[nx.DiGraph]:
+    """
+    The k-hop up/downstream neighborhood of `node_id`. If `hops` would exceed
+    `max_nodes`, the largest radius that fits is used (or, at radius 1, the
+    first neighbors by ID).
+    """
+    center = engine.get_node(node_id)
+    if center is None:
+        return None
+    center_id = center['id']
+
+    neighborhood: List[Dict] = []
+    radius = 0
+    for depth in range(1, hops + 1):
+        ring = engine.upstream(center_id, depth=depth) + engine.downstream(center_id, depth=depth)
+        if neighborhood and len(ring) + 1 > max_nodes:
+            break
+        neighborhood, radius = ring, depth
+        if len(ring) + 1 >= max_nodes:
+            break
+
+    neighborhood = sorted({r['id']: r for r in neighborhood}.values(), key=lambda r: r['id'])
+    view = nx.DiGraph(focus=center_id, hops=radius, hidden_nodes=max(0, len(neighborhood) + 1 - max_nodes))
+    _copy_node(view, center_id, center)
+    view.nodes[center_id]['focus'] = True
+    for record in neighborhood[:max_nodes - 1]:
+        if record['id'] != center_id:
+            _copy_node(view, record['id'], record)
+
+    edges = {}
+    for source in view.nodes:
+        for target, edge_type in engine.storage.out_edges(source):
+            if target in view:
+                edges[(source, target)] = {'type': edge_type}
+    _cap_edges(view, edges, max_edges)
+    return view
+
+def full_view(engine, max_nodes: int = MAX_NODES, max_edges: int = MAX_EDGES) -> Optional[nx.DiGraph]:
+    """The whole graph, copied out of storage, or None if it exceeds `max_nodes`."""
+    storage = engine.storage
+    if storage.number_of_nodes() > max_nodes:
+        return None
+    view = nx.DiGraph(hidden_nodes=0)
+    for node_id, attrs in storage.iter_nodes():
+        _copy_node(view, node_id, attrs)
+    _cap_edges(view, {(s, t): {'type': attrs.get('type')} for s, t, attrs in storage.iter_edges()}, max_edges)
+    return view
+
+def group_names(engine, group_by: str = 'team') -> List[str]:
+    """Cluster names for `group_by`, largest first (the choices for expansion)."""
+    sizes: Dict[str, int] = {}
+    for node_id, attrs in engine.storage.iter_nodes():
+        group = _group_of(engine, node_id, attrs, group_by)
+        sizes[group] = sizes.get(group, 0) + 1
+    return sorted(sizes, key=lambda g: (-sizes[g], g))
@@ -1,13 +1,31 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from array import array
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 import json
+import sys
+
+# Version of what the connectors emit, part of every snapshot's source fingerprint (graph.loader):
+# bump it whenever a connector change alters the nodes or edges built from the same files, so
+# snapshots built by the old code are rebuilt instead of being served as fresh
+CONNECTOR_VERSION = 2
+
+def _intern_keys(properties: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Copies a property dict with interned keys, so "team", "oncall", ... are shared
+    across every node instead of being duplicated per parsed YAML document.
+    """
+    if not properties:
+        return {}
+    return {sys.intern(k) if type(k) is str else k: v for k, v in properties.items()}
 
 class Node:
+    __slots__ = ("id", "type", "name", "properties")
+
     def __init__(self, id: str, type: str, name: str, properties: Dict[str, Any] = None):
         self.id = id
-        self.type = type
+        self.type = sys.intern(type) if type else type
         self.name = name
-        self.properties = properties or {}
+        self.properties = _intern_keys(properties)
 
     def to_dict(self):
         return {
@@ -18,12 +36,14 @@ class Node:
         }
 
 class Edge:
+    __slots__ = ("id", "type", "source", "target", "properties")
+
     def __init__(self, id: str, type: str, source: str, target: str, properties: Dict[str, Any] = None):
         self.id = id
-        self.type = type
+        self.type = sys.intern(type) if type else type
         self.source = source
         self.target = target
-        self.properties = properties or {}
+        self.properties = _intern_keys(properties)
 
     def to_dict(self):
         return {
@@ -34,6 +54,88 @@ class Edge:
             "properties": self.properties
         }
 
+class EdgeBatch:
+    """
+    Compact, append-only edge list for large builds.
+
+    Sources, targets and types are stored as parallel `array('I')` columns of IDs
+    into a shared string table, edge IDs as one UTF-8 blob with offsets, and the
+    (rare) per-edge properties in a sparse dict. Iterating yields regular `Edge`
+    objects, so a batch can be handed to anything that accepts a list of edges.
+    """
+    __slots__ = ("strings", "_codes", "sources", "targets", "types", "_id_blob", "_id_offsets", "_properties")
+
+    def __init__(self, edges: Iterable[Edge] = ()):
+        self.strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self.sources = array("I")
+        self.targets = array("I")
+        self.types = array("I")
+        self._id_blob = bytearray()
+        self._id_offsets = array("I", [0])
+        self._properties: Dict[int, Dict[str, Any]] = {}
+        self.extend(edges)
+
+    def code(self, value: str) -> int:
+        """Returns the string-table ID for `value`, adding it if needed."""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            value = sys.intern(value)
+            self.strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def append(self, source: str, target: str, type: str, id: str = None, properties: Dict[str, Any] = None):
+        index = len(self.sources)
+        self.sources.append(self.code(source))
+        self.targets.append(self.code(target))
+        self.types.append(self.code(type))
+        # An empty ID slot means "derive it" (see _edge_id)
+        if id is not None:
+            self._id_blob += id.encode("utf-8")
+        self._id_offsets.append(len(self._id_blob))
+        if properties:
+            self._properties[index] = _intern_keys(properties)
+
+    def add(self, edge: Edge):
+        self.append(edge.source, edge.target, edge.type, edge.id, edge.properties)
+
+    def extend(self, edges: Iterable[Edge]):
+        for edge in edges:
+            self.add(edge)
+
+    def _edge_id(self, index: int) -> str:
+        start, end = self._id_offsets[index], self._id_offsets[index + 1]
+        if start == end:
+            strings = self.strings
+            return f"edge:{strings[self.sources[index]]}-{strings[self.types[index]]}-{strings[self.targets[index]]}"
+        return self._id_blob[start:end].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def __getitem__(self, index: int) -> Edge:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("EdgeBatch index out of range")
+        strings = self.strings
+        return Edge(
+            id=self._edge_id(index),
+            type=strings[self.types[index]],
+            source=strings[self.sources[index]],
+            target=strings[self.targets[index]],
+            properties=self._properties.get(index),
+        )
+
+    def __iter__(self) -> Iterator[Edge]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [edge.to_dict() for edge in self]
+
 class BaseConnector(ABC):
     @abstractmethod
     def parse(self, file_path: str) -> tuple[List[Node], List[Edge]]:
@@ -0,0 +1,193 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Endpoint extraction shared by the docker-compose and Kubernetes connectors:
+# env var values -> (edge type, typed target ID) for the services they point at.
+
+# scheme -> (edge type, node type of the target when the file doesn't say)
+SCHEMES: Dict[str, Tuple[str, str]] = {
+    "http": ("calls", "service"),
+    "https": ("calls", "service"),
+    "grpc": ("calls", "service"),
+    "grpcs": ("calls", "service"),
+    "ws": ("calls", "service"),
+    "wss": ("calls", "service"),
+    "postgres": ("connects_to", "database"),
+    "postgresql": ("connects_to", "database"),
+    "mysql": ("connects_to", "database"),
+    "mariadb": ("connects_to", "database"),
+    "mongodb": ("connects_to", "database"),
+    "mongodb+srv": ("connects_to", "database"),
+    "cassandra": ("connects_to", "database"),
+    "redis": ("connects_to", "cache"),
+    "rediss": ("connects_to", "cache"),
+    "memcached": ("connects_to", "cache"),
+    "amqp": ("connects_to", "queue"),
+    "amqps": ("connects_to", "queue"),
+    "kafka": ("connects_to", "queue"),
+    "nats": ("connects_to", "queue"),
+}
+STORE_TYPES = ("database", "cache", "queue")
+
+# scheme://[user[:password]@]host[:port][,host[:port]...][/path]; the last @ ends the credentials
+URL = re.compile(r"([A-Za-z][A-Za-z0-9+.-]*)://(?:[^/?#\s]*@)?([^/?#\s@]+)")
+# host[:port], IPv6 literals in brackets
+HOST = re.compile(r"\[?([A-Za-z0-9_.:-]+?)\]?(?::(\d+))?$")
+# name, name.namespace, name.namespace.svc, name.namespace.svc.cluster.local
+K8S_DNS = re.compile(r"([a-z0-9](?:[-a-z0-9]*[a-z0-9])?)(?:\.([a-z0-9](?:[-a-z0-9]*[a-z0-9])?)(\.svc(?:\.[a-z0-9.-]+)?)?)?$")
+# Keys whose value is a bare host[:port] list rather than a URL (KAFKA_BROKERS=kafka:9092, REDIS_HOST=redis-main)
+HOST_KEY_SUFFIXES = ("_HOST", "_HOSTS", "_ADDR", "_ADDRESS", "_BROKER", "_BROKERS", "_SERVER", "_SERVERS",
+                     "_ENDPOINT", "_ENDPOINTS")
+
+Endpoint = Tuple[Optional[str], str, Optional[int]]  # (scheme, host, port)
+
+def parse_endpoints(value: str, bare_hosts: bool = False) -> Tuple[Endpoint, ...]:
+    """
+    (scheme, host, port) for every endpoint in an env var value: URLs of any
+    scheme (several hosts allowed, as in mongodb://a:27017,b:27017/db), and
+    with `bare_hosts` also scheme-less host[:port] lists.
+    """
+    if "://" in value:
+        endpoints = []
+        for match in URL.finditer(value):
+            scheme = match.group(1).lower()
+            endpoints.extend((scheme, host, port) for host, port in _hosts(match.group(2)))
+        return tuple(endpoints)
+    if bare_hosts:
+        return tuple((None, host, port) for host, port in _hosts(value))
+    return ()
+
+def _hosts(text: str) -> List[Tuple[str, Optional[int]]]:
+    hosts = []
+    for item in text.split(","):
+        match = HOST.match(item.strip())
+        if match and match.group(1):
+            port = match.group(2)
+            hosts.append((match.group(1).lower(), int(port) if port else None))
+    return hosts
+
+def service_name(host: str, namespaces: Iterable[str] = ()) -> Optional[str]:
+    """
+    The service a host names: itself for a bare name, the first label of
+    Kubernetes service DNS (name.namespace[.svc[.cluster.local]]), else None
+    (an external host). The two-label form only counts for a known namespace.
+    """
+    if "." not in host and ":" not in host:
+        return host if host != "localhost" and host[0] != "-" and host[-1] != "-" else None
+    match = K8S_DNS.match(host)
+    if not match:
+        return None
+    name, namespace, svc = match.groups()
+    if namespace is None or svc is not None or namespace in namespaces:
+        return name
+    return None
+
+def infer_type(labels: Dict[str, Any], image: str = "") -> str:
+    """Node type of a compose service: its `type` label, else guessed from the image."""
+    if "type" in labels:
+        return labels["type"]
+    if "postgres" in image:
+        return "database"
+    if "redis" in image:
+        return "cache"
+    return "service"
+
+def guess_type(name: str) -> str:
+    """Node type for a name with nothing else to go on (orders-db, redis-main, ...)."""
+    if name.endswith("-db"):
+        return "database"
+    if "redis" in name:
+        return "cache"
+    return "service"
+
+class EndpointResolver:
+    """
+    Resolves env vars to typed target IDs against one file's services.
+
+    `ids` is the file's name -> typed node ID table, built once per file.
+    With `known_only`, endpoints naming anything else are ignored (compose:
+    only services defined in the file); otherwise they get a type from the
+    scheme, or from the name, and the `service` prefix by default.
+    """
+    def __init__(self, ids: Dict[str, str], namespaces: Iterable[str] = (), known_only: bool = False):
+        self.ids = ids
+        self.namespaces = frozenset(namespaces)
+        self.known_only = known_only
+        # value -> targets, for URLs and for bare host lists: the same values recur across a file's services
+        self._urls: Dict[str, List[Tuple[str, str, str]]] = {}
+        self._bare: Dict[str, List[Tuple[str, str, str]]] = {}
+        # key -> names a host key? Keys recur across services too, and endswith over every suffix costs
+        # more than the dict lookup; with it an entry that isn't an endpoint costs a few cheap tests
+        self._host_keys: Dict[str, bool] = {}
+
+    def resolve(self, key: str, value: Any) -> List[Tuple[str, str, str]]:
+        """(edge type, target ID, target name) for each service `value` points at."""
+        if type(value) is not str:
+            return []
+        # Cheapest test first: most values are neither URLs nor under a host key
+        if "://" in value:
+            cache, bare = self._urls, False
+        elif self._is_host_key(key):
+            cache, bare = self._bare, True
+        else:
+            return []
+        targets = cache.get(value)
+        if targets is None:
+            targets = cache[value] = self._resolve(value, bare)
+        return targets
+
+    def _is_host_key(self, key: str) -> bool:
+        host_key = self._host_keys.get(key)
+        if host_key is None:
+            host_key = self._host_keys[key] = key.endswith(HOST_KEY_SUFFIXES)
+        return host_key
+
+    def _resolve(self, value: str, bare: bool) -> List[Tuple[str, str, str]]:
+        targets = []
+        for scheme, host, _ in parse_endpoints(value, bare):
+            name = service_name(host, self.namespaces)
+            if name is None:
+                continue
+            target_id = self.ids.get(name)
+            edge_type, scheme_type = SCHEMES.get(scheme, ("calls", None)) if scheme else (None, None)
+            if target_id is None:
+                if self.known_only:
+                    continue
+                target_id = f"{scheme_type or guess_type(name)}:{name}"
+            if edge_type is None:
+                edge_type = "connects_to" if target_id.split(":", 1)[0] in STORE_TYPES else "calls"
+            targets.append((edge_type, target_id, name))
+        return targets
+
+    def resolve_all(self, env: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+        """resolve() over a whole environment, each (edge type, target) once."""
+        # resolve() inlined: this loop runs once per env entry of every service
+        urls, bare_hosts, host_keys = self._urls, self._bare, self._host_keys
+        targets = []
+        for key, value in env.items():
+            if type(value) is not str:
+                continue
+            if "://" in value:
+                found = urls.get(value)
+                if found is None:
+                    found = urls[value] = self._resolve(value, False)
+            elif host_keys.get(key) or (key not in host_keys and self._is_host_key(key)):
+                found = bare_hosts.get(value)
+                if found is None:
+                    found = bare_hosts[value] = self._resolve(value, True)
+            else:
+                continue
+            targets += found
+        return list(dict.fromkeys(targets))
+
+def env_dict(env: Any) -> Dict[str, Any]:
+    """Compose `environment` (a KEY=value list or a mapping) as a dict."""
+    if isinstance(env, dict):
+        return env
+    result = {}
+    for item in env or ():
+        if type(item) is str:
+            key, sep, value = item.partition("=")
+            if sep:
+                result[key] = value
+    return result
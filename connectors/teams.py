@@ -4,8 +4,13 @@ try:
     from connectors.base import BaseConnector, Node, Edge
 except ImportError:
     from .base import BaseConnector, Node, Edge
+try:
+    from telemetry.profiling import profiled
+except ImportError:
+    from ..telemetry.profiling import profiled
 
 class TeamsConnector(BaseConnector):
+    @profiled("connector.teams.parse")
     def parse(self, file_path: str) -> tuple[list[Node], list[Edge]]:
         nodes = []
         edges = []
@@ -0,0 +1,159 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+Q = 3
+PAD = "\x00" * (Q - 1)
+
+def _grams(text: str) -> List[str]:
+    padded = f"{PAD}{text}{PAD}"
+    return [padded[i:i + Q] for i in range(len(padded) - Q + 1)]
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance (insert, delete, substitute, swap
+    adjacent) between `a` and `b`, or max_distance + 1 as soon as it is known
+    to exceed max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+    too_far = max_distance + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [too_far] * len(b)
+        # Only cells within max_distance of the diagonal can stay under the limit
+        low, high = max(1, i - max_distance), min(len(b), i + max_distance)
+        row_min = current[0] if low == 1 else too_far
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return too_far
+        previous2, previous = previous, current
+    return min(previous[len(b)], too_far)
+
+class FuzzyIndex:
+    """
+    Typo-tolerant node lookup over node IDs and names, built once per graph version.
+
+    Every term (a node's name and its ID without the `type:` prefix, lower
+    case) is split into padded trigrams with an inverted index gram -> terms.
+    A term within edit distance k of the query differs in at most k * (Q + 1)
+    of the query's distinct grams (a swap touches Q + 1), so out of any p of
+    the query's grams it must contain at least p - k * (Q + 1). Only the
+    postings of the rarest grams are read, candidates are counted against that
+    bound, and the survivors are checked with a banded edit distance. Lookups
+    cost a few short postings rather than a scan of the graph.
+    """
+    def __init__(self, storage, max_distance: int = 2, posting_budget: int = 256):
+        self.version = storage.version
+        self.max_distance = max_distance
+        self.posting_budget = posting_budget
+        self.terms: List[str] = []
+        self._nodes: List[List[str]] = []  # term id -> node ids
+        self._exact: Dict[str, int] = {}   # term -> term id
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+        for node_id, attrs in storage.iter_nodes():
+            lowered = node_id.lower()
+            self._add_term(lowered.split(":", 1)[-1], node_id)
+            name = attrs.get('name')
+            if name:
+                self._add_term(str(name).lower(), node_id)
+            # Full IDs ("service:payment-service") are matched exactly, not fuzzily
+            self._add_term(lowered, node_id, grams=False)
+        self._postings = dict(self._postings)
+
+    def _add_term(self, term: str, node_id: str, grams: bool = True):
+        term_id = self._exact.get(term)
+        if term_id is None:
+            term_id = self._exact[term] = len(self.terms)
+            self.terms.append(term)
+            self._nodes.append([])
+            if grams:
+                for gram in set(_grams(term)):
+                    self._postings[gram].append(term_id)
+        if node_id not in self._nodes[term_id]:
+            self._nodes[term_id].append(node_id)
+
+    def exact(self, query: str) -> List[str]:
+        """Node IDs whose ID or name equals `query`, ignoring case."""
+        term_id = self._exact.get(query.lower())
+        return list(self._nodes[term_id]) if term_id is not None else []
+
+    def containing(self, fragment: str) -> List[str]:
+        """
+        Node IDs with an ID or name containing `fragment` (ignoring case),
+        shortest first. A term containing the fragment has each of its inner
+        trigrams, so only the terms in the rarest one's posting are checked.
+        Fragments shorter than a trigram have none: they scan the terms (one
+        per distinct ID or name, not one per node).
+        """
+        fragment = fragment.lower()
+        grams = {fragment[i:i + Q] for i in range(len(fragment) - Q + 1)}
+        if grams:
+            term_ids = min((self._postings.get(gram, ()) for gram in grams), key=len)
+        else:
+            term_ids = range(len(self.terms))
+        found = {node_id for term_id in term_ids if fragment in self.terms[term_id]
+                 for node_id in self._nodes[term_id]}
+        return sorted(found, key=lambda node_id: (len(node_id), node_id))
+
+    def distance_limit(self, query: str, max_distance: Optional[int] = None) -> int:
+        # Short queries have too few grams for the filter (and too little signal to correct)
+        cap = self.max_distance if max_distance is None else max_distance
+        return min(cap, (len(query) + Q - 2) // (Q + 1))
+
+    def _within(self, query: str, grams: List[str], k: int) -> Dict[str, int]:
+        # The k * (Q + 1) + 1 rarest grams are required. Counting postings is far cheaper than an
+        # edit distance, so extra grams (up to a few times the longest required posting) are read
+        # too: each one raises the number of hits a candidate needs.
+        required = k * (Q + 1) + 1
+        probe = grams[:required]
+        budget = max(self.posting_budget, 4 * max((len(self._postings.get(g, ())) for g in probe), default=0))
+        for gram in grams[required:]:
+            if len(self._postings.get(gram, ())) > budget:
+                break
+            probe.append(gram)
+        min_hits = len(probe) - k * (Q + 1)
+
+        hits = Counter()
+        for gram in probe:
+            hits.update(self._postings.get(gram, ()))
+        best: Dict[str, int] = {}
+        for term_id, count in hits.items():
+            if count < min_hits:
+                continue
+            distance = edit_distance(query, self.terms[term_id], k)
+            if distance <= k:
+                for node_id in self._nodes[term_id]:
+                    if distance < best.get(node_id, k + 1):
+                        best[node_id] = distance
+        return best
+
+    def lookup(self, query: str, max_distance: Optional[int] = None, limit: int = 5) -> List[Tuple[str, int]]:
+        """
+        Up to `limit` (node_id, distance) pairs within `max_distance` edits of
+        `query`, closest first (ties: shortest ID).
+        """
+        query = query.lower()
+        if ":" in query and query not in self._exact:
+            query = query.split(":", 1)[1]
+        k = self.distance_limit(query, max_distance)
+        best: Dict[str, int] = {node_id: 0 for node_id in self.exact(query)}
+        if k > 0:
+            grams = sorted(set(_grams(query)), key=lambda gram: len(self._postings.get(gram, ())))
+            # Widen one edit at a time: most typos are one edit, and a smaller k reads fewer postings
+            for distance in range(1, k + 1):
+                if len(best) >= limit:
+                    break
+                for node_id, found in self._within(query, grams, distance).items():
+                    best.setdefault(node_id, found)
+        ranked = sorted(best.items(), key=lambda item: (item[1], len(item[0]), item[0]))
+        return ranked[:limit]
@@ -0,0 +1,295 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import networkx as nx
+
+try:
+    from graph.storage import GraphStorage, node_link_data, node_link_graph, write_json_atomic
+except ImportError:
+    from .storage import GraphStorage, node_link_data, node_link_graph, write_json_atomic
+
+INDEX_FILE = "index.jsonl"
+CHECKPOINT = "checkpoint"
+DELTA = "delta"
+
+AsOf = Union[int, float, str, datetime]
+
+State = Tuple[Dict[str, Dict], Dict[str, Dict[str, Dict]], Dict[str, Any]]
+
+def graph_state(graph: nx.DiGraph, copy: bool = False) -> State:
+    """
+    (node attrs, successor -> edge attrs, graph attrs) of a graph as plain
+    dicts. With copy, the attribute dicts are copied so later in-place
+    updates of the graph don't show through.
+    """
+    if not copy:
+        return dict(graph.nodes(data=True)), dict(graph.adjacency()), graph.graph
+    nodes = {n: dict(attrs) for n, attrs in graph.nodes(data=True)}
+    successors = {n: {t: dict(attrs) for t, attrs in targets.items()} for n, targets in graph.adjacency()}
+    return nodes, successors, dict(graph.graph)
+
+def diff_graphs(old: Union[nx.DiGraph, State], new: Union[nx.DiGraph, State]) -> Dict[str, Any]:
+    """
+    What turns `old` into `new`: nodes/edges added or changed (with their full
+    attributes), removed, and the graph-level metadata if it changed.
+    """
+    old_nodes, old_succ, old_graph = graph_state(old) if isinstance(old, nx.DiGraph) else old
+    new_nodes, new_succ, new_graph = graph_state(new) if isinstance(new, nx.DiGraph) else new
+    nodes = {n: attrs for n, attrs in new_nodes.items() if old_nodes.get(n) != attrs}
+    removed_nodes = [n for n in old_nodes if n not in new_nodes]
+    edges, removed_edges = [], []
+    empty: Dict[str, Dict] = {}
+    for source, targets in new_succ.items():
+        old_targets = old_succ.get(source, empty)
+        if targets == old_targets:
+            continue
+        edges.extend([source, t, attrs] for t, attrs in targets.items() if old_targets.get(t) != attrs)
+        removed_edges.extend([source, t] for t in old_targets if t not in targets and t in new_nodes)
+    delta: Dict[str, Any] = {}
+    if nodes:
+        delta["nodes"] = nodes
+    if removed_nodes:
+        delta["removed_nodes"] = removed_nodes
+    if edges:
+        delta["edges"] = edges
+    if removed_edges:
+        delta["removed_edges"] = removed_edges
+    if old_graph != new_graph:
+        delta["graph"] = dict(new_graph)
+    return delta
+
+def apply_delta(graph: nx.DiGraph, delta: Dict[str, Any]):
+    """Applies a diff_graphs() delta in place (attributes are replaced, not merged)."""
+    graph.remove_nodes_from(delta.get("removed_nodes", ()))
+    for node_id, attrs in delta.get("nodes", {}).items():
+        if node_id in graph:
+            graph.nodes[node_id].clear()
+        graph.add_node(node_id, **attrs)
+    graph.remove_edges_from(delta.get("removed_edges", ()))
+    for source, target, attrs in delta.get("edges", ()):
+        if graph.has_edge(source, target):
+            graph.edges[source, target].clear()
+        graph.add_edge(source, target, **attrs)
+    if "graph" in delta:
+        graph.graph.clear()
+        graph.graph.update(delta["graph"])
+
+class GraphHistory:
+    """
+    Every build of the graph, kept as a chain of deltas between checkpoints.
+
+    `record(storage)` appends the difference from the previous version (only
+    the nodes and edges that changed), so the directory grows with the size of
+    the changes rather than the graph. A full checkpoint is written first and
+    again once the deltas since the last one add up to `checkpoint_ratio`
+    times its size (or `max_chain` deltas), which bounds how much has to be
+    replayed to rebuild any version. Versions are numbered 1, 2, ... and listed
+    with their build time in index.jsonl.
+
+    `engine(version)` materializes a version into an in-memory GraphStorage
+    and QueryEngine, starting from the closest cached version or checkpoint.
+    The last `cache_size` engines are kept (LRU), so repeated questions about
+    the same past version run at current-version speed.
+    """
+    def __init__(self, directory: str = "graph_history", cache_size: int = 4,
+                 checkpoint_ratio: float = 1.0, max_chain: int = 50):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.checkpoint_ratio = checkpoint_ratio
+        self.max_chain = max_chain
+        self.hits = 0
+        self.misses = 0
+        self._entries: List[Dict[str, Any]] = []
+        self._index_size = -1
+        self._engines: "OrderedDict[int, Any]" = OrderedDict()
+        self._head: Optional[Tuple[int, State]] = None
+        self._lock = threading.RLock()
+
+    # --- Index ---
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _refresh(self):
+        """Re-reads index.jsonl if it grew (versions may be recorded by another process)."""
+        try:
+            size = os.path.getsize(self._index_path())
+        except OSError:
+            size = 0
+        if size == self._index_size:
+            return
+        entries = []
+        if size:
+            with open(self._index_path()) as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # torn last line from a crashed writer
+        self._entries = entries
+        self._index_size = size
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """One entry per version: version, at (unix time), kind, bytes, nodes, edges, changes."""
+        with self._lock:
+            self._refresh()
+            return list(self._entries)
+
+    def latest(self) -> Optional[int]:
+        versions = self.versions()
+        return versions[-1]["version"] if versions else None
+
+    def resolve(self, as_of: AsOf) -> int:
+        """
+        The version for `as_of`: a version number (negative counts back from
+        the latest), or a datetime / ISO date / unix time, meaning the last
+        version built at or before it.
+        """
+        versions = self.versions()
+        if not versions:
+            raise ValueError("No graph history recorded yet")
+        if isinstance(as_of, int) and not isinstance(as_of, bool):
+            number = versions[-1]["version"] + 1 + as_of if as_of < 0 else as_of
+            if not any(e["version"] == number for e in versions):
+                raise ValueError(f"Unknown graph version: {as_of}")
+            return number
+        moment = _timestamp(as_of)
+        earlier = [e for e in versions if e["at"] <= moment]
+        if not earlier:
+            raise ValueError(f"No graph version recorded at or before {as_of}")
+        return earlier[-1]["version"]
+
+    # --- Recording ---
+
+    def record(self, storage) -> Dict[str, Any]:
+        """
+        Appends `storage`'s current graph as a new version, unless it is
+        identical to the latest one. Returns the version's index entry.
+        """
+        with self._lock:
+            self._refresh()
+            new = storage.graph
+            current = graph_state(new, copy=True)
+            previous = self._entries[-1] if self._entries else None
+            if previous is None:
+                delta = None
+            else:
+                head = self._head
+                old = head[1] if head is not None and head[0] == previous["version"] else self._graph(previous["version"])
+                delta = diff_graphs(old, current)
+                if not delta:
+                    return previous
+            version = previous["version"] + 1 if previous else 1
+            os.makedirs(self.directory, exist_ok=True)
+            chain = self._chain_since_checkpoint()
+            checkpoint_bytes = chain[0]["bytes"] if chain else 0
+            delta_bytes = sum(e["bytes"] for e in chain[1:])
+            path = os.path.join(self.directory, f"{version:06d}.json")
+            if delta is None or len(chain) > self.max_chain or delta_bytes > self.checkpoint_ratio * checkpoint_bytes:
+                kind, payload = CHECKPOINT, node_link_data(new)
+            else:
+                kind, payload = DELTA, delta
+            write_json_atomic(path, payload, indent=None)
+            entry = {
+                "version": version, "at": time.time(), "kind": kind, "bytes": os.path.getsize(path),
+                "nodes": new.number_of_nodes(), "edges": new.number_of_edges(),
+                "changes": _changes(delta) if delta is not None else new.number_of_nodes() + new.number_of_edges(),
+            }
+            with open(self._index_path(), "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._refresh()
+            # The next build is diffed against this copy instead of a replay from disk
+            self._head = (version, current)
+            return entry
+
+    def _chain_since_checkpoint(self, version: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entries from the last checkpoint up to `version` (default: the latest)."""
+        entries = [e for e in self._entries if version is None or e["version"] <= version]
+        for i in range(len(entries) - 1, -1, -1):
+            if entries[i]["kind"] == CHECKPOINT:
+                return entries[i:]
+        return []
+
+    # --- Materializing ---
+
+    def _load(self, version: int) -> Dict[str, Any]:
+        with open(os.path.join(self.directory, f"{version:06d}.json")) as f:
+            return json.load(f)
+
+    def _graph(self, version: int) -> nx.DiGraph:
+        """A private copy of `version`'s graph, rebuilt from the nearest cached version or checkpoint."""
+        chain = self._chain_since_checkpoint(version)
+        if not chain or chain[-1]["version"] != version:
+            raise ValueError(f"Unknown graph version: {version}")
+        base = max((v for v in self._engines if chain[0]["version"] <= v <= version), default=None)
+        if base is not None:
+            graph = self._engines[base].storage.graph.copy()
+            replay = [e for e in chain if e["version"] > base]
+        else:
+            graph = node_link_graph(self._load(chain[0]["version"]))
+            replay = chain[1:]
+        for entry in replay:
+            apply_delta(graph, self._load(entry["version"]))
+        return graph
+
+    def engine(self, as_of: AsOf):
+        """A QueryEngine over the graph as it was at `as_of` (see resolve)."""
+        try:
+            from graph.query import QueryEngine
+        except ImportError:
+            from .query import QueryEngine
+        with self._lock:
+            version = self.resolve(as_of)
+            engine = self._engines.get(version)
+            if engine is not None:
+                self._engines.move_to_end(version)
+                self.hits += 1
+                return engine
+            self.misses += 1
+            storage = GraphStorage(persistence_file=None)
+            storage.graph = self._graph(version)
+            engine = QueryEngine(storage)
+            engine.history_version = version
+            self._engines[version] = engine
+            while len(self._engines) > self.cache_size:
+                self._engines.popitem(last=False)
+            return engine
+
+    def stats(self) -> Dict[str, Any]:
+        versions = self.versions()
+        return {
+            "versions": len(versions),
+            "checkpoints": sum(1 for e in versions if e["kind"] == CHECKPOINT),
+            "bytes": sum(e["bytes"] for e in versions),
+            "cached": list(self._engines),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+def _changes(delta: Dict[str, Any]) -> int:
+    return sum(len(delta.get(key, ())) for key in ("nodes", "removed_nodes", "edges", "removed_edges"))
+
+def _timestamp(as_of: Union[float, str, datetime]) -> float:
+    if isinstance(as_of, (int, float)) and not isinstance(as_of, bool):
+        return float(as_of)
+    end_of_day = False
+    if isinstance(as_of, str):
+        text = as_of.strip().replace("Z", "+00:00")
+        try:
+            as_of = datetime.fromisoformat(text)
+        except ValueError:
+            raise ValueError(f"as_of must be a version number or an ISO date: {text!r}")
+        # A bare date means the graph as it was at the end of that day
+        end_of_day = len(text) == 10
+    if isinstance(as_of, datetime):
+        if as_of.tzinfo is None:
+            as_of = as_of.astimezone()  # local time, like the build times people remember
+        return as_of.timestamp() + (86400 - 1e-3 if end_of_day else 0)
+    raise ValueError(f"as_of must be a version number, a date or a unix time: {as_of!r}")
@@ -0,0 +1,88 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_INDEXED_PROPERTIES = ("team", "namespace", "oncall")
+
+def freeze(value: Any) -> Any:
+    """Hashable stand-in for a property value with the same equality (lists -> tuples, ...)."""
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+class PropertyIndex:
+    """
+    Hash indexes on `type` and a configurable set of node properties.
+
+    Each indexed key maps value -> posting set of node IDs. Postings are dicts
+    used as insertion-ordered sets, so results keep a stable order. The owner
+    (GraphStorage) keeps the index in sync on every upsert/delete.
+    """
+    def __init__(self, keys: Iterable[str] = DEFAULT_INDEXED_PROPERTIES):
+        self.keys = ("type",) + tuple(k for k in keys if k != "type")
+        self._postings: Dict[str, Dict[Any, Dict[str, None]]] = {k: {} for k in self.keys}
+
+    def rebuild(self, nodes: Iterable[Tuple[str, Dict[str, Any]]]):
+        self._postings = {k: {} for k in self.keys}
+        for node_id, attrs in nodes:
+            self.add(node_id, attrs)
+
+    def add(self, node_id: str, attrs: Dict[str, Any]):
+        for key in self.keys:
+            if key in attrs:
+                self._postings[key].setdefault(freeze(attrs[key]), {})[node_id] = None
+
+    def remove(self, node_id: str, attrs: Dict[str, Any]):
+        for key in self.keys:
+            if key in attrs:
+                value = freeze(attrs[key])
+                posting = self._postings[key].get(value)
+                if posting is not None:
+                    posting.pop(node_id, None)
+                    if not posting:
+                        del self._postings[key][value]
+
+    def snapshot(self, attrs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """The indexed part of `attrs`, taken before an in-place update."""
+        if not attrs:
+            return {}
+        return {k: attrs[k] for k in self.keys if k in attrs}
+
+    def update(self, node_id: str, before: Dict[str, Any], after: Dict[str, Any]):
+        """Moves `node_id` between postings for the indexed keys whose value changed."""
+        missing = object()
+        for key in self.keys:
+            old, new = before.get(key, missing), after.get(key, missing)
+            if old is new or old == new:
+                continue
+            if old is not missing:
+                self.remove(node_id, {key: old})
+            if new is not missing:
+                self.add(node_id, {key: new})
+
+    def is_indexed(self, key: str, value: Any) -> bool:
+        # A None filter also matches nodes that lack the key, which postings can't answer
+        return key in self._postings and value is not None
+
+    def lookup(self, key: str, value: Any) -> Dict[str, None]:
+        return self._postings[key].get(freeze(value), {})
+
+    def match(self, criteria: Dict[str, Any]) -> Tuple[Optional[List[str]], Dict[str, Any]]:
+        """
+        Intersects the postings of the indexed criteria, smallest first.
+        Returns (candidate IDs or None if nothing was indexed, residual criteria).
+        """
+        postings = []
+        residual = {}
+        for key, value in criteria.items():
+            if self.is_indexed(key, value):
+                postings.append(self.lookup(key, value))
+            else:
+                residual[key] = value
+        if not postings:
+            return None, residual
+        postings.sort(key=len)
+        smallest, rest = postings[0], postings[1:]
+        return [n for n in smallest if all(n in p for p in rest)], residual
@@ -0,0 +1,251 @@
+import hashlib
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Heavy modules (networkx, yaml, the storage backends) are imported inside the
+# functions below, so importing this module is cheap and the work happens on
+# the loader thread rather than before the UI's first paint.
+
+SOURCES_KEY = "sources"
+CONNECTOR_KEY = "connectors"  # in the sources fingerprint, beside the file names
+DEFAULT_SNAPSHOT = "graph_data.json"
+
+def default_sources(data_dir: Optional[str] = None) -> Tuple[List[Any], List[str]]:
+    """The connectors build_graph.py runs, paired with their files in data/."""
+    from connectors.docker_compose import DockerComposeConnector
+    from connectors.teams import TeamsConnector
+    from connectors.kubernetes import KubernetesConnector
+
+    data_dir = data_dir or os.path.join(os.getcwd(), 'data')
+    connectors = [DockerComposeConnector(), TeamsConnector(), KubernetesConnector()]
+    files = [
+        os.path.join(data_dir, 'docker-compose.yml'),
+        os.path.join(data_dir, 'teams.yaml'),
+        os.path.join(data_dir, 'k8s-deployments.yaml')
+    ]
+    return connectors, files
+
+def source_fingerprint(files: List[str]) -> Dict[str, str]:
+    """
+    {file name: sha1 of its content} for the build inputs (missing files are
+    left out), plus the connectors' output version. Content rather than mtime,
+    so a fresh checkout or a copied volume still matches the snapshot that was
+    built from it; the version, so a connector change doesn't.
+    """
+    from connectors.base import CONNECTOR_VERSION
+
+    fingerprint = {}
+    for path in files:
+        digest = hashlib.sha1()
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        except OSError:
+            continue
+        fingerprint[os.path.basename(path)] = digest.hexdigest()
+    if fingerprint:
+        fingerprint[CONNECTOR_KEY] = str(CONNECTOR_VERSION)
+    return fingerprint
+
+def is_fresh(storage, files: List[str]) -> bool:
+    """True if the stored graph was built from exactly the current versions of `files`."""
+    if storage.number_of_nodes() == 0:
+        return False
+    return storage.get_metadata(SOURCES_KEY) == source_fingerprint(files)
+
+def build(storage, connectors: List[Any], files: List[str]):
+    """Rebuilds `storage` from the connectors and stamps it with the sources' fingerprint."""
+    # Stamped by the build itself after the last node/edge, so a crashed build is never taken as fresh
+    storage.build_from_connectors(connectors, files, metadata={SOURCES_KEY: source_fingerprint(files)})
+
+def open_storage(backend: str = "json", persistence_file: Optional[str] = None, wal: Optional[bool] = None):
+    """
+    A storage backend loaded from its snapshot ("json": GraphStorage, "sqlite":
+    SQLiteGraphStorage). A JSON snapshot is opened with its mutation log when
+    `wal` is set. By default (None) an existing log (build_graph.py --wal) is
+    replayed read-only, as the process writing it may still be appending.
+    """
+    if backend == "sqlite":
+        from graph.sqlite_storage import SQLiteGraphStorage
+        return SQLiteGraphStorage(persistence_file) if persistence_file else SQLiteGraphStorage()
+    from graph.storage import GraphStorage
+    persistence_file = persistence_file or DEFAULT_SNAPSHOT
+    if wal is None:
+        return GraphStorage(persistence_file, read_log=True)
+    return GraphStorage(persistence_file, wal=wal)
+
+class GraphLoader:
+    """
+    Opens the graph on a background thread so the UI can paint immediately.
+
+    The snapshot is loaded as-is when its source fingerprint matches the files
+    in data/; otherwise (or if there is no snapshot) the graph is rebuilt
+    from the connectors first. `engine` is None until the graph is ready.
+
+    With `watch_interval`, a watcher thread then polls the snapshot (and its
+    mutation log) and, when another process writes a new one, loads it into a
+    fresh storage + QueryEngine and swaps `engine` in one assignment. The old
+    engine is never modified, so queries already running on it finish on the
+    old version; `on_reload` callbacks then drop version-keyed caches.
+
+    With `history_dir`, engines share a GraphHistory so queries can take
+    `as_of`, and a rebuild done here is recorded as a new version. `wal` is
+    passed to open_storage (None: replay the mutation log, if any, read-only).
+    """
+    def __init__(self, backend: str = "json", persistence_file: Optional[str] = None,
+                 sources: Optional[Callable[[], Tuple[List[Any], List[str]]]] = default_sources,
+                 watch_interval: Optional[float] = None, history_dir: Optional[str] = None,
+                 wal: Optional[bool] = None):
+        self.backend = backend
+        self.wal = wal
+        self.persistence_file = persistence_file
+        self.sources = sources
+        self.watch_interval = watch_interval
+        self.history_dir = history_dir
+        self.history = None
+        self.state = "idle"  # idle -> loading -> (building ->) ready | failed
+        self.error: Optional[BaseException] = None
+        self.timings: Dict[str, float] = {}
+        self.reloads = 0
+        self.last_reload: Dict[str, Any] = {}
+        self._engine = None
+        self._seen = None
+        self._callbacks: Dict[str, Callable] = {}
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._reload_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "GraphLoader":
+        if self._thread is None:
+            self.state = "loading"
+            self._thread = threading.Thread(target=self._run, name="graph-loader", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            from graph.query import QueryEngine
+            if self.history_dir:
+                from graph.history import GraphHistory
+                self.history = GraphHistory(self.history_dir)
+            storage = open_storage(self.backend, self.persistence_file, self.wal)
+            self.persistence_file = storage.persistence_file
+            self.timings["load_s"] = time.perf_counter() - start
+
+            if self.sources is not None:
+                connectors, files = self.sources()
+                if source_fingerprint(files) and not is_fresh(storage, files):
+                    self.state = "building"
+                    start = time.perf_counter()
+                    build(storage, connectors, files)
+                    if self.history is not None:
+                        self.history.record(storage)
+                    self.timings["build_s"] = time.perf_counter() - start
+
+            # Taken after our own build, so that write doesn't count as a new snapshot
+            self._seen = self._signature()
+            self._engine = QueryEngine(storage, history=self.history)
+            self.state = "ready"
+        except BaseException as e:
+            self.error = e
+            self.state = "failed"
+        finally:
+            self._ready.set()
+        if self.state == "ready" and self.watch_interval:
+            self._watch()
+
+    # --- Hot reload -------------------------------------------------------
+
+    def _watched_paths(self) -> List[str]:
+        path = self.persistence_file
+        # JSON snapshot + mutation log, or the SQLite file + its write-ahead log
+        return [path, f"{path}.wal"] if self.backend != "sqlite" else [path, f"{path}-wal"]
+
+    def _signature(self) -> Tuple:
+        signature = []
+        for path in self._watched_paths():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, st.st_ino, st.st_size, st.st_mtime_ns))
+        return tuple(signature)
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval):
+            signature = self._signature()
+            if signature == self._seen:
+                continue
+            # Let a burst of writes (e.g. WAL appends during a build) settle first
+            while not self._stop.wait(self.watch_interval):
+                settled = self._signature()
+                if settled == signature:
+                    break
+                signature = settled
+            if not self._stop.is_set() and signature:
+                self.reload()
+
+    def reload(self) -> bool:
+        """Loads the snapshot from disk into a new engine and swaps it in. False (old engine kept) on error."""
+        from graph.query import QueryEngine
+        with self._reload_lock:
+            start = time.perf_counter()
+            signature = self._signature()
+            try:
+                storage = open_storage(self.backend, self.persistence_file, self.wal)
+                engine = QueryEngine(storage, history=self.history)
+            except Exception as e:
+                # A half-written snapshot can't happen (atomic rename), but an unreadable one can
+                self._seen = signature
+                self.last_reload = {"error": str(e), "at": time.time()}
+                return False
+            old, self._engine = self._engine, engine
+            if old is not None:
+                # Requests hold the engine they started with: close its storage (the SQLite
+                # connection) once the last of them lets go of it, not mid-query
+                weakref.finalize(old, old.storage.close)
+            self._seen = signature
+            self.reloads += 1
+            self.last_reload = {"latency_s": time.perf_counter() - start, "at": time.time(),
+                                "version": storage.version, "nodes": storage.number_of_nodes()}
+        for callback in list(self._callbacks.values()):
+            try:
+                callback(old, engine)
+            except Exception as e:
+                print(f"Reload callback failed: {e}")
+        return True
+
+    def on_reload(self, name: str, callback: Callable[[Any, Any], None]):
+        """Registers callback(old_engine, new_engine) under `name` (re-registering replaces it)."""
+        self._callbacks[name] = callback
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until loading has finished (or failed); False on timeout."""
+        return self._ready.wait(timeout)
+
+    @property
+    def engine(self):
+        """The current engine. Hold on to the returned object for the duration of a request."""
+        return self._engine
+
+    def status(self) -> str:
+        return {
+            "idle": "Not started",
+            "loading": "Loading graph snapshot...",
+            "building": "Snapshot is out of date, rebuilding the graph from data/...",
+            "ready": "Graph loaded",
+            "failed": f"Failed to load graph: {self.error}",
+        }[self.state]
@@ -0,0 +1,52 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+class OwnershipIndex:
+    """
+    Node -> owning teams and team -> owned nodes, built once per graph version.
+
+    A node's teams merge its label-derived `team` property (docker-compose/k8s
+    labels) with incoming `owns` edges from team nodes (teams.yaml); the label
+    comes first, so `owner()` keeps get_owner's precedence.
+    """
+    def __init__(self, storage):
+        self.version = storage.version
+        self._teams: Dict[str, List[str]] = {}
+        self._owned: Dict[str, Set[str]] = {}
+
+        team_names = {}
+        for node_id, attrs in storage.iter_nodes():
+            team = attrs.get('team')
+            if team and team != 'unknown':
+                self._add(node_id, team)
+            if attrs.get('type') == 'team':
+                team_names[node_id] = attrs.get('name')
+        for source, target, attrs in storage.iter_edges():
+            if attrs.get('type') == 'owns' and source in team_names:
+                self._add(target, team_names[source])
+
+    def _add(self, node_id: str, team: str):
+        teams = self._teams.setdefault(node_id, [])
+        if team not in teams:
+            teams.append(team)
+        self._owned.setdefault(team, set()).add(node_id)
+
+    def owner(self, node_id: str) -> Optional[str]:
+        teams = self._teams.get(node_id)
+        return teams[0] if teams else None
+
+    def teams_of(self, node_id: str) -> List[str]:
+        return self._teams.get(node_id, [])
+
+    def teams_for(self, node_ids: Iterable[str]) -> Set[str]:
+        """Union of the teams owning any of `node_ids`."""
+        teams = set()
+        for node_id in node_ids:
+            teams.update(self._teams.get(node_id, ()))
+        return teams
+
+    def owned_by(self, team: str) -> Set[str]:
+        return self._owned.get(team, set())
+
+    @property
+    def teams(self) -> List[str]:
+        return sorted(self._owned)
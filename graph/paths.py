@@ -0,0 +1,157 @@
+import heapq
+from itertools import count
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Set, Tuple
+
+Neighbors = Callable[[str], Iterable[str]]
+
+# Virtual endpoints used to reduce multi-source/multi-target queries to a single pair
+_SOURCE = ("__paths_source__",)
+_TARGET = ("__paths_target__",)
+
+def neighbor_functions(storage, edge_types: Optional[Collection[str]] = None) -> Tuple[Neighbors, Neighbors]:
+    """(successors, predecessors) over a storage backend, optionally restricted to edge types."""
+    if not edge_types:
+        return storage.successors, storage.predecessors
+    allowed = set(edge_types)
+
+    def successors(node: str) -> List[str]:
+        return [n for n, t in storage.out_edges(node) if t in allowed]
+
+    def predecessors(node: str) -> List[str]:
+        return [n for n, t in storage.in_edges(node) if t in allowed]
+
+    return successors, predecessors
+
+def bidirectional_shortest_path(successors: Neighbors, predecessors: Neighbors,
+                                sources: Iterable[str], targets: Iterable[str],
+                                ignore_nodes: Collection = frozenset(),
+                                ignore_edges: Collection[Tuple] = frozenset(),
+                                max_length: Optional[int] = None) -> Optional[List]:
+    """
+    Shortest path from any source to any target (in edges), or None.
+
+    Level-synchronous BFS from both ends, always expanding the smaller frontier;
+    the first meeting point gives a shortest path. All sources/targets seed
+    their side's frontier, so multi-endpoint queries cost one search.
+    """
+    pred: Dict = {s: None for s in sources if s not in ignore_nodes}
+    succ: Dict = {t: None for t in targets if t not in ignore_nodes}
+    for s in pred:
+        if s in succ:
+            return [s]
+    forward, backward = list(pred), list(succ)
+    depth = 0
+    while forward and backward:
+        if max_length is not None and depth >= max_length:
+            return None
+        depth += 1
+        if len(forward) <= len(backward):
+            frontier, forward = forward, []
+            for u in frontier:
+                for v in successors(u):
+                    if v in pred or v in ignore_nodes or (u, v) in ignore_edges:
+                        continue
+                    pred[v] = u
+                    if v in succ:
+                        return _join(pred, succ, v)
+                    forward.append(v)
+        else:
+            frontier, backward = backward, []
+            for u in frontier:
+                for v in predecessors(u):
+                    if v in succ or v in ignore_nodes or (v, u) in ignore_edges:
+                        continue
+                    succ[v] = u
+                    if v in pred:
+                        return _join(pred, succ, v)
+                    backward.append(v)
+    return None
+
+def _join(pred: Dict, succ: Dict, meet) -> List:
+    path = [meet]
+    while pred[path[-1]] is not None:
+        path.append(pred[path[-1]])
+    path.reverse()
+    node = meet
+    while succ[node] is not None:
+        node = succ[node]
+        path.append(node)
+    return path
+
+def k_shortest_paths(successors: Neighbors, predecessors: Neighbors, source, target, k: int,
+                     max_length: Optional[int] = None) -> List[List]:
+    """
+    Up to k loopless paths in order of length (Yen's algorithm), each spur
+    search being a bidirectional BFS. With max_length, spur searches are cut
+    off at the remaining length budget, so long detours are never explored.
+    """
+    first = bidirectional_shortest_path(successors, predecessors, [source], [target], max_length=max_length)
+    if first is None:
+        return []
+    found = [first]
+    seen: Set[Tuple] = {tuple(first)}
+    candidates: List = []
+    tie = count()
+    while len(found) < k:
+        previous = found[-1]
+        for i in range(len(previous) - 1):
+            budget = None if max_length is None else max_length - i
+            if budget is not None and budget <= 0:
+                break
+            root = previous[:i + 1]
+            # Block the next hop of every accepted path sharing this root
+            ignore_edges = {(p[i], p[i + 1]) for p in found if len(p) > i + 1 and p[:i + 1] == root}
+            spur = bidirectional_shortest_path(successors, predecessors, [root[-1]], [target],
+                                               ignore_nodes=set(root[:-1]), ignore_edges=ignore_edges,
+                                               max_length=budget)
+            if spur is None:
+                continue
+            path = root[:-1] + spur
+            if tuple(path) not in seen:
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (len(path), next(tie), path))
+        if not candidates:
+            break
+        found.append(heapq.heappop(candidates)[2])
+    return found
+
+def find_paths(successors: Neighbors, predecessors: Neighbors, sources: Collection[str], targets: Collection[str],
+               k: int = 1, max_length: Optional[int] = None) -> List[List[str]]:
+    """
+    k shortest paths from any of `sources` to any of `targets`. Multiple
+    endpoints are joined through virtual source/target nodes, so one search
+    (or one Yen run) covers them all.
+    """
+    sources, targets = list(sources), list(targets)
+    if not sources or not targets:
+        return []
+    if k == 1:
+        path = bidirectional_shortest_path(successors, predecessors, sources, targets, max_length=max_length)
+        return [path] if path else []
+
+    source_set, target_set = set(sources), set(targets)
+
+    def virtual_successors(node):
+        if node is _SOURCE:
+            return sources
+        out = list(successors(node))
+        return out + [_TARGET] if node in target_set else out
+
+    def virtual_predecessors(node):
+        if node is _TARGET:
+            return targets
+        inc = list(predecessors(node))
+        return inc + [_SOURCE] if node in source_set else inc
+
+    budget = None if max_length is None else max_length + 2
+    paths = k_shortest_paths(virtual_successors, virtual_predecessors, _SOURCE, _TARGET, k, max_length=budget)
+    # A path through a target (t1 -> ... -> t2) also ends at t1; keep the distinct trimmed ones
+    result = []
+    for path in paths:
+        trimmed = path[1:-1]
+        end = next(i for i, n in enumerate(trimmed) if n in target_set)
+        start = max(i for i, n in enumerate(trimmed[:end + 1]) if n in source_set)
+        trimmed = trimmed[start:end + 1]
+        if trimmed not in result:
+            result.append(trimmed)
+    return result
@@ -0,0 +1,419 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from graph.paths import neighbor_functions
+except ImportError:
+    from .paths import neighbor_functions
+
+# A small pipeline query language over the graph, the target of the `query` tool.
+#
+# A query is a list of steps, each a one-key dict, applied left to right to a
+# set of nodes:
+#
+#     {"start": "api-gateway"}                 named nodes (str or list, resolved like other tools)
+#     {"match": {"type": "database"}}          nodes matching criteria (only as the first step)
+#     {"traverse": "downstream"}               or {"traverse": {"direction": "upstream", "depth": 2,
+#                                              "edge_types": ["calls"], "via": {criteria}}}
+#                                              (edge_types may also be a single type)
+#     {"filter": {criteria}}
+#     {"intersect": [steps]}                   keep nodes also produced by a sub-query
+#     {"group_by": "team"}
+#     {"limit": 10}
+#
+# Criteria map a key to a value, {"not": value}, {"in": [...]} or
+# {"not_in": [...]}; values are scalars (strings, numbers, booleans, null). `id`, `type` and node properties are read from the node;
+# `team` and `owner` mean the owning teams (labels and `owns` edges, as in
+# get_owner). A traversal returns the nodes reachable from the current set,
+# excluding the set itself, in BFS order; nodes failing `via` are neither
+# returned nor expanded.
+#
+# Queries are planned once per shape (the query with its literal values taken
+# out) and the plans are cached. The planner turns a leading match into an
+# index scan, folds the filters, intersections and limit that follow a traversal
+# into it (checked as nodes are discovered, so a limit stops the search and an
+# indexed equality on an unbounded traversal becomes a candidate set that ends
+# it once every candidate is found), and orders predicates cheapest first.
+
+OWNER_KEYS = ("team", "owner")
+OPERATORS = {"not": "ne", "in": "in", "not_in": "not_in"}
+DIRECTIONS = ("downstream", "upstream")
+STEPS = ("start", "match", "filter", "traverse", "intersect", "group_by", "limit")
+SCALARS = (str, int, float, bool, type(None))
+
+Pred = Tuple[str, str, int]  # (key, operator, parameter slot)
+
+# --- Shapes: the query with literal values replaced by parameter slots ---
+
+def normalize(steps: List[Dict[str, Any]]) -> Tuple[tuple, List[Any]]:
+    """(shape, params) for a query; queries differing only in values share a shape."""
+    params: List[Any] = []
+    return _shape(steps, params), params
+
+def _shape(steps, params: List[Any]) -> tuple:
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("A query is a non-empty list of steps")
+    shape = []
+    for position, step in enumerate(steps):
+        if not isinstance(step, dict) or len(step) != 1 or next(iter(step)) not in STEPS:
+            raise ValueError(f"Each step is one of {', '.join(STEPS)}: {step!r}")
+        kind, arg = next(iter(step.items()))
+        grouped = any(s[0] == "group_by" for s in shape)
+        if grouped and kind != "limit":
+            raise ValueError("Only limit can follow group_by")
+        if kind in ("start", "match") and position:
+            if kind == "start":
+                raise ValueError("start must be the first step")
+            kind = "filter"
+        if kind == "start":
+            shape.append(("start", _slot(arg if isinstance(arg, list) else [arg], params)))
+        elif kind in ("match", "filter"):
+            shape.append((kind, _criteria(arg, params)))
+        elif kind == "traverse":
+            shape.append(_traverse(arg, params))
+        elif kind == "intersect":
+            shape.append(("intersect", _shape(arg, params)))
+        elif kind == "group_by":
+            if not isinstance(arg, str) or grouped:
+                raise ValueError("group_by takes one key, once")
+            shape.append(("group_by", arg))
+        else:
+            if isinstance(arg, bool) or not isinstance(arg, int) or arg < 0:
+                raise ValueError(f"limit must be a non-negative integer: {arg!r}")
+            shape.append(("limit", _slot(arg, params)))
+    if shape[0][0] not in ("start", "match"):
+        if shape[0][0] != "filter":
+            raise ValueError("A query begins with start or match")
+        shape[0] = ("match",) + shape[0][1:]
+    return tuple(shape)
+
+def _slot(value: Any, params: List[Any]) -> int:
+    params.append(value)
+    return len(params) - 1
+
+def _criteria(criteria, params: List[Any]) -> Tuple[Pred, ...]:
+    if not isinstance(criteria, dict) or not criteria:
+        raise ValueError(f"Criteria must be a non-empty object: {criteria!r}")
+    preds = []
+    for key in sorted(criteria):
+        value = criteria[key]
+        op = "eq"
+        if isinstance(value, dict):
+            if len(value) != 1 or next(iter(value)) not in OPERATORS:
+                raise ValueError(f"Unknown condition for {key!r}: {value!r}")
+            op, value = next(iter(value.items()))
+            op = OPERATORS[op]
+            if op != "ne":
+                value = value if isinstance(value, list) else [value]
+        if not all(isinstance(v, SCALARS) for v in (value if op in ("in", "not_in") else [value])):
+            raise ValueError(f"{key!r} compares against a string, number, boolean or null "
+                             f"(or a list of them for in/not_in): {criteria[key]!r}")
+        if op == "eq" and value is None:
+            # Never an index lookup (find_nodes reads type=None as no filter): checked per node instead,
+            # and a shape of its own, so the plan cached for non-null values isn't reused for it
+            op, value = "in", [None]
+        preds.append((key, op, _slot(value, params)))
+    return tuple(preds)
+
+def _traverse(arg, params: List[Any]) -> tuple:
+    options = {"direction": arg} if isinstance(arg, str) else arg
+    if not isinstance(options, dict) or options.get("direction") not in DIRECTIONS:
+        raise ValueError(f"traverse needs a direction ({' or '.join(DIRECTIONS)}): {arg!r}")
+    depth, edge_types, via = options.get("depth"), options.get("edge_types"), options.get("via")
+    if depth is not None and (isinstance(depth, bool) or not isinstance(depth, int) or depth < 1):
+        raise ValueError(f"depth must be a positive integer: {depth!r}")
+    if isinstance(edge_types, str):
+        edge_types = [edge_types]
+    if edge_types is not None and (not isinstance(edge_types, list)
+                                   or not all(isinstance(t, str) for t in edge_types)):
+        raise ValueError(f"edge_types must be an edge type or a list of them: {edge_types!r}")
+    return ("traverse", options["direction"],
+            None if depth is None else _slot(depth, params),
+            None if not edge_types else _slot(list(edge_types), params),
+            _criteria(via, params) if via else ())
+
+# --- Planning ---
+
+class Plan:
+    """Physical operators for one query shape; values are bound at execution."""
+    def __init__(self, shape: tuple, ops: List[tuple]):
+        self.shape = shape
+        self.ops = ops
+
+    def explain(self) -> List[str]:
+        return _explain(self.ops)
+
+def plan(shape: tuple, is_indexed: Callable[[str], bool]) -> Plan:
+    return Plan(shape, _plan(shape, is_indexed))
+
+def _cost(pred: Pred, is_indexed: Callable[[str], bool]) -> int:
+    key = pred[0]
+    if key == "id":
+        return 0
+    if key in OWNER_KEYS:
+        return 1
+    return 2 if is_indexed(key) else 3
+
+def _index_preds(preds, is_indexed) -> Tuple[tuple, tuple]:
+    """Splits criteria into (index lookups, residual checks ordered cheapest first)."""
+    index = tuple(p for p in preds if p[1] == "eq" and (p[0] in ("id",) + OWNER_KEYS or is_indexed(p[0])))
+    residual = tuple(sorted((p for p in preds if p not in index), key=lambda p: _cost(p, is_indexed)))
+    return index, residual
+
+def _plan(shape: tuple, is_indexed) -> List[tuple]:
+    ops: List[tuple] = []
+    i = 0
+    while i < len(shape):
+        step = shape[i]
+        kind = step[0]
+        i += 1
+        if kind == "start":
+            ops.append(("seed", step[1]))
+        elif kind == "match":
+            index, residual = _index_preds(step[1], is_indexed)
+            ops.append(("scan", index, residual))
+        elif kind == "filter":
+            ops.append(("filter", tuple(sorted(step[1], key=lambda p: _cost(p, is_indexed)))))
+        elif kind == "intersect":
+            ops.append(("intersect", _plan(step[1], is_indexed)))
+        elif kind == "group_by":
+            ops.append(("group", step[1]))
+        elif kind == "limit":
+            ops.append(("limit", step[1]))
+        else:
+            _, direction, depth, edge_types, via = step
+            emit: List[Pred] = []
+            candidates: List[List[tuple]] = []
+            limit = None
+            # Fold what follows the traversal into it, up to the next traversal or group_by
+            while i < len(shape) and shape[i][0] in ("filter", "intersect", "limit"):
+                follower = shape[i]
+                i += 1
+                if follower[0] == "filter":
+                    index, residual = _index_preds(follower[1], is_indexed)
+                    if depth is None and index:
+                        # Unbounded: the index gives the candidates up front and the search
+                        # can end as soon as all of them have been reached
+                        candidates.append([("scan", index, ())])
+                        emit.extend(residual)
+                    else:
+                        emit.extend(follower[1])
+                elif follower[0] == "intersect":
+                    candidates.append(_plan(follower[1], is_indexed))
+                else:
+                    limit = follower[1]
+                    break
+            emit.sort(key=lambda p: _cost(p, is_indexed))
+            ops.append(("expand", direction, depth, edge_types,
+                        tuple(sorted(via, key=lambda p: _cost(p, is_indexed))), tuple(emit), candidates, limit))
+    return ops
+
+def _explain(ops: List[tuple], indent: str = "") -> List[str]:
+    lines = []
+    for op in ops:
+        kind = op[0]
+        if kind == "seed":
+            lines.append(f"{indent}seed named nodes ${op[1]}")
+        elif kind == "scan":
+            source = f"index scan {_preds(op[1])}" if op[1] else "full scan"
+            lines.append(f"{indent}{source}" + (f" | check {_preds(op[2])}" if op[2] else ""))
+        elif kind == "filter":
+            lines.append(f"{indent}filter {_preds(op[1])}")
+        elif kind == "intersect":
+            lines.append(f"{indent}intersect")
+            lines.extend(_explain(op[1], indent + "  "))
+        elif kind == "group":
+            lines.append(f"{indent}group by {op[1]}")
+        elif kind == "limit":
+            lines.append(f"{indent}limit ${op[1]}")
+        else:
+            _, direction, depth, edge_types, via, emit, candidates, limit = op
+            parts = [f"expand {direction}", "unbounded" if depth is None else f"depth ${depth}"]
+            if edge_types is not None:
+                parts.append(f"edges ${edge_types}")
+            if via:
+                parts.append(f"prune {_preds(via)}")
+            if emit:
+                parts.append(f"emit if {_preds(emit)}")
+            if limit is not None:
+                parts.append(f"stop after ${limit}")
+            lines.append(indent + ", ".join(parts))
+            for candidate in candidates:
+                lines.append(f"{indent}  candidates")
+                lines.extend(_explain(candidate, indent + "    "))
+    return lines
+
+def _preds(preds) -> str:
+    symbols = {"eq": "=", "ne": "!=", "in": " in ", "not_in": " not in "}
+    return " and ".join(f"{key}{symbols[op]}${slot}" for key, op, slot in preds)
+
+class PlanCache:
+    """LRU of plans keyed by query shape."""
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._plans: "OrderedDict[tuple, Plan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, shape: tuple, is_indexed: Callable[[str], bool]) -> Plan:
+        with self._lock:
+            cached = self._plans.get(shape)
+            if cached is not None:
+                self._plans.move_to_end(shape)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        built = plan(shape, is_indexed)
+        with self._lock:
+            self._plans[shape] = built
+            while len(self._plans) > self.size:
+                self._plans.popitem(last=False)
+        return built
+
+    def stats(self) -> Dict[str, int]:
+        return {"plans": len(self._plans), "hits": self.hits, "misses": self.misses}
+
+# --- Execution ---
+
+class Executor:
+    """Runs a plan with bound parameters against a storage backend and its ownership index."""
+    def __init__(self, storage, ownership, resolve: Callable[[str], Optional[str]], params: List[Any]):
+        self.storage = storage
+        self.ownership = ownership
+        self.resolve = resolve
+        self.params = params
+        self.unresolved: List[str] = []
+
+    def run(self, ops: List[tuple]):
+        current: List[str] = []
+        for op in ops:
+            kind = op[0]
+            if kind == "seed":
+                current = []
+                for name in self.params[op[1]]:
+                    node_id = self.resolve(name) if isinstance(name, str) else None
+                    if node_id and self.storage.has_node(node_id):
+                        current.append(node_id)
+                    else:
+                        self.unresolved.append(name)
+                current = list(dict.fromkeys(current))
+            elif kind == "scan":
+                current = self._scan(op[1], op[2])
+            elif kind == "filter":
+                current = [n for n in current if self.matches(n, op[1])]
+            elif kind == "intersect":
+                other = set(self.run(op[1]))
+                current = [n for n in current if n in other]
+            elif kind == "expand":
+                current = self._expand(current, op)
+            elif kind == "group":
+                current = self._group(current, op[1])
+            else:
+                limit = self.params[op[1]]
+                if isinstance(current, dict):
+                    current = {group: members[:limit] for group, members in current.items()}
+                else:
+                    current = current[:limit]
+        return current
+
+    def matches(self, node_id: str, preds) -> bool:
+        attrs = None
+        for key, op, slot in preds:
+            if key == "id":
+                actual = (node_id,)
+            elif key in OWNER_KEYS:
+                actual = self.ownership.teams_of(node_id)
+            else:
+                if attrs is None:
+                    attrs = self.storage.get_node(node_id) or {}
+                actual = (attrs.get(key),)
+            value = self.params[slot]
+            if op == "eq":
+                ok = value in actual
+            elif op == "ne":
+                ok = value not in actual
+            elif op == "in":
+                ok = any(a in value for a in actual)
+            else:
+                ok = not any(a in value for a in actual)
+            if not ok:
+                return False
+        return True
+
+    def _scan(self, index, residual) -> List[str]:
+        if not index:
+            ids = [node_id for node_id, _ in self.storage.iter_nodes()]
+        else:
+            properties = {key: self.params[slot] for key, _, slot in index if key not in OWNER_KEYS}
+            owners = [self.params[slot] for key, _, slot in index if key in OWNER_KEYS]
+            if "id" in properties:
+                node_id = properties.pop("id")
+                ids = [node_id] if isinstance(node_id, str) and self.storage.has_node(node_id) else []
+                residual = tuple(p for p in index if p[0] != "id") + tuple(residual)
+                owners = []
+            elif properties:
+                node_type = properties.pop("type", None)
+                ids = [record["id"] for record in self.storage.find_nodes(node_type, **properties)]
+            else:
+                ids = sorted(self.ownership.owned_by(owners[0]))
+            for team in owners:
+                owned = self.ownership.owned_by(team)
+                ids = [n for n in ids if n in owned]
+        return [n for n in ids if self.matches(n, residual)] if residual else ids
+
+    def _expand(self, sources: List[str], op: tuple) -> List[str]:
+        _, direction, depth_slot, edges_slot, via, emit, candidates, limit_slot = op
+        depth = None if depth_slot is None else self.params[depth_slot]
+        limit = None if limit_slot is None else self.params[limit_slot]
+        successors, predecessors = neighbor_functions(
+            self.storage, None if edges_slot is None else self.params[edges_slot])
+        neighbors = successors if direction == "downstream" else predecessors
+
+        seen = set(sources)
+        allowed = None
+        for candidate in candidates:
+            found = set(self.run(candidate))
+            allowed = found if allowed is None else allowed & found
+        remaining = len(allowed - seen) if allowed is not None else None
+        found: List[str] = []
+        if remaining == 0 or limit == 0:
+            return found
+
+        frontier = list(sources)
+        level = 0
+        while frontier and (depth is None or level < depth):
+            level += 1
+            next_frontier = []
+            for u in frontier:
+                for v in neighbors(u):
+                    if v in seen:
+                        continue
+                    seen.add(v)
+                    if via and not self.matches(v, via):
+                        continue  # pruned: its branch is never expanded
+                    next_frontier.append(v)
+                    if allowed is not None:
+                        if v not in allowed:
+                            continue
+                        remaining -= 1
+                    if not emit or self.matches(v, emit):
+                        found.append(v)
+                        if limit is not None and len(found) >= limit:
+                            return found
+                    if remaining == 0:
+                        return found
+            frontier = next_frontier
+        return found
+
+    def _group(self, ids: List[str], key: str) -> Dict[str, List[str]]:
+        groups: Dict[str, List[str]] = {}
+        for node_id in ids:
+            if key in OWNER_KEYS:
+                group = self.ownership.owner(node_id) or "unowned"
+            else:
+                value = (self.storage.get_node(node_id) or {}).get(key)
+                group = "none" if value is None else str(value)
+            groups.setdefault(group, []).append(node_id)
+        return groups
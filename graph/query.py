@@ -1,139 +1,223 @@
-from typing import List, Dict, Any, Set
-import networkx as nx
+import functools
+import os
+from typing import List, Dict, Any, Optional, Set, Union
+# Adjust import for local vs package
+try:
+    from graph.paths import find_paths, neighbor_functions
+    from graph.ownership import OwnershipIndex
+    from graph.fuzzy import FuzzyIndex
+    from graph.scenarios import ScenarioModel
+    from graph.ql import Executor, PlanCache, normalize
+    from graph.analysis import StructuralAnalysis
+except ImportError:
+    from .paths import find_paths, neighbor_functions
+    from .ownership import OwnershipIndex
+    from .fuzzy import FuzzyIndex
+    from .scenarios import ScenarioModel
+    from .ql import Executor, PlanCache, normalize
+    from .analysis import StructuralAnalysis
+try:
+    from telemetry.tracing import traced
+    from telemetry.profiling import profiled
+except ImportError:
+    from .telemetry.tracing import traced
+    from .telemetry.profiling import profiled
+
+# Most alternative routes `paths` returns (each is another k-shortest-paths spur search)
+MAX_PATHS = 10
+
+def _bounded(value: Any, low: int, high: int, default: Optional[int]) -> Optional[int]:
+    """`value` as an int clamped to [low, high], or `default` if it isn't a number (LLM-supplied params)."""
+    try:
+        return max(low, min(int(value), high))
+    except (TypeError, ValueError):
+        return default
+
+# Typos tolerated when suggesting names for a node that didn't resolve (resolution itself allows 2)
+SUGGEST_DISTANCE = 4
+
+def historical(method):
+    """Lets a query method take `as_of` (a past graph version or date, see QueryEngine.at)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, as_of=None, **kwargs):
+        if as_of is None:
+            return method(self, *args, **kwargs)
+        return getattr(self.at(as_of), method.__name__)(*args, **kwargs)
+    return wrapper
 
 class QueryEngine:
-    def __init__(self, storage):
+    """
+    Graph queries over a storage backend (GraphStorage or SQLiteGraphStorage).
+    Only the storage traversal API is used, so both backends answer identically.
+
+    With a GraphHistory attached, the public queries also accept `as_of` and
+    answer against the graph as it was at that version or date.
+    """
+    def __init__(self, storage, history=None):
         self.storage = storage
+        self.history = history
+        self.history_version: Optional[int] = None
+        self._ownership = None
+        self._fuzzy = None
+        self._scenarios = None
+        self._analysis = None
+        self.plans = PlanCache()
 
     @property
     def graph(self):
         return self.storage.graph
 
+    @property
+    def ownership(self) -> OwnershipIndex:
+        """Ownership index for the current graph version (rebuilt after any mutation)."""
+        index = self._ownership
+        if index is None or index.version != self.storage.version:
+            index = self._ownership = OwnershipIndex(self.storage)
+        return index
+
+    @property
+    def fuzzy(self) -> FuzzyIndex:
+        """Typo-tolerant ID/name index for the current graph version."""
+        index = self._fuzzy
+        if index is None or index.version != self.storage.version:
+            index = self._fuzzy = FuzzyIndex(self.storage)
+        return index
+
+    @property
+    def scenarios(self) -> ScenarioModel:
+        """Failure propagation model for the current graph version."""
+        model = self._scenarios
+        if model is None or model.version != self.storage.version:
+            model = self._scenarios = ScenarioModel(self.storage)
+        return model
+
+    @property
+    def analysis(self) -> StructuralAnalysis:
+        """Dominator / articulation analysis for the current graph version."""
+        analysis = self._analysis
+        if analysis is None or analysis.version != self.storage.version:
+            analysis = self._analysis = StructuralAnalysis(self.storage)
+        return analysis
+
+    def at(self, as_of) -> "QueryEngine":
+        """A (cached) engine over a past version: a history version number or a date."""
+        if self.history is None:
+            raise ValueError("No graph history is recorded for this graph")
+        return self.history.engine(as_of)
+
+    def resolve_candidates(self, query: str, limit: int = 5,
+                           max_distance: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Nodes whose ID or name is within a few typos of `query`, closest first."""
+        if not query:
+            return []
+        return [{"id": node_id, "distance": distance}
+                for node_id, distance in self.fuzzy.lookup(query, max_distance=max_distance, limit=limit)]
+
+    def _not_found(self, query: str) -> Dict[str, Any]:
+        """Result for a node that doesn't resolve, with the closest names for the summarizer to offer."""
+        return {"error": f"Node not found: {query}",
+                "candidates": self.resolve_candidates(query, max_distance=SUGGEST_DISTANCE)}
+
+    def resolve(self, query: str) -> Optional[str]:
+        """The ID of the node `query` names (fuzzy, as every query resolves it), or None."""
+        node_id = self._resolve_node_id(query)
+        return node_id if node_id and self.storage.has_node(node_id) else None
+
+    @traced("query.resolve_node_id")
     def _resolve_node_id(self, query: str) -> str:
         """
         Fuzzy matches a query string to a valid node ID.
         Strategy:
         1. Exact match
-        2. Case-insensitive match
-        3. Substring match (if query is part of ID)
-        4. Name property match
+        2. Case-insensitive match (ID or name)
+        3. Closest ID or name within a few typos (e.g. "paymnet-service")
+        4. Substring match (if query is part of an ID or name)
         """
         if not query:
             return None
             
         # 1. Exact Match
-        if self.graph.has_node(query):
+        if self.storage.has_node(query):
             return query
-            
-        # 2. Case Insensitive & 3. Substring & 4. Name
-        query_lower = query.lower()
-        candidates = []
-        
-        for node_id, data in self.graph.nodes(data=True):
-            # Check ID
-            if query_lower == node_id.lower():
-                return node_id
-            
-            # Check Name property
-            node_name = data.get('name', '').lower()
-            if query_lower == node_name:
-                return node_id
-                
-            # Substring in ID (e.g. "orders" matches "service:order-service")
-            if query_lower in node_id.lower():
-                candidates.append(node_id)
-                
-            # Substring in Name
-            if query_lower in node_name:
-                candidates.append(node_id)
-                
-            # Handle singular/plural (simple heuristic)
-            # if query is "user-db", match "users-db"
-            if query_lower + 's' in node_name or query_lower + 's' in node_id:
-                 candidates.append(node_id)
-            if query_lower.rstrip('s') in node_name or query_lower.rstrip('s') in node_id:
-                 candidates.append(node_id)
-
-        # Return best candidate (shortest ID usually means less noise, e.g. 'redis' -> 'cache:redis-main' vs 'service:redis-consumer')
-        if candidates:
-            # Sort by length, picking the shortest ID as best bet
-            candidates.sort(key=len)
-            return candidates[0]
-            
-        return None
 
+        # 2. Case Insensitive & 3. Typos, both answered by the per-version index
+        index = self.fuzzy
+        matches = index.exact(query)
+        if matches:
+            return min(matches, key=lambda node_id: (node_id.lower() != query.lower(), len(node_id)))
+        closest = index.lookup(query, limit=1)
+        if closest:
+            return closest[0][0]
+
+        # 4. Substring of an ID or name, from the trigram postings rather than a scan; failing that,
+        # without a trailing "s" so "orders" finds "order-service". The shortest ID is the best bet
+        # (e.g. 'redis' -> 'cache:redis-main' vs 'service:redis-consumer')
+        fragment = query.lower()
+        if ":" in fragment:
+            fragment = fragment.split(":", 1)[1]
+        candidates = index.containing(fragment)
+        singular = fragment.rstrip('s')
+        if not candidates and singular and singular != fragment:
+            candidates = index.containing(singular)
+        return candidates[0] if candidates else None
+
+    @historical
+    @traced("query.get_node")
+    @profiled("query.get_node")
     def get_node(self, node_id: str) -> Dict:
         resolved_id = self._resolve_node_id(node_id)
         if resolved_id:
             return self.storage.get_node(resolved_id)
         return None
 
+    @historical
+    @traced("query.get_nodes")
+    @profiled("query.get_nodes")
     def get_nodes(self, type: str = None, **filters) -> List[Dict]:
-        nodes = []
-        if type:
-            nodes = self.storage.get_nodes_by_type(type)
-        else:
-            nodes = self.storage.get_all_nodes()
-        
-        # Apply filters
-        # Filter syntax: key=value
-        if filters:
-            filtered = []
-            for n in nodes:
-                match = True
-                for k, v in filters.items():
-                    # check properties
-                    if n.get(k) != v:
-                        match = False
-                        break
-                if match:
-                    filtered.append(n)
-            return filtered
-        return nodes
-
-    def downstream(self, node_id: str) -> List[Dict]:
-        """All transitive dependencies (what this node calls/depends on)"""
+        # Filter syntax: key=value. The storage answers type and indexed
+        # properties (team, namespace, oncall, ...) from its hash indexes.
+        return self.storage.find_nodes(type or None, **filters)
+
+    @historical
+    @traced("query.downstream")
+    @profiled("query.downstream")
+    def downstream(self, node_id: str, depth: Optional[int] = None) -> List[Dict]:
+        """All transitive dependencies (what this node calls/depends on), or those within `depth` hops"""
         resolved_id = self._resolve_node_id(node_id)
-        if not resolved_id or not self.graph.has_node(resolved_id):
+        if not resolved_id or not self.storage.has_node(resolved_id):
             return []
-        # DFS successors
-        descendants = nx.descendants(self.graph, resolved_id)
-        return [self.get_node(n) for n in descendants]
+        # DFS successors. Results are the storage's shared node records, not copies.
+        descendants = self.storage.descendants(resolved_id, depth)
+        return [self.storage.get_node(n) for n in descendants]
 
-    def upstream(self, node_id: str) -> List[Dict]:
-         """All transitive dependents (what calls this node)"""
+    @historical
+    @traced("query.upstream")
+    @profiled("query.upstream")
+    def upstream(self, node_id: str, depth: Optional[int] = None) -> List[Dict]:
+         """All transitive dependents (what calls this node), or those within `depth` hops"""
          resolved_id = self._resolve_node_id(node_id)
-         if not resolved_id or not self.graph.has_node(resolved_id):
+         if not resolved_id or not self.storage.has_node(resolved_id):
             return []
-         ancestors = nx.ancestors(self.graph, resolved_id)
-         return [self.get_node(n) for n in ancestors]
+         ancestors = self.storage.ancestors(resolved_id, depth)
+         return [self.storage.get_node(n) for n in ancestors]
 
+    @historical
+    @traced("query.blast_radius")
+    @profiled("query.blast_radius")
     def blast_radius(self, node_id: str) -> Dict[str, Any]:
         """Full impact analysis: upstream + downstream + affected teams"""
         resolved_id = self._resolve_node_id(node_id)
-        if not resolved_id or not self.graph.has_node(resolved_id):
-            return {}
+        if not resolved_id or not self.storage.has_node(resolved_id):
+            return self._not_found(node_id)
 
         up = self.upstream(resolved_id)
         down = self.downstream(resolved_id)
         
-        affected_teams = set()
+        node_details = self.storage.get_node(resolved_id)
         
-        # Find owners of upstream nodes
-        all_impacted_nodes = [self.get_node(resolved_id)] + up
-        
-        for n in all_impacted_nodes:
-            # Check ownership edges incoming to this node
-            # OR check 'team' property if available (faster)
-            if 'team' in n:
-                affected_teams.add(n['team'])
-            
-            # Also check 'owns' edges from Team nodes
-            predecessors = self.graph.predecessors(n['id'])
-            for p in predecessors:
-                p_node = self.graph.nodes[p]
-                if p_node.get('type') == 'team':
-                     affected_teams.add(p_node.get('name'))
+        # Owners of the node and everything upstream: labels + 'owns' edges,
+        # a set-union over the precomputed ownership index
+        affected_teams = self.ownership.teams_for([resolved_id] + [n['id'] for n in up])
 
         # Build Rich Impact Tree
         impact_tree = {
@@ -142,21 +226,23 @@ class QueryEngine:
         }
         
         # Direct Upstream (Dependents)
-        for predecessor in self.graph.predecessors(resolved_id):
-            edge_data = self.graph.get_edge_data(predecessor, resolved_id)
+        for predecessor in self.storage.predecessors(resolved_id):
+            edge_data = self.storage.get_edge(predecessor, resolved_id)
             impact_tree["direct_dependents"].append({
                 "id": predecessor,
                 "relationship": edge_data.get("type", "connected_to"),
-                "node_data": self.get_node(predecessor)
+                "node_data": self.storage.get_node(predecessor)
             })
 
+        # Node dicts are shared records: the tree and the up/down lists reference
+        # the same objects instead of materializing each node twice.
         return {
             "query_node": resolved_id,
-            "node_details": self.get_node(resolved_id),
+            "node_details": node_details,
             "summary": {
                 "upstream_count": len(up),
                 "downstream_count": len(down),
-                "affected_teams": list(affected_teams)
+                "affected_teams": sorted(affected_teams)
             },
             "impact_analysis": impact_tree,
             "raw_graph_context": {
@@ -165,6 +251,9 @@ class QueryEngine:
             }
         }
 
+    @historical
+    @traced("query.path")
+    @profiled("query.path")
     def path(self, from_id: str, to_id: str) -> List[str]:
         """Shortest path between nodes"""
         src = self._resolve_node_id(from_id)
@@ -173,32 +262,151 @@ class QueryEngine:
         if not src or not dst:
             return []
             
-        try:
-            return nx.shortest_path(self.graph, source=src, target=dst)
-        except nx.NetworkXNoPath:
-            return []
-        except nx.NodeNotFound:
-            return []
+        successors, predecessors = neighbor_functions(self.storage)
+        found = find_paths(successors, predecessors, [src], [dst])
+        return found[0] if found else []
+
+    @historical
+    @traced("query.paths")
+    @profiled("query.paths")
+    def paths(self, from_ids: Union[str, List[str]], to_ids: Union[str, List[str]], k: int = 1,
+              max_length: Optional[int] = None, edge_types: Optional[List[str]] = None) -> List[List[str]]:
+        """
+        Up to k (at most MAX_PATHS) shortest simple paths from any of `from_ids`
+        to any of `to_ids` (e.g. "all edge services" -> "payments-db"), at most
+        `max_length` hops, following only `edge_types` if given.
+        """
+        sources = self._resolve_many(from_ids)
+        targets = self._resolve_many(to_ids)
+        k = _bounded(k, 1, MAX_PATHS, default=1)
+        if max_length is not None:
+            max_length = _bounded(max_length, 1, self.storage.number_of_nodes(), default=None)
+        successors, predecessors = neighbor_functions(self.storage, edge_types)
+        return find_paths(successors, predecessors, sources, targets, k=k, max_length=max_length)
+
+    def _resolve_many(self, queries: Union[str, List[str], None]) -> List[str]:
+        if isinstance(queries, str):
+            queries = [queries]
+        resolved = [self._resolve_node_id(q) for q in queries or []]
+        return list(dict.fromkeys(r for r in resolved if r))
 
+    @historical
+    @traced("query.get_owner")
+    @profiled("query.get_owner")
     def get_owner(self, node_id: str) -> str:
         """Find owning team"""
         resolved_id = self._resolve_node_id(node_id)
-        if not resolved_id:
+        if not resolved_id or not self.storage.has_node(resolved_id):
              return "Unknown"
-             
-        node = self.get_node(resolved_id)
-        if not node:
-            return "Unknown"
-        
-        if 'team' in node and node['team'] != 'unknown':
-            return node['team']
-            
-        # Check for 'owns' edge
-        predecessors = self.graph.predecessors(resolved_id)
-        for p in predecessors:
-             if self.graph.nodes[p].get('type') == 'team':
-                 # Verify edge type is 'owns'
-                 if self.graph.get_edge_data(p, resolved_id).get('type') == 'owns':
-                     return self.graph.nodes[p].get('name')
-        
-        return "Unknown"
+
+        # Label-derived 'team' wins over 'owns' edges from team nodes
+        return self.ownership.owner(resolved_id) or "Unknown"
+
+    @historical
+    @traced("query.owned_by")
+    @profiled("query.owned_by")
+    def owned_by(self, team: str) -> List[Dict]:
+        """All nodes a team owns (by label or 'owns' edge)"""
+        resolved_id = self._resolve_node_id(team)
+        team_node = self.storage.get_node(resolved_id) if resolved_id else None
+        name = team_node.get('name', team) if team_node and team_node.get('type') == 'team' else team
+        return [self.storage.get_node(n) for n in sorted(self.ownership.owned_by(name))]
+
+    @historical
+    @traced("query.what_if")
+    @profiled("query.what_if")
+    def what_if(self, failures: Union[List[Any], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Impact of several simultaneous failures, replica-aware. `failures` is a
+        list of node names or {"node_id", "state": "down"|"degraded",
+        "replicas_lost": n} dicts, or a {node_id: "down"|"degraded"|{...}} mapping.
+        """
+        if isinstance(failures, dict):
+            failures = [dict(spec, node_id=node_id) if isinstance(spec, dict) else {"node_id": node_id, "state": spec}
+                        for node_id, spec in failures.items()]
+        resolved, unresolved = {}, []
+        for failure in failures or []:
+            failure = {"node_id": failure} if isinstance(failure, str) else dict(failure)
+            node_id = self._resolve_node_id(failure.pop("node_id", None))
+            if node_id and self.storage.has_node(node_id):
+                resolved[node_id] = failure
+            else:
+                unresolved.append(failure)
+        if not resolved:
+            return {}
+
+        model = self.scenarios
+        impact = model.evaluate(resolved)
+        failed = {node_id: dict(spec, replicas=int(model.replicas[model.index[node_id]]))
+                  for node_id, spec in resolved.items()}
+        impacted = impact["down"] + impact["degraded"]
+        return {
+            "failures": failed,
+            "down": [self.storage.get_node(n) for n in impact["down"]],
+            "degraded": [self.storage.get_node(n) for n in impact["degraded"]],
+            "summary": {
+                "down_count": len(impact["down"]),
+                "degraded_count": len(impact["degraded"]),
+                "affected_teams": sorted(self.ownership.teams_for(impacted)),
+                "unresolved": len(unresolved),
+            },
+        }
+
+    @historical
+    @traced("query.resilience")
+    @profiled("query.resilience")
+    def resilience(self, scenarios: int = 1000, failures: int = 1, seed: int = 0) -> Dict[str, Any]:
+        """Resilience score over random failure scenarios (see ScenarioModel.resilience)."""
+        return self.scenarios.resilience(scenarios=scenarios, failures=failures, seed=seed)
+
+    @historical
+    @traced("query.single_points_of_failure")
+    @profiled("query.single_points_of_failure")
+    def single_points_of_failure(self, node_id: Optional[str] = None,
+                                 entries: Union[str, List[str], None] = None, limit: int = 20) -> Dict[str, Any]:
+        """
+        Components every path from the entry nodes must pass through (dominators),
+        overall or on the way to `node_id`, plus the articulation points and
+        bridges whose loss splits the graph. Entries default to EKG_ENTRY_NODES
+        (comma-separated, default api-gateway), else the nodes nothing calls.
+        """
+        analysis = self.analysis
+        if entries is None:
+            entries = [e.strip() for e in os.getenv("EKG_ENTRY_NODES", "api-gateway").split(",") if e.strip()]
+        entry_ids = [e for e in self._resolve_many(entries) if e in analysis.index]
+        if not entry_ids:
+            entry_ids = [analysis.ids[i] for i in analysis.roots]
+        target = None
+        if node_id:
+            target = self._resolve_node_id(node_id)
+            if not target or not self.storage.has_node(target):
+                return self._not_found(node_id)
+        result = analysis.single_points_of_failure(entry_ids, target, limit=limit)
+        result["entries"] = entry_ids
+        return result
+
+    @historical
+    @traced("query.query")
+    @profiled("query.query")
+    def query(self, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Runs a compound query (see graph.ql), e.g. databases reachable from
+        api-gateway owned by teams other than platform-team:
+        [{"start": "api-gateway"}, {"traverse": "downstream"},
+         {"filter": {"type": "database", "team": {"not": "platform-team"}}}]
+        Raises ValueError for a malformed query.
+        """
+        shape, params = normalize(steps)
+        plan = self.plans.get(shape, self.storage.is_indexed)
+        executor = Executor(self.storage, self.ownership, self._resolve_node_id, params)
+        found = executor.run(plan.ops)
+        result: Dict[str, Any] = {"plan": plan.explain()}
+        if isinstance(found, dict):
+            result["groups"] = {group: [self.storage.get_node(n) for n in members] for group, members in found.items()}
+            result["count"] = sum(len(members) for members in found.values())
+        else:
+            result["nodes"] = [self.storage.get_node(n) for n in found]
+            result["count"] = len(found)
+        if executor.unresolved:
+            result["unresolved"] = executor.unresolved
+        return result
@@ -0,0 +1,419 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# orjson is optional: node attributes are decoded with the stdlib decoder without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from graph.storage import NodeRecord, next_version
+except ImportError:
+    from .storage import NodeRecord, next_version
+try:
+    from graph.query import QueryEngine
+except ImportError:
+    from .query import QueryEngine
+try:
+    from telemetry.tracing import traced
+except ImportError:
+    from .telemetry.tracing import traced
+
+MAGIC = b"EKGCSR1\n"
+ALIGN = 64
+DEFAULT_SNAPSHOT = "graph_data.csr"
+# IDs decoded from the arrays remember their position, so looking them up again (traversal results
+# handed back to get_node) skips the binary search; bounded to keep workers' private memory small
+POSITION_CACHE = 1 << 15
+
+def _blob(strings: Sequence[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(s) for s in strings])
+    return np.frombuffer(b"".join(strings), dtype=np.uint8), offsets
+
+def _csr(n: int, sources: np.ndarray, targets: np.ndarray, types: np.ndarray):
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, targets[order].astype(np.int32), types[order]
+
+@traced("shared.write_snapshot")
+def write_snapshot(storage, path: str = DEFAULT_SNAPSHOT) -> str:
+    """
+    Writes `storage` as a read-only array snapshot: CSR adjacency in both
+    directions, node IDs and attribute JSON as byte blobs, and sorted key
+    tables for lookups. Written to a temp file and renamed, so processes that
+    have the old file mapped keep reading it undisturbed.
+    """
+    ids, attrs, names = [], [], []
+    for node_id, data in storage.iter_nodes():
+        ids.append(node_id)
+        attrs.append(json.dumps(dict(data), default=str).encode())
+        names.append(str(data.get('name') or ''))
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    n = len(ids)
+
+    edge_types: Dict[str, int] = {}
+    sources, targets, types = [], [], []
+    for source, target, data in storage.iter_edges():
+        sources.append(index[source])
+        targets.append(index[target])
+        types.append(edge_types.setdefault(data.get('type') or "", len(edge_types)))
+    sources = np.array(sources, dtype=np.int64)
+    targets = np.array(targets, dtype=np.int64)
+    types = np.array(types, dtype=np.uint8)
+
+    # Case-insensitive keys (ID and name) -> node, sorted for binary search
+    keys = sorted({(node_id.lower(), i) for i, node_id in enumerate(ids)} |
+                  {(name.lower(), i) for i, name in enumerate(names) if name})
+    id_bytes = [node_id.encode() for node_id in ids]
+    arrays = {}
+    arrays["id_blob"], arrays["id_offsets"] = _blob(id_bytes)
+    arrays["id_order"] = np.array(sorted(range(n), key=id_bytes.__getitem__), dtype=np.int64)
+    arrays["attr_blob"], arrays["attr_offsets"] = _blob(attrs)
+    arrays["key_blob"], arrays["key_offsets"] = _blob([key.encode() for key, _ in keys])
+    arrays["key_nodes"] = np.array([i for _, i in keys], dtype=np.int64)
+    arrays["out_indptr"], arrays["out_indices"], arrays["out_types"] = _csr(n, sources, targets, types)
+    arrays["in_indptr"], arrays["in_indices"], arrays["in_types"] = _csr(n, targets, sources, types)
+
+    header = {"version": storage.version, "nodes": n, "edges": len(sources),
+              "edge_types": sorted(edge_types, key=edge_types.get), "arrays": {}}
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = [offset, array.dtype.str, len(array)]
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGN) * ALIGN
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header["arrays"][name][0])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+_decode = json.JSONDecoder().decode
+
+class _Strings(Sequence):
+    """A blob + offsets pair as a sequence of str, decoded on access (for bisect)."""
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, order: Optional[np.ndarray] = None):
+        self.blob, self.offsets, self.order = blob, offsets, order
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if self.order is not None:
+            i = self.order[i]
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode()
+
+class SharedGraph:
+    """
+    Read-only graph over a memory-mapped snapshot (see write_snapshot).
+
+    Nothing is copied into the process: the arrays are views of the mapping,
+    so every process that opens the same file shares one copy in the page
+    cache. IDs are found by binary search over the mapped key tables and
+    traversals are vectorized frontier BFS over the CSR arrays.
+
+    Implements the read side of the storage API, so QueryEngine can run on it.
+    """
+    def __init__(self, path: str = DEFAULT_SNAPSHOT):
+        self.persistence_file = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            stat = os.fstat(f.fileno())
+        self.signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a graph snapshot")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        header = json.loads(self._mmap[len(MAGIC) + 8:len(MAGIC) + 8 + header_len])
+        data_start = -(-(len(MAGIC) + 8 + header_len) // ALIGN) * ALIGN
+
+        # Version-keyed caches need a process-unique version; the writer's is kept for reference
+        self.version = next_version()
+        self.snapshot_version = header["version"]
+        self.edge_types: List[str] = header["edge_types"]
+        self._n, self._m = header["nodes"], header["edges"]
+        for name, (offset, dtype, length) in header["arrays"].items():
+            setattr(self, name, np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=length,
+                                              offset=data_start + offset))
+        self._ids = _Strings(self.id_blob, self.id_offsets)
+        self._sorted_ids = _Strings(self.id_blob, self.id_offsets, self.id_order)
+        self._keys = _Strings(self.key_blob, self.key_offsets)
+        self._positions: Dict[str, int] = {}
+
+    # --- Lookups ----------------------------------------------------------
+
+    def number_of_nodes(self) -> int:
+        return self._n
+
+    def number_of_edges(self) -> int:
+        return self._m
+
+    def index_of(self, node_id: str) -> int:
+        """Position of `node_id` in the arrays, or -1."""
+        i = self._positions.get(node_id)
+        if i is not None:
+            return i
+        i = bisect.bisect_left(self._sorted_ids, node_id)
+        return int(self.id_order[i]) if i < self._n and self._sorted_ids[i] == node_id else -1
+
+    def id_of(self, i: int) -> str:
+        node_id = self._ids[i]
+        if len(self._positions) >= POSITION_CACHE:
+            self._positions = {}
+        self._positions[node_id] = i
+        return node_id
+
+    def has_node(self, node_id: str) -> bool:
+        return self.index_of(node_id) >= 0
+
+    def resolve(self, query: str) -> Optional[str]:
+        """Exact ID, else a case-insensitive ID/name match (shortest ID first)."""
+        if not query:
+            return None
+        if self.has_node(query):
+            return query
+        key = query.lower()
+        i = bisect.bisect_left(self._keys, key)
+        matches = []
+        while i < len(self._keys) and self._keys[i] == key:
+            matches.append(self.id_of(int(self.key_nodes[i])))
+            i += 1
+        return min(matches, key=len) if matches else None
+
+    def _attrs(self, i: int) -> Dict[str, Any]:
+        raw = self.attr_blob[self.attr_offsets[i]:self.attr_offsets[i + 1]].tobytes()
+        return orjson.loads(raw) if orjson is not None else _decode(raw.decode())
+
+    def get_node(self, node_id: str) -> Optional[Dict]:
+        i = self.index_of(node_id)
+        return NodeRecord(id=node_id, **self._attrs(i)) if i >= 0 else None
+
+    def get_metadata(self, key: str, default: Any = None) -> Any:
+        return default
+
+    def is_indexed(self, key: str) -> bool:
+        # No property indexes: attribute filters scan the mapped node table
+        return False
+
+    # --- Adjacency --------------------------------------------------------
+
+    def _neighbors(self, indptr: np.ndarray, indices: np.ndarray, frontier: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # All neighbors of a frontier in one gather, and which frontier node each came from
+        starts, ends = indptr[frontier], indptr[frontier + 1]
+        counts = ends - starts
+        total = int(counts.sum())
+        if not total:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        firsts = np.cumsum(counts) - counts
+        positions = np.repeat(starts - firsts, counts) + np.arange(total)
+        return indices[positions].astype(np.int64), np.repeat(frontier, counts)
+
+    def _adjacent(self, node_id: str, indptr, indices, types) -> List[Tuple[str, str]]:
+        i = self.index_of(node_id)
+        if i < 0:
+            return []
+        lo, hi = indptr[i], indptr[i + 1]
+        return [(self.id_of(int(j)), self.edge_types[t]) for j, t in zip(indices[lo:hi], types[lo:hi])]
+
+    def out_edges(self, node_id: str) -> List[Tuple[str, Optional[str]]]:
+        return self._adjacent(node_id, self.out_indptr, self.out_indices, self.out_types)
+
+    def in_edges(self, node_id: str) -> List[Tuple[str, Optional[str]]]:
+        return self._adjacent(node_id, self.in_indptr, self.in_indices, self.in_types)
+
+    def successors(self, node_id: str) -> List[str]:
+        return [target for target, _ in self.out_edges(node_id)]
+
+    def predecessors(self, node_id: str) -> List[str]:
+        return [source for source, _ in self.in_edges(node_id)]
+
+    def get_edge(self, source: str, target: str) -> Optional[Dict[str, Any]]:
+        for node, edge_type in self.out_edges(source):
+            if node == target:
+                return {"type": edge_type}
+        return None
+
+    def iter_nodes(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for i in range(self._n):
+            yield self.id_of(i), self._attrs(i)
+
+    def iter_edges(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        for i in range(self._n):
+            for target, edge_type in self._adjacent(self.id_of(i), self.out_indptr, self.out_indices, self.out_types):
+                yield self.id_of(i), target, {"type": edge_type}
+
+    def find_nodes(self, node_type: str = None, **filters) -> List[Dict]:
+        wanted = dict(filters, **({"type": node_type} if node_type else {}))
+        return [NodeRecord(id=node_id, **attrs) for node_id, attrs in self.iter_nodes()
+                if all(attrs.get(k) == v for k, v in wanted.items())]
+
+    # --- Traversals -------------------------------------------------------
+
+    def reach(self, start: int, indptr: np.ndarray, indices: np.ndarray, depth: Optional[int] = None) -> np.ndarray:
+        """Indices reachable from index `start` (excluding it), optionally within `depth` hops."""
+        seen = np.zeros(self._n, dtype=bool)
+        seen[start] = True
+        frontier = np.array([start], dtype=np.int64)
+        hops = 0
+        while frontier.size and (depth is None or hops < depth):
+            found, _ = self._neighbors(indptr, indices, frontier)
+            found = np.unique(found[~seen[found]])
+            seen[found] = True
+            frontier = found
+            hops += 1
+        seen[start] = False
+        return np.flatnonzero(seen)
+
+    def descendants(self, node_id: str, depth: Optional[int] = None) -> Set[str]:
+        i = self.index_of(node_id)
+        return {self.id_of(int(j)) for j in self.reach(i, self.out_indptr, self.out_indices, depth)} if i >= 0 else set()
+
+    def ancestors(self, node_id: str, depth: Optional[int] = None) -> Set[str]:
+        i = self.index_of(node_id)
+        return {self.id_of(int(j)) for j in self.reach(i, self.in_indptr, self.in_indices, depth)} if i >= 0 else set()
+
+    def shortest_path(self, source: str, target: str) -> List[str]:
+        """Shortest directed path by hops (frontier BFS with parent pointers), or []."""
+        s, t = self.index_of(source), self.index_of(target)
+        if s < 0 or t < 0:
+            return []
+        parent = np.full(self._n, -1, dtype=np.int64)
+        parent[s] = s
+        frontier = np.array([s], dtype=np.int64)
+        while frontier.size and parent[t] < 0:
+            found, origin = self._neighbors(self.out_indptr, self.out_indices, frontier)
+            fresh = parent[found] < 0
+            found, first = np.unique(found[fresh], return_index=True)
+            parent[found] = origin[fresh][first]
+            frontier = found
+        if parent[t] < 0:
+            return []
+        path = [t]
+        while path[-1] != s:
+            path.append(int(parent[path[-1]]))
+        return [self.id_of(i) for i in reversed(path)]
+
+    def teams_of(self, indices: np.ndarray) -> Set[str]:
+        """Owning teams of the given nodes: their `team` label plus incoming `owns` edges."""
+        teams = set()
+        owns = self.edge_types.index("owns") if "owns" in self.edge_types else -1
+        for i in indices:
+            team = self._attrs(int(i)).get('team')
+            if team and team != 'unknown':
+                teams.add(team)
+            lo, hi = self.in_indptr[i], self.in_indptr[i + 1]
+            for j in self.in_indices[lo:hi][self.in_types[lo:hi] == owns]:
+                name = self._attrs(int(j)).get('name')
+                if name:
+                    teams.add(name)
+        return teams
+
+    def close(self):
+        # Views into the mapping must be gone before it can be closed; otherwise the GC does it
+        for name in list(vars(self)):
+            if isinstance(getattr(self, name), np.ndarray):
+                delattr(self, name)
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+# --- Worker processes -----------------------------------------------------
+
+# What the workers answer: these QueryEngine methods, run over the worker's SharedGraph
+QUERIES = ("resolve", "resolve_candidates", "get_node", "get_nodes", "get_owner", "upstream", "downstream",
+           "blast_radius", "path", "paths", "what_if", "resilience", "single_points_of_failure", "query")
+
+_worker_engine: Optional[QueryEngine] = None
+_worker_path: Optional[str] = None
+
+def _engine() -> QueryEngine:
+    # Reopen when build_graph.py has replaced the snapshot (one stat per query)
+    global _worker_engine
+    stat = os.stat(_worker_path)
+    if _worker_engine is None or _worker_engine.storage.signature != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+        if _worker_engine is not None:
+            _worker_engine.storage.close()
+        _worker_engine = QueryEngine(SharedGraph(_worker_path))
+    return _worker_engine
+
+def _init_worker(path: str):
+    global _worker_path
+    _worker_path = path
+    _engine()
+
+def run_query(engine: QueryEngine, op: str, *args, **kwargs) -> Any:
+    """Executes one query (a QueryEngine method in QUERIES) on an engine over a SharedGraph."""
+    if op not in QUERIES:
+        raise ValueError(f"Unknown query: {op}")
+    return getattr(engine, op)(*args, **kwargs)
+
+def _run(op: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+    return run_query(_engine(), op, *args, **kwargs)
+
+def _run_many(op: str, batch: List[tuple]) -> List[Any]:
+    engine = _engine()
+    return [run_query(engine, op, *args) for args in batch]
+
+class SharedQueryPool:
+    """
+    Worker processes that each map the same snapshot and answer queries
+    from it with a QueryEngine: N workers cost one copy of the graph, and
+    queries run in parallel instead of sharing one interpreter's GIL.
+    Answers are the same as QueryEngine's (see serve_graph.py).
+
+        with SharedQueryPool("graph_data.csr", workers=4) as pool:
+            pool.query("blast_radius", "redis-main")
+            pool.map("downstream", [("svc-a",), ("svc-b", 2)])
+    """
+    def __init__(self, path: str = DEFAULT_SNAPSHOT, workers: Optional[int] = None, start_method: str = "spawn"):
+        self.path = os.path.abspath(path)
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context(start_method),
+                                             initializer=_init_worker, initargs=(self.path,))
+
+    def submit(self, op: str, *args, **kwargs):
+        if op not in QUERIES:
+            raise ValueError(f"Unknown query: {op}")
+        return self._executor.submit(_run, op, args, kwargs)
+
+    def query(self, op: str, *args, **kwargs) -> Any:
+        return self.submit(op, *args, **kwargs).result()
+
+    def map(self, op: str, queries: List[tuple], chunksize: int = 16) -> List[Any]:
+        """Answers for `queries` (argument tuples), in order, spread over the workers in chunks."""
+        chunks = [queries[i:i + chunksize] for i in range(0, len(queries), chunksize)]
+        results = []
+        for answers in self._executor.map(_run_many, [op] * len(chunks), chunks):
+            results.extend(answers)
+        return results
+
+    def pids(self) -> List[int]:
+        """PIDs of the running workers (they are started as queries arrive)."""
+        return [process.pid for process in self._executor._processes.values()]
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self) -> "SharedQueryPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,328 @@
+import json
+import sqlite3
+import threading
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+import networkx as nx
+# Adjust import for local vs package
+try:
+    from connectors.base import Node, Edge
+except ImportError:
+    from .connectors.base import Node, Edge
+try:
+    from graph.storage import NodeRecord, next_version
+except ImportError:
+    from .storage import NodeRecord, next_version
+try:
+    from telemetry.tracing import traced
+except ImportError:
+    from .telemetry.tracing import traced
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id    TEXT PRIMARY KEY,
+    type  TEXT,
+    attrs TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS nodes_by_type ON nodes(type);
+
+-- One row per node property (JSON-encoded value), for indexed property filters
+CREATE TABLE IF NOT EXISTS node_properties (
+    node_id TEXT NOT NULL,
+    key     TEXT NOT NULL,
+    value   TEXT,
+    PRIMARY KEY (node_id, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS node_properties_by_value ON node_properties(key, value);
+
+CREATE TABLE IF NOT EXISTS edges (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    type   TEXT,
+    attrs  TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (source, target)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_by_target ON edges(target, source);
+
+CREATE TABLE IF NOT EXISTS metadata (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Transitive closure over the edge table; UNION (not UNION ALL) de-duplicates,
+# which is what stops the recursion on cycles.
+DESCENDANTS_SQL = """
+WITH RECURSIVE reach(id) AS (
+    SELECT target FROM edges WHERE source = :node
+    UNION
+    SELECT e.target FROM edges e JOIN reach r ON e.source = r.id
+)
+SELECT id FROM reach WHERE id != :node
+"""
+
+ANCESTORS_SQL = """
+WITH RECURSIVE reach(id) AS (
+    SELECT source FROM edges WHERE target = :node
+    UNION
+    SELECT e.source FROM edges e JOIN reach r ON e.target = r.id
+)
+SELECT id FROM reach WHERE id != :node
+"""
+
+# Depth-bounded variants: the depth column makes rows distinct per hop count,
+# so the recursion is cut off by `depth < :depth` rather than by UNION.
+DESCENDANTS_WITHIN_SQL = """
+WITH RECURSIVE reach(id, depth) AS (
+    SELECT target, 1 FROM edges WHERE source = :node
+    UNION
+    SELECT e.target, r.depth + 1 FROM edges e JOIN reach r ON e.source = r.id WHERE r.depth < :depth
+)
+SELECT DISTINCT id FROM reach WHERE id != :node
+"""
+
+ANCESTORS_WITHIN_SQL = """
+WITH RECURSIVE reach(id, depth) AS (
+    SELECT source, 1 FROM edges WHERE target = :node
+    UNION
+    SELECT e.source, r.depth + 1 FROM edges e JOIN reach r ON e.target = r.id WHERE r.depth < :depth
+)
+SELECT DISTINCT id FROM reach WHERE id != :node
+"""
+
+def _node_dict(node_id: str, attrs: str) -> NodeRecord:
+    return NodeRecord(id=node_id, **json.loads(attrs))
+
+class SQLiteGraphStorage:
+    """
+    GraphStorage backed by a local SQLite file, for graphs larger than RAM.
+
+    Same public API as GraphStorage: mutations are upserts with networkx merge
+    semantics and become durable on `save()` (commit); `load()` discards
+    uncommitted changes. Traversals run as recursive CTEs in SQLite, so
+    QueryEngine works unchanged against either backend.
+    """
+    def __init__(self, persistence_file: str = "graph_data.db"):
+        self.persistence_file = persistence_file
+        self._lock = threading.RLock()
+        # Streamlit serves reruns from several threads; access is serialized by _lock
+        self._conn = sqlite3.connect(persistence_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self.version = next_version()
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        """Materializes the whole graph as networkx (visualization only - O(graph) memory)."""
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self.iter_nodes())
+        graph.add_edges_from(self.iter_edges())
+        return graph
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params if isinstance(params, dict) else tuple(params)).fetchall()
+
+    def _stream(self, sql: str, size: int = 1000) -> Iterator[Tuple]:
+        """Iterates a full-table query in chunks instead of materializing every row."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute(sql)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            yield from rows
+
+    def _upsert_node(self, node_id: str, attrs: Dict[str, Any]):
+        row = self._conn.execute("SELECT attrs FROM nodes WHERE id = ?", (node_id,)).fetchone()
+        merged = json.loads(row[0]) if row else {}
+        merged.update(attrs)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO nodes (id, type, attrs) VALUES (?, ?, ?)",
+            (node_id, merged.get('type'), json.dumps(merged)),
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO node_properties (node_id, key, value) VALUES (?, ?, ?)",
+            [(node_id, k, json.dumps(v, sort_keys=True)) for k, v in attrs.items() if k != 'type'],
+        )
+
+    def add_node(self, node: Node):
+        """Upsert a node"""
+        with self._lock:
+            self._upsert_node(node.id, dict(type=node.type, name=node.name, **node.properties))
+            self.version = next_version()
+
+    def add_edge(self, edge: Edge):
+        """Upsert an edge"""
+        attrs = dict(id=edge.id, type=edge.type, **edge.properties)
+        with self._lock:
+            # Like networkx, an edge implicitly creates (bare) endpoint nodes
+            self._conn.executemany("INSERT OR IGNORE INTO nodes (id) VALUES (?)", [(edge.source,), (edge.target,)])
+            row = self._conn.execute(
+                "SELECT attrs FROM edges WHERE source = ? AND target = ?", (edge.source, edge.target)
+            ).fetchone()
+            merged = json.loads(row[0]) if row else {}
+            merged.update(attrs)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO edges (source, target, type, attrs) VALUES (?, ?, ?, ?)",
+                (edge.source, edge.target, merged.get('type'), json.dumps(merged)),
+            )
+            self.version = next_version()
+
+    def get_metadata(self, key: str, default: Any = None) -> Any:
+        rows = self._query("SELECT value FROM metadata WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def set_metadata(self, key: str, value: Any):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_node(self, node_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT attrs FROM nodes WHERE id = ?", (node_id,))
+        return _node_dict(node_id, rows[0][0]) if rows else None
+
+    def get_nodes_by_type(self, node_type: str) -> List[Dict]:
+        return [_node_dict(n, a) for n, a in self._query("SELECT id, attrs FROM nodes WHERE type = ?", (node_type,))]
+
+    def find_nodes(self, node_type: str = None, **filters) -> List[Dict]:
+        """
+        Nodes matching `type` and every key=value filter, as one query: each
+        filter is a join on the (key, value) property index.
+        """
+        joins, join_params, where, where_params = [], [], [], []
+        residual = {}
+        if node_type is not None:
+            filters = dict(filters, type=node_type)
+        for i, (key, value) in enumerate(filters.items()):
+            if value is None:
+                # Also matches nodes without the key - checked below
+                residual[key] = value
+            elif key in ('id', 'type'):
+                where.append(f"n.{key} = ?")
+                where_params.append(value)
+            else:
+                joins.append(f"JOIN node_properties p{i} ON p{i}.node_id = n.id AND p{i}.key = ? AND p{i}.value = ?")
+                join_params += [key, json.dumps(value, sort_keys=True)]
+        sql = "SELECT n.id, n.attrs FROM nodes n " + " ".join(joins)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        nodes = [_node_dict(n, a) for n, a in self._query(sql, join_params + where_params)]
+        if residual:
+            nodes = [n for n in nodes if all(n.get(k) is None for k in residual)]
+        return nodes
+
+    def is_indexed(self, key: str) -> bool:
+        """Whether `find_nodes` answers equality on `key` from an index (every property is)."""
+        return True
+
+    def get_all_nodes(self) -> List[Dict]:
+        return [_node_dict(n, a) for n, a in self._stream("SELECT id, attrs FROM nodes")]
+
+    def delete_node(self, node_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM nodes WHERE id = ?", (node_id,))
+            self._conn.execute("DELETE FROM node_properties WHERE node_id = ?", (node_id,))
+            self._conn.execute("DELETE FROM edges WHERE source = ? OR target = ?", (node_id, node_id))
+            self.version = next_version()
+
+    def delete_edge(self, source: str, target: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM edges WHERE source = ? AND target = ?", (source, target))
+            self.version = next_version()
+
+    @traced("sqlite.save")
+    def save(self):
+        with self._lock:
+            self._conn.commit()
+
+    @traced("sqlite.load")
+    def load(self):
+        with self._lock:
+            self._conn.rollback()
+            self.version = next_version()
+
+    def flush(self):
+        self.save()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    # --- Traversal API ---
+
+    def has_node(self, node_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM nodes WHERE id = ?", (node_id,)))
+
+    def number_of_nodes(self) -> int:
+        return self._query("SELECT COUNT(*) FROM nodes")[0][0]
+
+    def number_of_edges(self) -> int:
+        return self._query("SELECT COUNT(*) FROM edges")[0][0]
+
+    def iter_nodes(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for node_id, attrs in self._stream("SELECT id, attrs FROM nodes"):
+            yield node_id, json.loads(attrs)
+
+    def iter_edges(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        for source, target, attrs in self._stream("SELECT source, target, attrs FROM edges"):
+            yield source, target, json.loads(attrs)
+
+    def successors(self, node_id: str) -> List[str]:
+        return [r[0] for r in self._query("SELECT target FROM edges WHERE source = ?", (node_id,))]
+
+    def predecessors(self, node_id: str) -> List[str]:
+        return [r[0] for r in self._query("SELECT source FROM edges WHERE target = ?", (node_id,))]
+
+    def get_edge(self, source: str, target: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT attrs FROM edges WHERE source = ? AND target = ?", (source, target))
+        return json.loads(rows[0][0]) if rows else None
+
+    def descendants(self, node_id: str, depth: Optional[int] = None) -> Set[str]:
+        if depth is None:
+            return {r[0] for r in self._query(DESCENDANTS_SQL, {"node": node_id})}
+        if depth < 1:
+            return set()
+        return {r[0] for r in self._query(DESCENDANTS_WITHIN_SQL, {"node": node_id, "depth": depth})}
+
+    def ancestors(self, node_id: str, depth: Optional[int] = None) -> Set[str]:
+        if depth is None:
+            return {r[0] for r in self._query(ANCESTORS_SQL, {"node": node_id})}
+        if depth < 1:
+            return set()
+        return {r[0] for r in self._query(ANCESTORS_WITHIN_SQL, {"node": node_id, "depth": depth})}
+
+    def out_edges(self, node_id: str) -> List[Tuple[str, Optional[str]]]:
+        return self._query("SELECT target, type FROM edges WHERE source = ?", (node_id,))
+
+    def in_edges(self, node_id: str) -> List[Tuple[str, Optional[str]]]:
+        return self._query("SELECT source, type FROM edges WHERE target = ?", (node_id,))
+
+    @traced("sqlite.build_from_connectors")
+    def build_from_connectors(self, connectors: List[Any], files: List[str],
+                              metadata: Optional[Dict[str, Any]] = None):
+        """
+        Orchestrates running connectors and populating the graph in one transaction.
+        `metadata` is set once every node and edge is in, so a build that fails
+        halfway never carries it.
+        """
+        all_nodes = []
+        all_edges = []
+
+        for connector, file_path in zip(connectors, files):
+            nodes, edges = connector.parse(file_path)
+            all_nodes.extend(nodes)
+            all_edges.extend(edges)
+
+        for node in all_nodes:
+            self.add_node(node)
+
+        for edge in all_edges:
+            self.add_edge(edge)
+
+        for key, value in (metadata or {}).items():
+            self.set_metadata(key, value)
+        self.save()
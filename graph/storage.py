@@ -1,82 +1,602 @@
 import networkx as nx
+import atexit
+import itertools
 import json
 import os
-from typing import List, Dict, Any, Optional
+import tempfile
+import threading
+import time
+import weakref
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
 # Adjust import for local vs package
 try:
     from connectors.base import Node, Edge
 except ImportError:
     from .connectors.base import Node, Edge
+try:
+    from graph.index import PropertyIndex, DEFAULT_INDEXED_PROPERTIES
+except ImportError:
+    from .index import PropertyIndex, DEFAULT_INDEXED_PROPERTIES
+try:
+    from graph.wal import MutationLog, replay_file, UPSERT_NODE, UPSERT_EDGE, DELETE_NODE, DELETE_EDGE, SET_METADATA
+except ImportError:
+    from .wal import MutationLog, replay_file, UPSERT_NODE, UPSERT_EDGE, DELETE_NODE, DELETE_EDGE, SET_METADATA
+try:
+    from telemetry.tracing import traced
+except ImportError:
+    from .telemetry.tracing import traced
+
+# On-disk key for the edge list. networkx < 3.4 always wrote "links"; newer
+# versions default to "edges" and can't read old snapshots without being told.
+LINKS_KEY = "links"
+# Nodes or edges serialized per lock hold when saving (see GraphStorage._snapshot)
+SNAPSHOT_CHUNK = 2000
+
+def node_link_data(graph: nx.DiGraph) -> Dict[str, Any]:
+    try:
+        return nx.node_link_data(graph, edges=LINKS_KEY)
+    except TypeError:  # networkx < 3.4
+        return nx.node_link_data(graph, link=LINKS_KEY)
+
+def node_link_graph(data: Dict[str, Any]) -> nx.DiGraph:
+    key = LINKS_KEY if LINKS_KEY in data else "edges"
+    try:
+        return nx.node_link_graph(data, edges=key)
+    except TypeError:  # networkx < 3.4
+        return nx.node_link_graph(data, link=key)
+
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = 2):
+    """
+    Crash-safe replacement of `path`: dump to a temp file in the same directory,
+    fsync it, rename over the target and fsync the directory. Readers see either
+    the old file or the new one, never a truncated mix.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(directory)
+
+def _fsync_dir(directory: str):
+    # Makes the rename itself durable. Not supported on Windows.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _flush_at_exit(ref):
+    storage = ref()
+    if storage is not None:
+        storage.close()
+
+# Process-wide, so a version number is never reused by a different storage
+# (e.g. after a reload) and version-keyed caches can't serve stale entries.
+_versions = itertools.count(1)
+
+def next_version() -> int:
+    return next(_versions)
+
+class NodeRecord(dict):
+    """
+    Read-only node dict ({"id": ..., **attrs}) shared by every caller of the
+    same graph version instead of being copied per call. Still a dict, so it
+    serializes with json.dumps / st.json; copy it with dict(record) to edit.
+    """
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("NodeRecord is read-only; copy it with dict(record) first")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __reduce__(self):
+        return (NodeRecord, (dict(self),))
+
+def _within(neighbors, node_id: str, depth: int) -> Set[str]:
+    """Nodes at 1..depth hops from `node_id` (level-by-level BFS)."""
+    seen = {node_id}
+    frontier = [node_id]
+    for _ in range(depth):
+        next_frontier = []
+        for u in frontier:
+            for v in neighbors(u):
+                if v not in seen:
+                    seen.add(v)
+                    next_frontier.append(v)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    seen.discard(node_id)
+    return seen
+
+def _changed(current: Optional[Dict[str, Any]], attrs: Dict[str, Any]) -> bool:
+    """True if merging `attrs` into `current` (networkx upsert semantics) changes anything."""
+    if current is None:
+        return True
+    missing = object()
+    return any(current.get(k, missing) != v for k, v in attrs.items())
 
 class GraphStorage:
-    def __init__(self, persistence_file: str = "graph_data.json"):
+    def __init__(self, persistence_file: Optional[str] = "graph_data.json", write_behind: Optional[float] = None,
+                 wal: bool = False, compact_threshold: int = 4 * 1024 * 1024, wal_fsync: bool = False,
+                 indexed_properties: Tuple[str, ...] = DEFAULT_INDEXED_PROPERTIES, read_log: bool = False):
+        """
+        write_behind: if set, mutations are coalesced and saved by a background
+        thread once the graph has been quiet for this many seconds. Use `flush()`
+        to wait for pending changes to reach disk.
+
+        wal: if set, every upsert/delete that actually changes the graph is appended
+        to `<persistence_file>.wal` instead of rewriting the snapshot. `load` replays
+        the log over the snapshot; once the log passes `compact_threshold` bytes it is
+        folded into a new snapshot (in the background when write_behind is set).
+
+        indexed_properties: node properties (besides `type`) with a maintained
+        hash index, used by `find_nodes` / `QueryEngine.get_nodes` filters.
+
+        read_log: without `wal`, still replay an existing mutation log on load,
+        read-only (another process owns it): nothing is appended, and a torn
+        last record is skipped rather than cut off.
+
+        persistence_file=None keeps the graph in memory only (e.g. a historical
+        version materialized by graph.history): nothing is loaded or saved.
+        """
+        if persistence_file is None and wal:
+            raise ValueError("A mutation log needs a persistence_file")
+        self._index = PropertyIndex(indexed_properties)
+        self._records: Dict[str, NodeRecord] = {}
+        self.version = 0
         self.graph = nx.DiGraph()
         self.persistence_file = persistence_file
+        self.write_behind = write_behind
+        self.compact_threshold = compact_threshold
+        self._log = MutationLog(f"{persistence_file}.wal", fsync=wal_fsync) if wal else None
+        self.read_log = read_log
+
+        # _lock guards the graph against the write-behind snapshot; _write_lock
+        # orders whole saves so an older snapshot can never be renamed over a newer one.
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._atexit_registered = False
+        self._preimages = None  # (graph, node attrs, edge attrs) before changes, while _snapshot runs
+        self._pending = False
+        self._writing = False
+        self._flush_requested = False
+        self._closed = False
+        self._pending_since = 0.0
+        self._last_mutation = 0.0
+        self.save_count = 0
+
         self.load()
 
+    @property
+    def graph(self) -> nx.DiGraph:
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph: nx.DiGraph):
+        # Swapping the whole graph (load, tests) invalidates the indexes and records
+        self._graph = graph
+        self._index.rebuild(graph.nodes(data=True))
+        self._records = {}
+        self.version = next_version()
+
+    def _touch(self, *node_ids: str):
+        """Starts a new graph version after a mutation; drops the records of changed nodes."""
+        self.version = next_version()
+        for node_id in node_ids:
+            self._records.pop(node_id, None)
+
+    def _record(self, node_id: str) -> NodeRecord:
+        record = self._records.get(node_id)
+        if record is None:
+            record = NodeRecord(id=node_id, **self.graph.nodes[node_id])
+            self._records[node_id] = record
+        return record
+
     def add_node(self, node: Node):
         """Upsert a node"""
-        self.graph.add_node(node.id, type=node.type, name=node.name, **node.properties)
+        attrs = dict(type=node.type, name=node.name, **node.properties)
+        with self._lock:
+            current = self.graph.nodes.get(node.id)
+            if self._log is not None:
+                if not _changed(current, attrs):
+                    return
+                self._log.append([UPSERT_NODE, node.id, attrs])
+            before = self._index.snapshot(current)
+            self._preserve(node.id)
+            self.graph.add_node(node.id, **attrs)
+            self._index.update(node.id, before, self.graph.nodes[node.id])
+            self._touch(node.id)
+        self._mark_dirty()
 
     def add_edge(self, edge: Edge):
         """Upsert an edge"""
-        self.graph.add_edge(edge.source, edge.target, id=edge.id, type=edge.type, **edge.properties)
+        attrs = dict(id=edge.id, type=edge.type, **edge.properties)
+        with self._lock:
+            if self._log is not None:
+                if not _changed(self.graph.get_edge_data(edge.source, edge.target), attrs):
+                    return
+                self._log.append([UPSERT_EDGE, edge.source, edge.target, attrs])
+            self._preserve(edge=(edge.source, edge.target))
+            self.graph.add_edge(edge.source, edge.target, **attrs)
+            self._touch()
+        self._mark_dirty()
+
+    def get_metadata(self, key: str, default: Any = None) -> Any:
+        """Graph-level metadata (e.g. the build's source fingerprint), saved with the snapshot."""
+        return self.graph.graph.get(key, default)
+
+    def set_metadata(self, key: str, value: Any):
+        with self._lock:
+            if self.graph.graph.get(key) == value:
+                return
+            self.graph.graph[key] = value
+            if self._log is not None:
+                self._log.append([SET_METADATA, key, value])
+        self._mark_dirty()
 
     def get_node(self, node_id: str) -> Optional[Dict]:
+        """The shared read-only NodeRecord for `node_id` (no per-call copy)."""
         if self.graph.has_node(node_id):
-            return dict(id=node_id, **self.graph.nodes[node_id])
+            return self._record(node_id)
         return None
 
     def get_nodes_by_type(self, node_type: str) -> List[Dict]:
-        return [
-            dict(id=n, **self.graph.nodes[n]) 
-            for n in self.graph.nodes 
-            if self.graph.nodes[n].get('type') == node_type
-        ]
-    
+        return self.find_nodes(node_type)
+
+    def find_nodes(self, node_type: str = None, **filters) -> List[Dict]:
+        """
+        Nodes matching `type` and every key=value filter. Indexed criteria are
+        answered by intersecting postings (smallest first); the rest are checked
+        on the candidates only, and dicts are built only for the final matches.
+        """
+        criteria = dict(filters)
+        if node_type is not None:
+            criteria['type'] = node_type
+        nodes = self.graph.nodes
+        candidates, residual = self._index.match(criteria)
+        if candidates is None:
+            candidates = nodes
+        if residual:
+            candidates = [
+                n for n in candidates
+                if all((n if k == 'id' else nodes[n].get(k)) == v for k, v in residual.items())
+            ]
+        return [self._record(n) for n in candidates]
+
+    def is_indexed(self, key: str) -> bool:
+        """Whether `find_nodes` answers equality on `key` from an index."""
+        return key in self._index.keys
+
     def get_all_nodes(self) -> List[Dict]:
-         return [dict(id=n, **self.graph.nodes[n]) for n in self.graph.nodes]
+         return [self._record(n) for n in self.graph.nodes]
+
+    # --- Traversal API (shared with SQLiteGraphStorage; QueryEngine only uses these) ---
+
+    def has_node(self, node_id: str) -> bool:
+        return self.graph.has_node(node_id)
+
+    def number_of_nodes(self) -> int:
+        return self.graph.number_of_nodes()
+
+    def number_of_edges(self) -> int:
+        return self.graph.number_of_edges()
+
+    def iter_nodes(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return iter(self.graph.nodes(data=True))
+
+    def iter_edges(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        return iter(self.graph.edges(data=True))
+
+    def successors(self, node_id: str) -> List[str]:
+        return list(self.graph.successors(node_id)) if self.graph.has_node(node_id) else []
+
+    def predecessors(self, node_id: str) -> List[str]:
+        return list(self.graph.predecessors(node_id)) if self.graph.has_node(node_id) else []
+
+    def get_edge(self, source: str, target: str) -> Optional[Dict[str, Any]]:
+        return self.graph.get_edge_data(source, target)
+
+    def descendants(self, node_id: str, depth: Optional[int] = None) -> Set[str]:
+        """Nodes reachable from `node_id`, optionally within `depth` hops."""
+        if not self.graph.has_node(node_id):
+            return set()
+        if depth is None:
+            return nx.descendants(self.graph, node_id)
+        return _within(self.graph.successors, node_id, depth)
+
+    def ancestors(self, node_id: str, depth: Optional[int] = None) -> Set[str]:
+        """Nodes that reach `node_id`, optionally within `depth` hops."""
+        if not self.graph.has_node(node_id):
+            return set()
+        if depth is None:
+            return nx.ancestors(self.graph, node_id)
+        return _within(self.graph.predecessors, node_id, depth)
+
+    def out_edges(self, node_id: str) -> List[Tuple[str, Optional[str]]]:
+        """(target, edge type) pairs leaving `node_id`."""
+        if not self.graph.has_node(node_id):
+            return []
+        return [(t, d.get('type')) for t, d in self.graph.succ[node_id].items()]
+
+    def in_edges(self, node_id: str) -> List[Tuple[str, Optional[str]]]:
+        """(source, edge type) pairs entering `node_id`."""
+        if not self.graph.has_node(node_id):
+            return []
+        return [(s, d.get('type')) for s, d in self.graph.pred[node_id].items()]
 
     def delete_node(self, node_id: str):
-        if self.graph.has_node(node_id):
+        with self._lock:
+            if not self.graph.has_node(node_id):
+                return
+            if self._log is not None:
+                self._log.append([DELETE_NODE, node_id])
+            self._index.remove(node_id, self.graph.nodes[node_id])
+            if self._preimages is not None:
+                self._preserve(node_id)
+                for target in self.graph.succ[node_id]:
+                    self._preserve(edge=(node_id, target))
+                for source in self.graph.pred[node_id]:
+                    self._preserve(edge=(source, node_id))
             self.graph.remove_node(node_id)
+            self._touch(node_id)
+        self._mark_dirty()
 
+    def delete_edge(self, source: str, target: str):
+        with self._lock:
+            if not self.graph.has_edge(source, target):
+                return
+            if self._log is not None:
+                self._log.append([DELETE_EDGE, source, target])
+            self._preserve(edge=(source, target))
+            self.graph.remove_edge(source, target)
+            self._touch()
+        self._mark_dirty()
+
+    @traced("storage.save")
     def save(self):
-        data = nx.node_link_data(self.graph)
-        with open(self.persistence_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Synchronously and atomically writes the current graph to disk (compacting the log)."""
+        with self._write_lock:
+            with self._lock:
+                self._pending = False
+            self._write(*self._snapshot())
 
-    def load(self):
-        if os.path.exists(self.persistence_file):
+    def _snapshot(self) -> Tuple[Dict[str, Any], int]:
+        """
+        node_link_data of the graph as it is now, and the log offset it matches.
+
+        Only the node and edge keys are listed under the lock. Attributes are
+        then read SNAPSHOT_CHUNK at a time, taking the copies the mutators keep
+        of anything they change while a snapshot is open, so writers wait for
+        one chunk at most instead of the whole serialization.
+        """
+        with self._lock:
+            graph = self.graph
+            node_ids = list(graph)
+            edges = [(source, target) for source, targets in graph.adjacency() for target in targets]
+            metadata = dict(graph.graph)
+            log_offset = self._log.size if self._log is not None else 0
+            nodes_before, edges_before = {}, {}
+            self._preimages = (graph, nodes_before, edges_before)
+        try:
+            nodes, links = [], []
+            for start in range(0, len(node_ids), SNAPSHOT_CHUNK):
+                with self._lock:
+                    for node_id in node_ids[start:start + SNAPSHOT_CHUNK]:
+                        attrs = nodes_before.get(node_id)
+                        nodes.append({**(graph.nodes[node_id] if attrs is None else attrs), "id": node_id})
+            succ = graph.succ
+            for start in range(0, len(edges), SNAPSHOT_CHUNK):
+                with self._lock:
+                    for source, target in edges[start:start + SNAPSHOT_CHUNK]:
+                        attrs = edges_before.get((source, target))
+                        links.append({**(succ[source][target] if attrs is None else attrs),
+                                      "source": source, "target": target})
+        finally:
+            with self._lock:
+                self._preimages = None
+        return {"directed": True, "multigraph": False, "graph": metadata, "nodes": nodes, LINKS_KEY: links}, log_offset
+
+    def _preserve(self, node_id: Optional[str] = None, edge: Optional[Tuple[str, str]] = None):
+        """Before an in-place change (under the lock): keeps the old attributes for an open snapshot."""
+        preimages = self._preimages
+        if preimages is None or preimages[0] is not self.graph:
+            return
+        graph, nodes_before, edges_before = preimages
+        if node_id is not None and node_id not in nodes_before and node_id in graph:
+            nodes_before[node_id] = dict(graph.nodes[node_id])
+        if edge is not None and edge not in edges_before and graph.has_edge(*edge):
+            edges_before[edge] = dict(graph.succ[edge[0]][edge[1]])
+
+    def compact(self):
+        """Folds the mutation log into a new snapshot."""
+        self.save()
+
+    def _write(self, data: Dict[str, Any], log_offset: int = 0):
+        if self.persistence_file is None:
+            return
+        write_json_atomic(self.persistence_file, data)
+        self.save_count += 1
+        if self._log is None:
+            # A full snapshot supersedes a log left by an earlier build with wal=True,
+            # which open_storage would otherwise replay over it
             try:
-                with open(self.persistence_file, 'r') as f:
-                    data = json.load(f)
-                self.graph = nx.node_link_graph(data)
-            except (json.JSONDecodeError, IndexError, Exception) as e:
-                print(f"Failed to load graph: {e}. Starting fresh.")
-                self.graph = nx.DiGraph()
+                os.remove(f"{self.persistence_file}.wal")
+            except FileNotFoundError:
+                pass
         else:
-            self.graph = nx.DiGraph()
+            # Only drop what the snapshot contains; later appends stay in the log
+            with self._lock:
+                self._log.truncate_prefix(log_offset)
+
+    @traced("storage.load")
+    def load(self):
+        with self._lock:
+            if self.persistence_file is None:
+                return  # in memory only
+            if os.path.exists(self.persistence_file):
+                try:
+                    with open(self.persistence_file, 'r') as f:
+                        data = json.load(f)
+                    graph = node_link_graph(data)
+                    self._replay(graph)
+                    self.graph = graph
+                except Exception as e:
+                    if self.graph.number_of_nodes():
+                        print(f"Failed to load graph: {e}. Keeping the previously loaded graph.")
+                    else:
+                        print(f"Failed to load graph: {e}. Starting fresh.")
+                        self.graph = nx.DiGraph()
+            else:
+                graph = nx.DiGraph()
+                self._replay(graph)
+                self.graph = graph
+
+    def _replay(self, graph: nx.DiGraph):
+        if self._log is not None:
+            self._log.replay(graph)
+        elif self.read_log:
+            replay_file(graph, f"{self.persistence_file}.wal")
+
+    # --- Write-behind -----------------------------------------------------
+
+    def _mark_dirty(self):
+        if self._log is not None:
+            # The log already made the change durable; only compaction is pending
+            if self._log.size < self.compact_threshold:
+                return
+            if self.write_behind is None:
+                self.save()
+                return
+        if self.write_behind is None:
+            return
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._pending = True
+                self._pending_since = now
+                self._cond.notify_all()
+            self._last_mutation = now
+            if self._writer is None:
+                self._closed = False
+                self._writer = threading.Thread(target=self._write_behind_loop, name="graph-write-behind", daemon=True)
+                self._writer.start()
+                if not self._atexit_registered:
+                    # Once per instance, however often the writer thread is restarted
+                    atexit.register(_flush_at_exit, weakref.ref(self))
+                    self._atexit_registered = True
 
-    def build_from_connectors(self, connectors: List[Any], files: List[str]):
+    def _write_behind_loop(self):
+        # Never let a constant stream of mutations postpone the save forever
+        max_delay = self.write_behind * 10
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # Debounce: wait until the graph has been quiet for `write_behind` seconds
+                while self._pending and not (self._closed or self._flush_requested):
+                    now = time.monotonic()
+                    remaining = min(self._last_mutation + self.write_behind,
+                                    self._pending_since + max_delay) - now
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            with self._write_lock:
+                with self._cond:
+                    if not self._pending:
+                        # An explicit save() got there first
+                        continue
+                    self._pending = False
+                    self._writing = True
+                try:
+                    self._write(*self._snapshot())
+                except Exception as e:
+                    print(f"Failed to save graph: {e}")
+                finally:
+                    with self._cond:
+                        self._writing = False
+                        self._cond.notify_all()
+
+    def flush(self):
+        """Blocks until all pending write-behind changes are on disk."""
+        with self._cond:
+            if self._writer is None:
+                return
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending or self._writing:
+                self._cond.wait()
+            self._flush_requested = False
+
+    def close(self):
+        """Flushes pending changes, stops the write-behind thread and closes the mutation log."""
+        self.flush()
+        with self._cond:
+            writer = self._writer
+            self._closed = True
+            self._writer = None
+            self._cond.notify_all()
+        if writer is not None and writer is not threading.current_thread():
+            writer.join()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    @traced("storage.build_from_connectors")
+    def build_from_connectors(self, connectors: List[Any], files: List[str],
+                              metadata: Optional[Dict[str, Any]] = None):
         """
         Orchestrates running connectors and populating the graph.
+        `metadata` is set once every node and edge is in, so a build that fails
+        halfway never carries it.
         """
         all_nodes = []
         all_edges = []
-        
+
         for connector, file_path in zip(connectors, files):
             nodes, edges = connector.parse(file_path)
             all_nodes.extend(nodes)
             all_edges.extend(edges)
-            
+
         for node in all_nodes:
             self.add_node(node)
-            
+
         for edge in all_edges:
-            # Only add edge if both source/target exist? 
+            # Only add edge if both source/target exist?
             # NetworkX adds missing nodes automatically, but they won't have properties.
-            # Ideally we ensure all nodes are present. 
+            # Ideally we ensure all nodes are present.
             self.add_edge(edge)
-            
-        self.save()
+
+        for key, value in (metadata or {}).items():
+            self.set_metadata(key, value)
+
+        # In write-behind mode the mutations above already scheduled a save, and
+        # with a mutation log only the changed nodes/edges were written
+        if self.write_behind is None and self._log is None:
+            self.save()
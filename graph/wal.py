@@ -0,0 +1,120 @@
+import json
+import os
+from typing import Any, List, Tuple
+import networkx as nx
+
+# Record tags. One compact JSON array per line, e.g.
+#   ["n","service:api-gateway",{"type":"service","team":"platform-team"}]
+#   ["e","service:a","service:b",{"id":"edge:a-calls-b","type":"calls"}]
+#   ["-n","service:a"]
+#   ["-e","service:a","service:b"]
+#   ["m","sources",{...}]          (graph-level metadata)
+UPSERT_NODE = "n"
+UPSERT_EDGE = "e"
+DELETE_NODE = "-n"
+DELETE_EDGE = "-e"
+SET_METADATA = "m"
+
+def apply_record(graph: nx.DiGraph, record: List[Any]):
+    """Applies one log record. Records are idempotent upserts/deletes."""
+    op = record[0]
+    if op == UPSERT_NODE:
+        graph.add_node(record[1], **record[2])
+    elif op == UPSERT_EDGE:
+        graph.add_edge(record[1], record[2], **record[3])
+    elif op == DELETE_NODE:
+        if graph.has_node(record[1]):
+            graph.remove_node(record[1])
+    elif op == DELETE_EDGE:
+        if graph.has_edge(record[1], record[2]):
+            graph.remove_edge(record[1], record[2])
+    elif op == SET_METADATA:
+        graph.graph[record[1]] = record[2]
+    else:
+        raise ValueError(f"Unknown mutation log record: {op!r}")
+
+class MutationLog:
+    """
+    Append-only, line-oriented write-ahead log of graph mutations.
+
+    The log is replayed on top of the last snapshot on load. `truncate_prefix`
+    drops the records a new snapshot already contains, which is how
+    GraphStorage compacts it.
+    """
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._file = open(path, 'ab')
+
+    @property
+    def size(self) -> int:
+        return self._file.tell()
+
+    def append(self, record: List[Any]):
+        line = json.dumps(record, separators=(',', ':'), default=str) + '\n'
+        self._file.write(line.encode('utf-8'))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def replay(self, graph: nx.DiGraph) -> int:
+        """
+        Applies every complete record to `graph` and returns how many were applied.
+        A torn last line (crash mid-append) is cut off so later appends stay parseable.
+        """
+        records, good_offset = read_records(self.path)
+        for record in records:
+            apply_record(graph, record)
+        if good_offset < self.size:
+            print(f"Mutation log {self.path}: dropping {self.size - good_offset} bytes of torn records.")
+            self._file.truncate(good_offset)
+            self._file.seek(good_offset)
+        return len(records)
+
+    def truncate_prefix(self, offset: int):
+        """Atomically removes the first `offset` bytes (records folded into a snapshot)."""
+        if offset <= 0:
+            return
+        self._file.flush()
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            remainder = f.read()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(remainder)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'ab')
+
+    def close(self):
+        self._file.close()
+
+def replay_file(graph: nx.DiGraph, path: str) -> int:
+    """
+    Read-only replay for processes that don't own the log (a UI reading while
+    build_graph.py --wal appends): applies the complete records and leaves the
+    file alone, since an incomplete last line may be a record still being written.
+    """
+    records, _ = read_records(path)
+    for record in records:
+        apply_record(graph, record)
+    return len(records)
+
+def read_records(path: str) -> Tuple[List[List[Any]], int]:
+    """Returns the complete records in `path` and the byte offset just past the last one."""
+    records = []
+    offset = 0
+    if not os.path.exists(path):
+        return records, offset
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            offset += len(line)
+    return records, offset
@@ -0,0 +1,72 @@
+from graph.shared import DEFAULT_SNAPSHOT, QUERIES, SharedQueryPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import os
+
+# Serving mode: graph queries over HTTP, answered by worker processes that all
+# map one shared snapshot (write it with `python build_graph.py --shared-snapshot`).
+#
+#   curl -d '{"tool": "blast_radius", "params": {"node_id": "redis"}}' localhost:8502/query
+
+def make_handler(pool: SharedQueryPool):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body):
+            data = json.dumps(body, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {"status": "ok", "workers": pool.workers, "queries": list(QUERIES)})
+            else:
+                self._reply(404, {"error": f"Not found: {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/query":
+                self._reply(404, {"error": f"Not found: {self.path}"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                params = request.get("params") or {}
+                if not isinstance(params, dict):
+                    raise ValueError("params must be an object")
+                result = pool.query(request.get("tool"), **params)
+            except (ValueError, TypeError) as e:
+                self._reply(400, {"error": str(e)})
+                return
+            except Exception as e:
+                # Anything else raised in a worker (or a broken pool) still gets an answer
+                self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+                return
+            self._reply(200, {"result": result})
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve graph queries from worker processes over a shared snapshot")
+    parser.add_argument("--snapshot", default=os.getenv("GRAPH_SHARED_SNAPSHOT", DEFAULT_SNAPSHOT),
+                        help="Array snapshot written by build_graph.py --shared-snapshot (default: graph_data.csr)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("GRAPH_QUERY_WORKERS", "0")) or None,
+                        help="Query worker processes (default: one per CPU)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+    if not os.path.exists(args.snapshot):
+        parser.error(f"{args.snapshot} not found; run `python build_graph.py --shared-snapshot` first")
+
+    with SharedQueryPool(args.snapshot, workers=args.workers) as pool:
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(pool))
+        print(f"Serving {args.snapshot} with {pool.workers} workers on http://{args.host}:{args.port}/query")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import cProfile
+import functools
+import heapq
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+MODES = ("cprofile", "sample")
+
+def _safe_repr(value: Any, limit: int = 200) -> str:
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+def _graph_version(args) -> Optional[int]:
+    # QueryEngine methods: args[0] is the engine, whose storage carries the version
+    storage = getattr(args[0], "storage", None) if args else None
+    return getattr(storage, "version", None)
+
+class _Sampler(threading.Thread):
+    """Samples one thread's Python stack every `interval` seconds into folded-stack counts."""
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+class Profiler:
+    """
+    Opt-in per-call profiling for functions wrapped with `profiled`.
+
+    Disabled, a wrapped call costs two clock reads (for the slowest-calls
+    record). Enabled, the outermost wrapped call on a thread is profiled
+    (cProfile + tracemalloc, or a low-overhead stack sampler) and, if it took
+    at least `min_ms`, written to `<directory>/<time>-<name>-<n>.prof|.folded`
+    plus a `.txt` report with call counts, cumulative time and allocations.
+    tracemalloc runs from enable() to disable(), and only one call at a time is
+    cProfile'd; calls overlapping it on other threads only record latency.
+    """
+    def __init__(self, mode: Optional[str] = None, directory: str = "profiles", keep_slowest: int = 20,
+                 min_ms: float = 0.0, interval: float = 0.005):
+        self.mode = None
+        self.directory = directory
+        self.keep_slowest = keep_slowest
+        self.min_ms = min_ms
+        self.interval = interval
+        self._slowest: List = []  # min-heap of (duration_ms, seq, record)
+        self._seq = itertools.count()
+        self._files = itertools.count()
+        self._lock = threading.Lock()
+        # One cProfile'd call at a time: tracemalloc is process-wide, so concurrent
+        # calls would mix their allocations (the others just record their latency)
+        self._profile_lock = threading.Lock()
+        self._own_tracemalloc = False
+        self._local = threading.local()
+        if mode:
+            self.enable(mode)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    def enable(self, mode: str = "cprofile", directory: Optional[str] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}; expected one of {MODES}")
+        if mode == "cprofile" and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        elif mode != "cprofile":
+            self._stop_tracemalloc()
+        self.mode = mode
+        if directory:
+            self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def disable(self):
+        self.mode = None
+        self._stop_tracemalloc()
+
+    def _stop_tracemalloc(self):
+        # Only if enable() started it; profiled calls may still be finishing, so under the profile lock
+        if self._own_tracemalloc:
+            with self._profile_lock:
+                tracemalloc.stop()
+            self._own_tracemalloc = False
+
+    def profiled(self, name: Optional[str] = None) -> Callable:
+        """Decorator: records every call's latency, and profiles it when profiling is enabled."""
+        def decorator(func):
+            call_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                mode = self.mode
+                if mode == "cprofile" and not getattr(self._local, "active", False):
+                    if self._profile_lock.acquire(blocking=False):
+                        try:
+                            return self._profile_call(call_name, func, args, kwargs, mode)
+                        finally:
+                            self._profile_lock.release()
+                elif mode is not None and not getattr(self._local, "active", False):
+                    return self._profile_call(call_name, func, args, kwargs, mode)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._record(call_name, args, kwargs, (time.perf_counter() - start) * 1000, None)
+            return wrapper
+        return decorator
+
+    def _profile_call(self, name: str, func: Callable, args, kwargs, mode: str):
+        self._local.active = True
+        # tracemalloc may have been stopped by someone else since enable()
+        tracing = mode == "cprofile" and tracemalloc.is_tracing()
+        if mode == "cprofile":
+            if tracing:
+                memory_before = tracemalloc.get_traced_memory()[0]
+                snapshot_before = tracemalloc.take_snapshot()
+            profile = cProfile.Profile()
+            sampler = None
+        else:
+            profile = None
+            sampler = _Sampler(threading.get_ident(), self.interval)
+            sampler.start()
+
+        start = time.perf_counter()
+        try:
+            if profile is not None:
+                return profile.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            self._local.active = False
+            path = None
+            try:
+                if profile is not None:
+                    allocations, top = None, []
+                    if tracing and tracemalloc.is_tracing():
+                        top = tracemalloc.take_snapshot().compare_to(snapshot_before, "lineno")[:15]
+                        allocations = {"net_bytes": tracemalloc.get_traced_memory()[0] - memory_before}
+                    if duration_ms >= self.min_ms:
+                        path = self._write_cprofile(name, profile, duration_ms, allocations, top)
+                else:
+                    stacks = sampler.stop()
+                    if duration_ms >= self.min_ms:
+                        path = self._write_samples(name, stacks, duration_ms)
+            finally:
+                self._record(name, args, kwargs, duration_ms, path)
+
+    def _base_path(self, name: str) -> str:
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.directory, f"{stamp}-{slug}-{next(self._files)}")
+
+    def _write_cprofile(self, name: str, profile: cProfile.Profile, duration_ms: float,
+                        allocations: Optional[Dict[str, int]], top) -> str:
+        base = self._base_path(name)
+        profile.dump_stats(base + ".prof")
+        out = io.StringIO()
+        stats = pstats.Stats(profile, stream=out)
+        out.write(f"{name}: {duration_ms:.3f} ms, {stats.total_calls} calls "
+                  f"({stats.prim_calls} primitive)\n")
+        if allocations is not None:
+            out.write(f"allocations: net {allocations['net_bytes']} bytes\n")
+        out.write("\n")
+        stats.sort_stats("cumulative").print_stats(30)
+        out.write("Top allocation sites (size diff, count diff):\n")
+        for stat in top:
+            frame = stat.traceback[0]
+            out.write(f"  {stat.size_diff:>+12} B {stat.count_diff:>+8}  {frame.filename}:{frame.lineno}\n")
+        with open(base + ".txt", "w") as f:
+            f.write(out.getvalue())
+        return base + ".prof"
+
+    def _write_samples(self, name: str, stacks: Counter, duration_ms: float) -> str:
+        base = self._base_path(name)
+        # Collapsed stacks, the input format of flamegraph.pl / speedscope
+        with open(base + ".folded", "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        total = sum(stacks.values())
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        with open(base + ".txt", "w") as f:
+            f.write(f"{name}: {duration_ms:.3f} ms, {total} samples every {self.interval * 1000:.1f} ms\n\n")
+            f.write(f"{'own':>8} {'cumulative':>11}  function\n")
+            for frame, count in inclusive.most_common(30):
+                f.write(f"{own[frame] / max(total, 1):>8.1%} {count / max(total, 1):>11.1%}  {frame}\n")
+        return base + ".folded"
+
+    def _record(self, name: str, args, kwargs, duration_ms: float, profile_path: Optional[str]):
+        if self.keep_slowest <= 0:
+            return
+        with self._lock:
+            if len(self._slowest) >= self.keep_slowest and duration_ms <= self._slowest[0][0]:
+                return
+        record = {
+            "name": name,
+            "duration_ms": round(duration_ms, 3),
+            "params": [_safe_repr(a) for a in args[1:]] + [f"{k}={_safe_repr(v)}" for k, v in kwargs.items()],
+            "graph_version": _graph_version(args),
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "profile": profile_path,
+        }
+        with self._lock:
+            entry = (duration_ms, next(self._seq), record)
+            if len(self._slowest) < self.keep_slowest:
+                heapq.heappush(self._slowest, entry)
+            elif duration_ms > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self) -> List[Dict[str, Any]]:
+        """The slowest recorded calls, slowest first."""
+        with self._lock:
+            return [record for _, _, record in sorted(self._slowest, key=lambda e: -e[0])]
+
+    def dump_slowest(self, path: Optional[str] = None) -> str:
+        path = path or os.path.join(self.directory, "slowest.json")
+        with open(path, "w") as f:
+            json.dump(self.slowest(), f, indent=2)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._slowest = []
+
+def _from_env() -> Profiler:
+    # EKG_PROFILE=1|cprofile|sample turns profiling on for the whole process
+    mode = os.getenv("EKG_PROFILE", "").strip().lower()
+    if mode in ("1", "true", "yes"):
+        mode = "cprofile"
+    elif mode in ("", "0", "false", "no"):
+        mode = ""
+    elif mode not in MODES:
+        print(f"Ignoring EKG_PROFILE={mode!r}; expected one of {MODES}")
+        mode = ""
+    return Profiler(
+        mode=mode or None,
+        directory=os.getenv("EKG_PROFILE_DIR", "profiles"),
+        keep_slowest=int(os.getenv("EKG_PROFILE_SLOWEST", "20")),
+        min_ms=float(os.getenv("EKG_PROFILE_MIN_MS", "0")),
+    )
+
+# Process-wide profiler used by QueryEngine and the connectors
+profiler = _from_env()
+profiled = profiler.profiled
@@ -0,0 +1,271 @@
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Seconds; spans from sub-millisecond lookups up to slow LLM calls
+DURATION_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 35, 50, 75, 100, 150, 250)
+
+SPAN_METRIC = "ekg_span_duration_seconds"
+TTFT_METRIC = "ekg_llm_time_to_first_token_seconds"
+TOKEN_RATE_METRIC = "ekg_llm_tokens_per_second"
+UPDATE_RATE_METRIC = "ekg_stream_updates_per_second"
+STREAM_OVERHEAD_METRIC = "ekg_stream_overhead_seconds"
+ANSWER_METRIC = "ekg_answer_seconds"
+RATE_METRICS = (TOKEN_RATE_METRIC, UPDATE_RATE_METRIC)
+
+HELP = {
+    SPAN_METRIC: "Duration of traced pipeline stages.",
+    TTFT_METRIC: "Time from sending an LLM request to its first streamed token.",
+    TOKEN_RATE_METRIC: "LLM streaming rate after the first token.",
+    UPDATE_RATE_METRIC: "UI updates per second sent by the stream coalescer.",
+    STREAM_OVERHEAD_METRIC: "Time spent in the stream coalescer per response (excluding the LLM and the UI).",
+    ANSWER_METRIC: "Time from a tool result to its displayed answer, by tool and answer path (template or llm).",
+}
+
+class Histogram:
+    """
+    Cumulative bucket counts (for Prometheus) plus a ring buffer of the last
+    `window` samples, which the rolling percentiles are computed from.
+    """
+    def __init__(self, buckets: Tuple[float, ...], window: int = 1024):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.recent.append(value)
+
+    def summary(self) -> Dict[str, float]:
+        """count/sum since start; p50/p95/p99/max over the rolling window."""
+        with self._lock:
+            samples = sorted(self.recent)
+            result = {"count": self.count, "sum": self.sum}
+        if samples:
+            last = len(samples) - 1
+            for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                result[name] = samples[round(q * last)]
+            result["max"] = samples[-1]
+        return result
+
+class Span:
+    """One timed stage; spans opened while another is active become its children."""
+    __slots__ = ("tracer", "name", "attrs", "start", "duration", "children", "error")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+        self.duration = None
+        self.children: List["Span"] = []
+        self.error = None
+
+    def __enter__(self) -> "Span":
+        self.tracer._stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None and exc_type is not GeneratorExit:
+            self.error = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {"name": self.name, "ms": round((self.duration or 0.0) * 1000, 3)}
+        if self.attrs:
+            result["attrs"] = self.attrs
+        if self.error:
+            result["error"] = self.error
+        if self.children:
+            result["children"] = [child.to_dict() for child in self.children]
+        return result
+
+class _NoopSpan:
+    attrs: Dict[str, Any] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopSpan()
+
+class Tracer:
+    """
+    Lightweight in-process tracing: spans feed per-name rolling histograms,
+    finished root spans are kept as recent traces, and everything exports
+    as Prometheus text.
+    """
+    def __init__(self, enabled: bool = True, window: int = 1024, keep_traces: int = 50):
+        self.enabled = enabled
+        self.window = window
+        # metric name -> {label tuple -> Histogram}
+        self._metrics: Dict[str, Dict[Tuple[Tuple[str, str], ...], Histogram]] = {}
+        self._errors: Dict[str, int] = {}
+        self._traces = deque(maxlen=keep_traces)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _finish(self, span: Span):
+        stack = self._stack()
+        # A generator span may be closed out of order (e.g. garbage-collected mid-stream)
+        if stack and stack[-1] is span:
+            stack.pop()
+        elif span in stack:
+            stack.remove(span)
+        self.observe(SPAN_METRIC, span.duration, span=span.name)
+        if span.error:
+            with self._lock:
+                self._errors[span.name] = self._errors.get(span.name, 0) + 1
+        if stack:
+            stack[-1].children.append(span)
+        else:
+            self._traces.append(span)
+
+    def span(self, name: str, **attrs):
+        """Context manager timing one stage: `with tracer.span("llm.parse_intent"): ...`"""
+        if not self.enabled:
+            return _NOOP
+        return Span(self, name, attrs)
+
+    def traced(self, name: Optional[str] = None) -> Callable:
+        """Decorator wrapping every call of a function in a span (named after it by default)."""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, span_name, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, metric: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        series = self._metrics.get(metric)
+        histogram = series.get(key) if series is not None else None
+        if histogram is None:
+            with self._lock:
+                series = self._metrics.setdefault(metric, {})
+                histogram = series.get(key)
+                if histogram is None:
+                    buckets = RATE_BUCKETS if metric in RATE_METRICS else DURATION_BUCKETS
+                    histogram = series[key] = Histogram(buckets, self.window)
+        histogram.observe(value)
+
+    def instrument_stream(self, tokens: Iterable[str], name: str) -> Iterator[str]:
+        """
+        Re-yields a token stream inside a span, recording time to first token
+        and tokens/sec (counted from the first token, i.e. the decode rate).
+        """
+        if not self.enabled:
+            yield from tokens
+            return
+        with Span(self, name, {}) as span:
+            first = None
+            n_tokens = 0
+            for token in tokens:
+                if first is None:
+                    first = time.perf_counter()
+                    self.observe(TTFT_METRIC, first - span.start, call=name)
+                n_tokens += 1
+                yield token
+            span.attrs["tokens"] = n_tokens
+            if first is not None:
+                span.attrs["ttft_ms"] = round((first - span.start) * 1000, 1)
+                elapsed = time.perf_counter() - first
+                if n_tokens > 1 and elapsed > 0:
+                    rate = (n_tokens - 1) / elapsed
+                    span.attrs["tokens_per_sec"] = round(rate, 1)
+                    self.observe(TOKEN_RATE_METRIC, rate, call=name)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """One row per metric series with its rolling summary, slowest first."""
+        rows = []
+        with self._lock:
+            series = [(metric, key, h) for metric, by_labels in self._metrics.items() for key, h in by_labels.items()]
+            errors = dict(self._errors)
+        for metric, key, histogram in series:
+            labels = dict(key)
+            row = {"metric": metric, **labels, **histogram.summary()}
+            if metric == SPAN_METRIC:
+                row["errors"] = errors.get(labels["span"], 0)
+            rows.append(row)
+        rows.sort(key=lambda row: (row["metric"], -row.get("p95", 0.0)))
+        return rows
+
+    def recent_traces(self) -> List[Dict[str, Any]]:
+        """Finished root spans with their child stages, newest first."""
+        return [span.to_dict() for span in reversed(self._traces)]
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = {metric: dict(by_labels) for metric, by_labels in self._metrics.items()}
+            errors = dict(self._errors)
+        for metric in sorted(metrics):
+            lines.append(f"# HELP {metric} {HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for key, histogram in sorted(metrics[metric].items()):
+                with histogram._lock:
+                    counts, count, total = list(histogram.counts), histogram.count, histogram.sum
+                cumulative = 0
+                for bound, n in zip(histogram.buckets + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f"{metric}_bucket{_labels(key + (('le', le),))} {cumulative}")
+                lines.append(f"{metric}_sum{_labels(key)} {total!r}")
+                lines.append(f"{metric}_count{_labels(key)} {count}")
+        if errors:
+            lines.append("# HELP ekg_span_errors_total Traced stages that raised.")
+            lines.append("# TYPE ekg_span_errors_total counter")
+            for name, n in sorted(errors.items()):
+                lines.append(f"ekg_span_errors_total{_labels((('span', name),))} {n}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+            self._errors.clear()
+            self._traces.clear()
+
+def _labels(pairs: Tuple[Tuple[str, str], ...]) -> str:
+    if not pairs:
+        return ""
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+# Process-wide tracer used by the graph, LLM and UI layers. EKG_TRACING=0 turns it off.
+tracer = Tracer(enabled=os.getenv("EKG_TRACING", "1") != "0")
+span = tracer.span
+traced = tracer.traced
+observe = tracer.observe
+instrument_stream = tracer.instrument_stream
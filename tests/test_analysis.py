@@ -0,0 +1,85 @@
+import random
+
+import networkx as nx
+from connectors.base import Edge, Node
+from graph.analysis import DominatorTree, cut_vertices_and_bridges
+from graph.query import QueryEngine
+from graph.storage import GraphStorage
+
+def _engine(tmp_path):
+    # gateway -> {auth, orders};  orders -> {ledger, users} -> db;  admin -> users;  team owns everything (ignored)
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    for node in [Node("service:gateway", "service", "gateway"), Node("service:admin", "service", "admin"),
+                 Node("service:orders", "service", "orders"), Node("service:ledger", "service", "ledger"),
+                 Node("service:users", "service", "users"), Node("database:db", "database", "db"),
+                 Node("service:auth", "service", "auth"), Node("team:core", "team", "core")]:
+        storage.add_node(node)
+    for i, (kind, source, target) in enumerate([
+            ("calls", "service:gateway", "service:orders"),
+            ("calls", "service:gateway", "service:auth"),
+            ("calls", "service:orders", "service:ledger"),
+            ("calls", "service:orders", "service:users"),
+            ("connects_to", "service:ledger", "database:db"),
+            ("connects_to", "service:users", "database:db"),
+            ("calls", "service:admin", "service:users"),
+            ("owns", "team:core", "service:gateway"),
+            ("owns", "team:core", "database:db")]):
+        storage.add_edge(Edge(str(i), kind, source, target))
+    return QueryEngine(storage)
+
+def test_single_points_of_failure_from_entries(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    monkeypatch.setenv("EKG_ENTRY_NODES", "gateway")
+
+    result = engine.single_points_of_failure("db")
+    # Two routes to db, but both go through orders; ownership edges are not routes
+    assert result["must_pass_through"] == ["service:gateway", "service:orders"]
+    assert result["reachable"] and not result["articulation_point"]
+
+    overall = engine.single_points_of_failure()
+    assert overall["entries"] == ["service:gateway"]
+    assert overall["dominators"][:2] == [
+        {"id": "service:gateway", "dominates": 5, "articulation_point": True},
+        {"id": "service:orders", "dominates": 3, "articulation_point": True}]
+    assert overall["articulation_points"] == ["service:gateway", "service:orders", "service:users"]
+    assert overall["bridges"] == [["service:gateway", "service:orders"]]
+
+    # A second entry reaches users directly: orders no longer dominates it
+    both = engine.single_points_of_failure("users", entries=["gateway", "admin"])
+    assert both["must_pass_through"] == []
+    assert engine.single_points_of_failure("db", entries="admin")["must_pass_through"] == ["service:admin",
+                                                                                            "service:users"]
+
+def test_analysis_is_cached_per_version(tmp_path):
+    engine = _engine(tmp_path)
+    analysis = engine.analysis
+    engine.single_points_of_failure(entries="gateway")
+    assert engine.analysis is analysis and len(analysis._trees) == 1
+    engine.storage.add_edge(Edge("99", "calls", "service:gateway", "service:ledger"))
+    assert engine.analysis is not analysis
+    assert engine.single_points_of_failure("ledger", entries="gateway")["must_pass_through"] == ["service:gateway"]
+
+def test_dominators_match_networkx():
+    rng = random.Random(1)
+    for _ in range(20):
+        n = 60
+        graph = nx.gnp_random_graph(n, 0.05, seed=rng.randrange(1 << 30), directed=True)
+        successors = [list(graph.successors(i)) for i in range(n)]
+        predecessors = [list(graph.predecessors(i)) for i in range(n)]
+        tree = DominatorTree([0], successors, predecessors)
+        expected = nx.immediate_dominators(graph, 0)
+        for node in range(n):
+            if node == 0:
+                continue
+            if node not in expected:
+                assert not tree.reachable(node)
+            else:
+                assert tree.idom[node] == expected[node]
+
+def test_cut_vertices_and_bridges_match_networkx():
+    rng = random.Random(2)
+    for _ in range(20):
+        graph = nx.gnm_random_graph(80, rng.randrange(60, 120), seed=rng.randrange(1 << 30))
+        cut, bridges = cut_vertices_and_bridges([set(graph[i]) for i in range(80)])
+        assert cut == set(nx.articulation_points(graph))
+        assert {frozenset(b) for b in bridges} == {frozenset(b) for b in nx.bridges(graph)}
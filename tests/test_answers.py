@@ -0,0 +1,58 @@
+from chat.answers import LLM, TEMPLATE, bypass_stats, render
+from telemetry.tracing import ANSWER_METRIC, Tracer
+
+def test_simple_results_are_templated():
+    assert render("get_owner", {"node_id": "payment-service"}, "payments-team",
+                  {"node_id": "service:payment-service"}) == "**payments-team** owns `payment-service`."
+    assert render("get_owner", {"node_id": "kafka"}, "Unknown", {"node_id": "queue:kafka"}) == \
+        "No owner is recorded for `kafka` in the graph."
+
+    path = render("path", {"from_id": "api-gateway", "to_id": "payments-db"},
+                  ["service:api-gateway", "service:payment-service", "database:payments-db"],
+                  {"from_id": "service:api-gateway", "to_id": "database:payments-db"})
+    assert path.endswith("`api-gateway` → `payment-service` → `payments-db`") and "2 hops" in path
+
+    nodes = [{"id": "database:orders-db", "type": "database", "name": "orders-db", "team": "orders-team"}]
+    listed = render("get_nodes", {"type": "database", "filters": {"team": "orders-team"}}, nodes)
+    assert listed == "1 database with team=orders-team:\n\n- `orders-db` (database) — team: orders-team"
+    assert render("upstream", {"node_id": "redis"}, [], {"node_id": "cache:redis"}) == \
+        "Nothing in the graph depends on `redis`."
+    assert render("blast_radius", {}, {"error": "Node not found"}) == "⚠️ Node not found"
+
+def test_templates_name_the_resolved_node():
+    # A typo is shown as the node it resolved to
+    assert render("downstream", {"node_id": "paymnt-service"}, [], {"node_id": "service:payment-service"}) == \
+        "`payment-service` has no dependencies in the graph."
+    # A name that resolves to nothing is not answered as if the node existed
+    assert render("get_owner", {"node_id": "nope"}, "Unknown", {"node_id": None}) == \
+        "I could not find `nope` in the graph."
+    assert render("upstream", {"node_id": "nope"}, [], {"node_id": None}) == "I could not find `nope` in the graph."
+    assert render("path", {"from_id": "api-gateway", "to_id": "nope"}, [],
+                  {"from_id": "service:api-gateway", "to_id": None}) == "I could not find `nope` in the graph."
+    # Unresolved params are left to the LLM
+    assert render("get_owner", {"node_id": "nope"}, "Unknown") is None
+
+def test_complex_or_large_results_go_to_the_llm():
+    assert render("blast_radius", {"node_id": "redis"}, {"total_affected": 3, "services": []}) is None
+    assert render("what_if", {}, {}) is None
+    many = [{"id": f"service:s{i}", "type": "service", "name": f"s{i}"} for i in range(16)]
+    assert render("get_nodes", {"type": "service"}, many) is None
+    assert render("get_nodes", {"type": "service"}, many, max_items=20) is not None
+    assert render("path", {}, [f"service:s{i}" for i in range(9)], {"from_id": "service:s0", "to_id": "service:s8"}) is None
+
+def test_bypass_stats_per_tool():
+    tracer = Tracer()
+    for seconds in (0.001, 0.002, 0.003):
+        tracer.observe(ANSWER_METRIC, seconds, tool="get_owner", answer=TEMPLATE)
+    tracer.observe(ANSWER_METRIC, 4.0, tool="get_nodes", answer=LLM)
+    tracer.observe(ANSWER_METRIC, 0.001, tool="get_nodes", answer=TEMPLATE)
+    tracer.observe(ANSWER_METRIC, 6.0, tool="blast_radius", answer=LLM)
+    tracer.observe("ekg_span_duration_seconds", 1.0, span="chat.request")
+
+    stats = {row["tool"]: row for row in bypass_stats(tracer.stats())}
+    assert set(stats) == {"get_owner", "get_nodes", "blast_radius"}
+    assert stats["get_nodes"]["bypass_rate"] == 0.5 and abs(stats["get_nodes"]["saved_s"] - 3.999) < 1e-9
+    # get_owner never went to the LLM: savings are estimated at the mean LLM answer time
+    assert stats["get_owner"]["bypass_rate"] == 1.0 and stats["get_owner"]["llm_p50"] is None
+    assert abs(stats["get_owner"]["saved_s"] - 3 * (5.0 - 0.002)) < 1e-9
+    assert stats["blast_radius"]["bypass_rate"] == 0.0 and stats["blast_radius"]["saved_s"] is None
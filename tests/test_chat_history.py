@@ -0,0 +1,38 @@
+import json
+import os
+from chat.history import ChatHistory, LEGACY_SESSION, valid_session_id
+
+def test_append_rotates_and_pages_newest_first(tmp_path):
+    history = ChatHistory(str(tmp_path), max_bytes=300, keep_segments=3)
+    for i in range(20):
+        history.append("s1", "user", f"question {i}")
+        history.append("s1", "assistant", f"answer {i}")
+
+    files = sorted(os.listdir(tmp_path))
+    assert "s1.jsonl" in files and len(files) == 4  # current file + 3 kept segments
+    assert all(os.path.getsize(tmp_path / name) <= 300 for name in files)
+
+    assert [m["content"] for m in history.load("s1", limit=2)] == ["question 19", "answer 19"]
+    page, has_older = history.page("s1", page=0, page_size=3)
+    assert [m["content"] for m in page] == ["question 19", "question 18", "question 17"] and has_older
+    assert history.load("s2") == []
+
+    history.clear("s1")
+    assert history.load("s1") == [] and os.listdir(tmp_path) == []
+
+def test_search_spans_sessions_and_migrates_legacy_file(tmp_path):
+    legacy = tmp_path / "chat_history.json"
+    legacy.write_text(json.dumps([{"role": "user", "content": "what if redis fails?"},
+                                  {"role": "assistant", "content": "redis is used by..."}]))
+    history = ChatHistory(str(tmp_path / "sessions"))
+    assert history.migrate_legacy(str(legacy)) == 2
+    assert not legacy.exists() and (tmp_path / "chat_history.json.migrated").exists()
+
+    history.append("s1", "user", "Who owns orders-db?")
+    assert [hit["session"] for hit in history.search("redis")] == [LEGACY_SESSION]
+    history.append("s2", "user", "What breaks if orders-db fails?")
+    assert [hit["session"] for hit in history.search("orders-db")] == ["s2", "s1"]
+    assert [hit["session"] for hit in history.search("ORDERS-DB breaks")] == ["s2"]
+    assert history.search("payments") == []
+
+    assert not valid_session_id("../etc/passwd") and valid_session_id("abc123")
@@ -61,3 +61,41 @@ def test_graph_integrity():
     # Clean up
     if os.path.exists("test_graph.json"):
         os.remove("test_graph.json")
+
+def test_node_edge_to_dict_compat():
+    from connectors.base import Node, Edge
+    n = Node("service:a", "service", "a", {"team": "t"})
+    e = Edge("edge:a-calls-b", "calls", "service:a", "service:b")
+    assert n.to_dict() == {"id": "service:a", "type": "service", "name": "a", "properties": {"team": "t"}}
+    assert e.to_dict() == {"id": "edge:a-calls-b", "type": "calls", "source": "service:a",
+                           "target": "service:b", "properties": {}}
+    # Slotted: no per-instance __dict__
+    assert not hasattr(n, "__dict__")
+    assert not hasattr(e, "__dict__")
+
+def test_edge_batch_roundtrip(data_dir):
+    from connectors.base import EdgeBatch
+    _, edges = DockerComposeConnector().parse(os.path.join(data_dir, 'docker-compose.yml'))
+    batch = EdgeBatch(edges)
+
+    assert len(batch) == len(edges)
+    assert batch.to_dicts() == [e.to_dict() for e in edges]
+    # Types are stored once in the string table
+    assert len(set(batch.types)) == len({e.type for e in edges})
+
+    batch.append("service:x", "service:y", "calls")
+    assert batch[-1].id == "edge:service:x-calls-service:y"
+
+def test_synthetic_estate_parses_cleanly(tmp_path):
+    from benchmarks.synthetic import write_estate
+    from connectors.kubernetes import KubernetesConnector
+
+    paths = write_estate(str(tmp_path / "estate"), 40, fanout=2, layers=4)
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    storage.build_from_connectors([DockerComposeConnector(), TeamsConnector(), KubernetesConnector()],
+                                  [paths["docker-compose"], paths["teams"], paths["k8s"]])
+
+    # Every edge endpoint is a typed, named node (no placeholders from mis-typed references)
+    assert all(attrs.get('name') for _, attrs in storage.iter_nodes())
+    assert len(storage.find_nodes("service")) == 40
+    assert {attrs['type'] for _, _, attrs in storage.iter_edges()} == {"calls", "connects_to", "owns"}
@@ -0,0 +1,77 @@
+import itertools
+
+import pytest
+from graph.fuzzy import FuzzyIndex, edit_distance
+from graph.storage import GraphStorage
+from graph.query import QueryEngine
+from connectors.base import Node
+
+def _osa(a, b):
+    # Unbanded reference implementation
+    d = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i, j in itertools.product(range(1, len(a) + 1), range(1, len(b) + 1)):
+        d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+        if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+            d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+def test_banded_edit_distance_matches_reference():
+    words = ["", "a", "ab", "ba", "abc", "acb", "payment", "paymnet", "pyment", "paymentt", "users-db", "user-db"]
+    for a, b in itertools.product(words, repeat=2):
+        expected = _osa(a, b)
+        for k in range(3):
+            assert edit_distance(a, b, k) == (expected if expected <= k else k + 1), (a, b, k)
+
+def test_typos_resolve_to_closest_node(tmp_path):
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    for node in [Node("service:payment-service", "service", "payment-service"),
+                 Node("service:payments-worker", "service", "payments-worker"),
+                 Node("database:users-db", "database", "users-db"),
+                 Node("cache:redis-main", "cache", "redis-main")]:
+        storage.add_node(node)
+    engine = QueryEngine(storage)
+
+    assert engine._resolve_node_id("paymnet-service") == "service:payment-service"
+    assert engine._resolve_node_id("Service:Payment-Servce") == "service:payment-service"
+    assert engine._resolve_node_id("USERS-DB") == "database:users-db"
+    assert engine._resolve_node_id("redis") == "cache:redis-main"  # substring fallback still applies
+    assert engine.resolve_candidates("payment-servic") == [{"id": "service:payment-service", "distance": 1}]
+    assert engine.resolve("paymnet-service") == "service:payment-service"
+    assert engine.resolve("billing-service") is None
+    assert FuzzyIndex(storage).lookup("rdis") == []  # too short to correct
+
+    # The index follows the graph version
+    index = engine.fuzzy
+    storage.add_node(Node("service:ledger-service", "service", "ledger-service"))
+    assert engine.fuzzy is not index
+    assert engine._resolve_node_id("ledgr-service") == "service:ledger-service"
+
+def test_substrings_come_from_the_index_not_a_scan(tmp_path, monkeypatch):
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    for node in [Node("service:order-service", "service", "order-service"),
+                 Node("service:redis-consumer", "service", "redis-consumer"),
+                 Node("cache:redis-main", "cache", "redis-main"),
+                 Node("database:users-db", "database", "users-db"),
+                 Node("service:blog-archive", "service", "blog-archive"),
+                 Node("service:blogs-frontend-long", "service", "blogs-frontend-long")]:
+        storage.add_node(node)
+    engine = QueryEngine(storage)
+    engine.fuzzy, engine.analysis
+    monkeypatch.setattr(storage, "iter_nodes", lambda: pytest.fail("resolution scanned the graph"))
+
+    assert engine.fuzzy.containing("REDIS") == ["cache:redis-main", "service:redis-consumer"]
+    # Shorter than a trigram: a scan of the index's terms
+    assert engine.fuzzy.containing("db") == ["database:users-db"]
+    assert engine._resolve_node_id("db") == "database:users-db"
+    assert engine._resolve_node_id("orders") == "service:order-service"
+    assert engine._resolve_node_id("service:consumer") == "service:redis-consumer"
+    assert engine._resolve_node_id("inventory-service-v2") is None
+
+    # The fragment as given wins over the one without its trailing "s"
+    assert engine._resolve_node_id("blogs") == "service:blogs-frontend-long"
+    assert engine._resolve_node_id("blog") == "service:blog-archive"
+
+    missing = engine.blast_radius("user-dbx-replica")
+    assert missing["error"] == "Node not found: user-dbx-replica" and missing["candidates"] == []
+    assert engine.single_points_of_failure("order-servixe-x")["candidates"] == [
+        {"id": "service:order-service", "distance": 3}]
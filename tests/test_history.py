@@ -0,0 +1,59 @@
+import os
+import pytest
+from connectors.base import Edge, Node
+from graph.history import GraphHistory
+from graph.query import QueryEngine
+from graph.storage import GraphStorage
+
+def _build(storage, services):
+    for name in services:
+        storage.add_node(Node(f"service:{name}", "service", name, {"team": f"{name}-team"}))
+        storage.add_edge(Edge(name, "depends_on", f"service:{name}", "database:payments-db"))
+    storage.add_node(Node("database:payments-db", "database", "payments-db"))
+
+def test_versions_store_deltas_and_answer_as_of(tmp_path):
+    history = GraphHistory(str(tmp_path / "history"), cache_size=2)
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    engine = QueryEngine(storage, history=history)
+
+    _build(storage, ["orders", "payments"] + [f"filler-{i}" for i in range(30)])
+    first = history.record(storage)
+    assert first["kind"] == "checkpoint" and history.record(storage) == first  # unchanged: no new version
+
+    _build(storage, ["checkout"])
+    storage.delete_node("service:orders")
+    second = history.record(storage)
+    assert second["kind"] == "delta" and second["changes"] == 3
+    assert second["bytes"] < first["bytes"] / 5  # grows with the change, not the graph
+
+    def dependents(**kwargs):
+        return sorted(n["id"] for n in engine.upstream("payments-db", **kwargs))
+
+    assert "service:checkout" in dependents() and "service:orders" not in dependents()
+    assert "service:orders" in dependents(as_of=1) and "service:checkout" not in dependents(as_of=1)
+    assert dependents(as_of=-1) == dependents(as_of=2) == dependents()
+    assert engine.blast_radius("payments-db", as_of=1)["summary"]["upstream_count"] == 32
+    assert engine.get_owner("orders", as_of=first["at"]) == "orders-team"
+    assert history.stats()["hits"] >= 2 and sorted(history.stats()["cached"]) == [1, 2]
+
+    with pytest.raises(ValueError):
+        engine.upstream("payments-db", as_of=7)
+    with pytest.raises(ValueError):
+        engine.upstream("payments-db", as_of="1999-01-01")
+
+def test_checkpoints_bound_the_delta_chain_and_survive_reopen(tmp_path):
+    directory = str(tmp_path / "history")
+    history = GraphHistory(directory, checkpoint_ratio=0.2)
+    storage = GraphStorage(persistence_file=None)
+    _build(storage, [f"svc-{i}" for i in range(10)])
+    for i in range(12):
+        storage.add_node(Node(f"service:svc-{i % 10}", "service", f"svc-{i % 10}", {"release": i}))
+        history.record(storage)
+    kinds = [e["kind"] for e in history.versions()]
+    assert kinds[0] == "checkpoint" and "delta" in kinds and kinds.count("checkpoint") > 1
+    assert not os.path.exists(str(tmp_path / "graph.json"))  # in-memory storage writes nothing
+
+    reopened = GraphHistory(directory)
+    for entry in reopened.versions():
+        node = reopened.engine(entry["version"]).get_node(f"service:svc-{(entry['version'] - 1) % 10}")
+        assert node["release"] == entry["version"] - 1
@@ -0,0 +1,126 @@
+import os
+import shutil
+import threading
+from connectors.base import Node
+from graph.loader import GraphLoader, SOURCES_KEY, build, default_sources, is_fresh
+from graph.storage import GraphStorage
+
+def _estate(tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(os.path.join(os.getcwd(), "data"), data_dir)
+    return lambda: default_sources(str(data_dir))
+
+def test_loader_reuses_fresh_snapshot_and_rebuilds_stale(tmp_path):
+    sources = _estate(tmp_path)
+    snapshot = str(tmp_path / "graph.json")
+
+    # No snapshot yet: built in the background, stamped with the sources
+    loader = GraphLoader(persistence_file=snapshot, sources=sources).start()
+    assert loader.wait(10) and loader.state == "ready"
+    assert "build_s" in loader.timings
+    assert loader.engine.get_owner("payment-service") == "payments-team"
+
+    loader = GraphLoader(persistence_file=snapshot, sources=sources).start()
+    assert loader.wait(10) and "build_s" not in loader.timings
+
+    with open(tmp_path / "data" / "teams.yaml", "a") as f:
+        f.write("\n# edited\n")
+    loader = GraphLoader(persistence_file=snapshot, sources=sources).start()
+    assert loader.wait(10) and "build_s" in loader.timings
+
+def test_connector_changes_make_the_snapshot_stale(tmp_path, monkeypatch):
+    from connectors import base
+    connectors, files = _estate(tmp_path)()
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    build(storage, connectors, files)
+    assert is_fresh(storage, files)
+    monkeypatch.setattr(base, "CONNECTOR_VERSION", base.CONNECTOR_VERSION + 1)
+    assert not is_fresh(storage, files)
+
+def test_source_fingerprint_survives_wal_replay(tmp_path):
+    connectors, files = _estate(tmp_path)()
+    snapshot = str(tmp_path / "graph.json")
+    storage = GraphStorage(persistence_file=snapshot, wal=True)
+    build(storage, connectors, files)
+    storage.close()
+
+    reopened = GraphStorage(persistence_file=snapshot, wal=True)
+    assert reopened.get_metadata(SOURCES_KEY) and is_fresh(reopened, files)
+
+def test_crashed_build_is_not_stamped_fresh(tmp_path):
+    connectors, files = _estate(tmp_path)()
+    snapshot = str(tmp_path / "graph.json")
+
+    storage = GraphStorage(persistence_file=snapshot, wal=True)
+
+    def add_edge(edge):
+        raise RuntimeError("crashed halfway through the build")
+    storage.add_edge = add_edge  # every node is already logged by now
+    try:
+        build(storage, connectors, files)
+    except RuntimeError:
+        pass
+    storage.close()
+    assert not is_fresh(GraphStorage(persistence_file=snapshot, wal=True), files)
+
+def test_loader_hot_reloads_new_snapshot(tmp_path):
+    snapshot = str(tmp_path / "graph.json")
+    writer = GraphStorage(persistence_file=snapshot)
+    writer.add_node(Node("service:a", "service", "a"))
+    writer.save()
+
+    loader = GraphLoader(persistence_file=snapshot, sources=None, watch_interval=0.02).start()
+    assert loader.wait(10) and loader.state == "ready"
+    swapped = threading.Event()
+    loader.on_reload("test", lambda old, new: swapped.set())
+    old = loader.engine
+
+    # Another process (build_graph.py) writes a new snapshot
+    writer.add_node(Node("service:b", "service", "b"))
+    writer.save()
+    assert swapped.wait(5)
+    loader.stop()
+
+    assert loader.engine is not old and loader.reloads == 1
+    assert loader.engine.storage.has_node("service:b")
+    assert loader.engine.storage.version > old.storage.version
+    # The old engine is untouched, so anything still running on it sees a consistent graph
+    assert not old.storage.has_node("service:b")
+    assert loader.last_reload["latency_s"] >= 0 and loader.last_reload["nodes"] == 2
+
+def test_reload_replays_the_mutation_log_and_closes_old_sqlite_storage(tmp_path):
+    snapshot = str(tmp_path / "graph.json")
+    writer = GraphStorage(persistence_file=snapshot, wal=True)
+    writer.add_node(Node("service:a", "service", "a"))
+    loader = GraphLoader(persistence_file=snapshot, sources=None).start()
+    assert loader.wait(10) and loader.engine.storage.has_node("service:a")
+    writer.add_node(Node("service:b", "service", "b"))
+    assert loader.reload() and loader.engine.storage.has_node("service:b")
+
+    # A record the writer is still appending is skipped, not cut off: only the writer repairs the log
+    with open(f"{snapshot}.wal", "ab") as f:
+        f.write(b'["n","service:c",{"ty')
+    size = os.path.getsize(f"{snapshot}.wal")
+    assert loader.reload() and not loader.engine.storage.has_node("service:c")
+    assert os.path.getsize(f"{snapshot}.wal") == size
+    with open(f"{snapshot}.wal", "ab") as f:
+        f.write(b'pe":"service"}]\n')
+    assert loader.reload() and loader.engine.storage.has_node("service:c")
+
+    # A full snapshot written without the log replaces it
+    plain = GraphStorage(persistence_file=snapshot)
+    plain.delete_node("service:b")
+    plain.save()
+    assert not os.path.exists(f"{snapshot}.wal")
+    assert loader.reload() and not loader.engine.storage.has_node("service:b")
+
+    loader = GraphLoader(backend="sqlite", persistence_file=str(tmp_path / "graph.db"), sources=None).start()
+    assert loader.wait(10)
+    old = loader.engine
+    closed = threading.Event()
+    old.storage.close = closed.set
+    assert loader.reload()
+    # Still referenced (an in-flight request): left open until released
+    assert not closed.is_set()
+    del old
+    assert closed.is_set()
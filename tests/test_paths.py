@@ -0,0 +1,67 @@
+import itertools
+import random
+import networkx as nx
+from graph.paths import bidirectional_shortest_path, find_paths, k_shortest_paths
+from graph.query import MAX_PATHS, QueryEngine
+from graph.storage import GraphStorage
+from connectors.base import Node, Edge
+
+def _random_graph(seed, n=40, m=120):
+    rng = random.Random(seed)
+    g = nx.DiGraph()
+    g.add_nodes_from(range(n))
+    while g.number_of_edges() < m:
+        g.add_edge(rng.randrange(n), rng.randrange(n))
+    return g
+
+def test_matches_networkx_on_random_graphs():
+    for seed in range(5):
+        g = _random_graph(seed)
+        succ, pred = g.successors, g.predecessors
+        for s, t in itertools.islice(itertools.permutations(range(40), 2), 0, 200, 7):
+            path = bidirectional_shortest_path(succ, pred, [s], [t])
+            if not nx.has_path(g, s, t):
+                assert path is None
+                continue
+            assert len(path) == nx.shortest_path_length(g, s, t) + 1
+            assert all(g.has_edge(a, b) for a, b in zip(path, path[1:]))
+
+            expected = [len(p) for p in itertools.islice(nx.shortest_simple_paths(g, s, t), 4)]
+            assert [len(p) for p in k_shortest_paths(succ, pred, s, t, 4)] == expected
+
+def test_multi_endpoint_and_max_length():
+    g = nx.DiGraph([("a", "x"), ("x", "y"), ("y", "db"), ("b", "db"), ("c", "z")])
+    succ, pred = g.successors, g.predecessors
+    assert find_paths(succ, pred, ["a", "b", "c"], ["db"]) == [["b", "db"]]
+    assert find_paths(succ, pred, ["a", "b"], ["db"], k=3) == [["b", "db"], ["a", "x", "y", "db"]]
+    assert find_paths(succ, pred, ["a"], ["db"], max_length=2) == []
+
+def test_query_engine_paths_with_edge_types(tmp_path):
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    for name in ("gw", "svc", "db"):
+        storage.add_node(Node(f"service:{name}", "service", name))
+    storage.add_edge(Edge("1", "calls", "service:gw", "service:svc"))
+    storage.add_edge(Edge("2", "connects_to", "service:svc", "service:db"))
+    storage.add_edge(Edge("3", "depends_on", "service:gw", "service:db"))
+    engine = QueryEngine(storage)
+
+    assert engine.path("gw", "db") == ["service:gw", "service:db"]
+    assert engine.paths("gw", "db", k=5) == [["service:gw", "service:db"],
+                                             ["service:gw", "service:svc", "service:db"]]
+    assert engine.paths("gw", "db", edge_types=["calls", "connects_to"]) == [
+        ["service:gw", "service:svc", "service:db"]]
+
+def test_paths_k_is_clamped_and_tolerates_bad_values(tmp_path):
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    for name in ["gw", "db"] + [f"m{i}" for i in range(15)]:
+        storage.add_node(Node(f"service:{name}", "service", name))
+    for i in range(15):
+        storage.add_edge(Edge(f"a{i}", "calls", "service:gw", f"service:m{i}"))
+        storage.add_edge(Edge(f"b{i}", "calls", f"service:m{i}", "service:db"))
+    engine = QueryEngine(storage)
+
+    assert len(engine.paths("gw", "db", k=10 ** 9)) == MAX_PATHS
+    assert len(engine.paths("gw", "db", k="3")) == 3
+    assert len(engine.paths("gw", "db", k="several")) == 1
+    assert engine.paths("gw", "db", k=3, max_length="1") == []
+    assert len(engine.paths("gw", "db", k=3, max_length="a few")) == 3
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from telemetry.profiling import Profiler
+from graph.storage import GraphStorage
+from connectors.base import Node
+
+def _engine(profiler, storage):
+    class Engine:
+        def __init__(self):
+            self.storage = storage
+
+        @profiler.profiled("query.lookup")
+        def lookup(self, node_id, depth=None):
+            return sum(range(10_000))
+
+        @profiler.profiled("query.outer")
+        def outer(self, node_id):
+            return self.lookup(node_id)
+    return Engine()
+
+def test_slowest_calls_are_kept_without_profiling(tmp_path):
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    profiler = Profiler(keep_slowest=3)
+    engine = _engine(profiler, storage)
+    for i in range(10):
+        engine.lookup(f"svc-{i}", depth=i)
+
+    slowest = profiler.slowest()
+    assert len(slowest) == 3
+    assert slowest[0]["duration_ms"] >= slowest[-1]["duration_ms"]
+    assert slowest[0]["graph_version"] == storage.version and slowest[0]["profile"] is None
+    assert slowest[0]["params"][1].startswith("depth=")
+
+def test_cprofile_and_sampling_write_per_call_files(tmp_path):
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    storage.add_node(Node("service:a", "service", "a"))
+    for mode in ("cprofile", "sample"):
+        directory = str(tmp_path / mode)
+        profiler = Profiler(mode=mode, directory=directory, interval=0.0001)
+        engine = _engine(profiler, storage)
+        engine.outer("service:a")
+
+        # Only the outermost call is profiled; both are recorded
+        names = [call["name"] for call in profiler.slowest()]
+        assert sorted(names) == ["query.lookup", "query.outer"]
+        files = sorted(os.listdir(directory))
+        assert len(files) == 2 and all("query.outer" in f for f in files)
+        report = open(os.path.join(directory, next(f for f in files if f.endswith(".txt")))).read()
+        assert report.startswith("query.outer: ")
+        if mode == "cprofile":
+            assert "calls" in report and "allocations: net" in report
+
+        path = profiler.dump_slowest()
+        assert json.load(open(path))[0]["graph_version"] == storage.version
+        profiler.disable()
+
+def test_overlapping_profiled_calls_dont_interfere(tmp_path):
+    profiler = Profiler(mode="cprofile", directory=str(tmp_path / "profiles"))
+    assert tracemalloc.is_tracing()
+    errors = []
+
+    @profiler.profiled("query.sleep")
+    def sleep(seconds):
+        time.sleep(seconds)
+
+    def run(seconds):
+        try:
+            sleep(seconds)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(s,)) for s in (0.2, 0.5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    calls = profiler.slowest()
+    # Both recorded; only one profiled, since they overlapped
+    assert len(calls) == 2 and sum(1 for c in calls if c["profile"]) == 1
+    profiler.disable()
+    assert not tracemalloc.is_tracing()
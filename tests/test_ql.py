@@ -0,0 +1,101 @@
+import pytest
+from connectors.base import Edge, Node
+from graph.query import QueryEngine
+from graph.sqlite_storage import SQLiteGraphStorage
+from graph.storage import GraphStorage
+
+# gateway -> orders -> orders-db (orders-team), orders -> ledger -> ledger-db (platform-team),
+# gateway -> users -> users-db (identity-team)
+NODES = [
+    Node("service:gateway", "service", "gateway", {"team": "platform-team"}),
+    Node("service:orders", "service", "orders", {"team": "orders-team"}),
+    Node("service:ledger", "service", "ledger", {"team": "platform-team"}),
+    Node("service:users", "service", "users"),
+    Node("database:orders-db", "database", "orders-db", {"team": "orders-team"}),
+    Node("database:ledger-db", "database", "ledger-db", {"team": "platform-team"}),
+    Node("database:users-db", "database", "users-db"),
+    Node("team:identity-team", "team", "identity-team"),
+]
+EDGES = [
+    Edge("1", "calls", "service:gateway", "service:orders"),
+    Edge("2", "calls", "service:gateway", "service:users"),
+    Edge("3", "calls", "service:orders", "service:ledger"),
+    Edge("4", "depends_on", "service:orders", "database:orders-db"),
+    Edge("5", "depends_on", "service:ledger", "database:ledger-db"),
+    Edge("6", "depends_on", "service:users", "database:users-db"),
+    Edge("7", "owns", "team:identity-team", "service:users"),
+    Edge("8", "owns", "team:identity-team", "database:users-db"),
+]
+
+@pytest.fixture(params=["networkx", "sqlite"])
+def engine(request, tmp_path):
+    if request.param == "sqlite":
+        storage = SQLiteGraphStorage(persistence_file=str(tmp_path / "graph.db"))
+    else:
+        storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    for node in NODES:
+        storage.add_node(node)
+    for edge in EDGES:
+        storage.add_edge(edge)
+    return QueryEngine(storage)
+
+def _ids(result):
+    return sorted(n["id"] for n in result["nodes"])
+
+def test_compound_query_uses_indexes_and_filters_in_traversal(engine):
+    result = engine.query([{"start": "gateway"}, {"traverse": "downstream"},
+                           {"filter": {"type": "database", "team": {"not": "platform-team"}}}])
+    assert _ids(result) == ["database:orders-db", "database:users-db"]
+    # type=database became the traversal's candidate set; the owner check runs as nodes are found
+    assert result["plan"] == ["seed named nodes $0", "expand downstream, unbounded, emit if team!=$1",
+                              "  candidates", "    index scan type=$2"]
+
+    grouped = engine.query([{"match": {"type": "database"}}, {"group_by": "team"}])
+    assert {team: [n["id"] for n in nodes] for team, nodes in grouped["groups"].items()} == {
+        "orders-team": ["database:orders-db"], "platform-team": ["database:ledger-db"],
+        "identity-team": ["database:users-db"]}
+
+def test_via_prunes_and_intersect_and_limit(engine):
+    # Nothing is reached through platform-team services, so ledger-db is pruned with ledger
+    pruned = engine.query([{"start": "gateway"},
+                           {"traverse": {"direction": "downstream", "via": {"team": {"not": "platform-team"}}}}])
+    assert "service:ledger" not in _ids(pruned) and "database:ledger-db" not in _ids(pruned)
+
+    both = engine.query([{"start": "orders-db"}, {"traverse": "upstream"},
+                         {"intersect": [{"start": "users-db"}, {"traverse": "upstream"}]}])
+    assert _ids(both) == ["service:gateway"]
+
+    nearest = engine.query([{"start": "gateway"}, {"traverse": "downstream"}, {"limit": 2}])
+    assert _ids(nearest) == ["service:orders", "service:users"]
+    assert "stop after $1" in nearest["plan"][1]
+
+    edges = engine.query([{"start": "gateway"}, {"traverse": {"direction": "downstream", "edge_types": ["calls"]}}])
+    assert _ids(edges) == ["service:ledger", "service:orders", "service:users"]
+    single = engine.query([{"start": "gateway"}, {"traverse": {"direction": "downstream", "edge_types": "calls"}}])
+    assert _ids(single) == _ids(edges)
+
+def test_null_criteria_agree_between_match_and_filter(engine):
+    engine.storage.add_node(Node("service:legacy", None, "legacy"))
+    everything = [{"match": {"name": {"not": None}}}]
+    for criteria in ({"type": None}, {"namespace": None}, {"type": "service", "namespace": None}):
+        matched = engine.query([{"match": criteria}])
+        filtered = engine.query(everything + [{"filter": criteria}])
+        assert _ids(matched) == _ids(filtered), criteria
+    assert _ids(engine.query([{"match": {"type": None}}])) == ["service:legacy"]
+    # The null plan is not the one cached for a non-null value of the same key
+    assert _ids(engine.query([{"match": {"type": "team"}}])) == ["team:identity-team"]
+
+def test_plans_are_cached_by_shape_and_bad_queries_rejected(engine):
+    engine.query([{"match": {"type": "service", "team": "orders-team"}}])
+    result = engine.query([{"match": {"type": "database", "team": "platform-team"}}])
+    assert _ids(result) == ["database:ledger-db"]
+    assert engine.plans.stats() == {"plans": 1, "hits": 1, "misses": 1}
+
+    for bad in ([], [{"traverse": "downstream"}], [{"start": "gateway"}, {"traverse": "sideways"}],
+                [{"start": "gateway"}, {"group_by": "team"}, {"filter": {"type": "service"}}],
+                [{"match": {"type": {"like": "d%"}}}], [{"start": "gateway"}, {"limit": -1}],
+                [{"match": {"type": ["service"]}}], [{"match": {"team": {"in": [["orders-team"]]}}}],
+                [{"start": "gateway"}, {"traverse": {"direction": "downstream", "edge_types": 3}}]):
+        with pytest.raises(ValueError):
+            engine.query(bad)
+    assert engine.query([{"start": "nonexistent-thing-xyz"}])["unresolved"] == ["nonexistent-thing-xyz"]
@@ -74,3 +74,31 @@ def test_get_owner(test_graph):
 def tearDown():
     if os.path.exists("test_query_graph.json"):
         os.remove("test_query_graph.json")
+
+def test_get_nodes_filters(test_graph):
+    storage = test_graph.storage
+    storage.add_node(Node("E", "service", "Service E", {"team": "Team B", "namespace": "ecommerce"}))
+
+    ids = lambda nodes: sorted(n['id'] for n in nodes)
+    assert ids(test_graph.get_nodes("service", team="Team B")) == ["B", "E"]
+    assert ids(test_graph.get_nodes("service", team="Team B", namespace="ecommerce")) == ["E"]
+    assert ids(test_graph.get_nodes(team="Team A")) == ["A", "D"]
+    # Non-indexed property falls back to checking the candidates
+    assert ids(test_graph.get_nodes("service", name="Service A")) == ["A"]
+
+    # Indexes follow upserts and deletes
+    storage.add_node(Node("E", "service", "Service E", {"team": "Team A"}))
+    assert ids(test_graph.get_nodes("service", team="Team B")) == ["B"]
+    storage.delete_node("A")
+    assert ids(test_graph.get_nodes(team="Team A")) == ["D", "E"]
+
+def test_ownership_index(test_graph):
+    radius = test_graph.blast_radius("C")
+    assert radius['summary']['affected_teams'] == ["Team A", "Team B"]
+
+    assert sorted(n['id'] for n in test_graph.owned_by("Team A")) == ["A", "D"]
+    # A team known only through an 'owns' edge
+    test_graph.storage.add_node(Node("E", "service", "Service E"))
+    test_graph.storage.add_edge(Edge("6", "owns", "Team B", "E"))
+    assert test_graph.get_owner("E") == "Team B"
+    assert test_graph.get_owner("Team A") == "Unknown"
@@ -0,0 +1,62 @@
+import numpy as np
+from graph.storage import GraphStorage
+from graph.query import QueryEngine
+from graph.scenarios import DEGRADED, DOWN, OK, ScenarioModel
+from connectors.base import Node, Edge
+
+def _engine(tmp_path):
+    # gateway -calls-> orders (3 replicas) -connects_to-> orders-db
+    #                  orders -connects_to-> redis;  worker <-calls-> orders (cycle)
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    for node in [Node("service:gateway", "service", "gateway", {"team": "edge"}),
+                 Node("service:orders", "service", "orders", {"team": "orders", "replicas": 3}),
+                 Node("service:worker", "service", "worker", {"team": "orders"}),
+                 Node("database:orders-db", "database", "orders-db"),
+                 Node("cache:redis", "cache", "redis"),
+                 Node("team:orders", "team", "orders")]:
+        storage.add_node(node)
+    for i, (kind, source, target) in enumerate([
+            ("calls", "service:gateway", "service:orders"),
+            ("connects_to", "service:orders", "database:orders-db"),
+            ("connects_to", "service:orders", "cache:redis"),
+            ("calls", "service:worker", "service:orders"),
+            ("depends_on", "service:orders", "service:worker"),
+            ("owns", "team:orders", "service:orders")]):
+        storage.add_edge(Edge(str(i), kind, source, target))
+    return QueryEngine(storage)
+
+def test_what_if_is_replica_aware_and_follows_edge_rules(tmp_path):
+    engine = _engine(tmp_path)
+
+    result = engine.what_if([{"node_id": "redis"}])
+    # Hard dependency takes orders down (and its cycle partner via depends_on); callers are degraded
+    assert [n["id"] for n in result["down"]] == ["cache:redis", "service:orders"]
+    assert [n["id"] for n in result["degraded"]] == ["service:gateway", "service:worker"]
+
+    result = engine.what_if({"service:orders": {"replicas_lost": 2}})
+    assert result["failures"]["service:orders"]["replicas"] == 3
+    assert result["down"] == []
+    assert [n["id"] for n in result["degraded"]] == ["service:gateway", "service:orders", "service:worker"]
+    assert engine.what_if({"service:orders": {"replicas_lost": 3}})["summary"]["down_count"] == 1
+    assert engine.what_if(["nope"]) == {}
+
+def test_batches_match_single_scenarios_and_score(tmp_path):
+    model = ScenarioModel(_engine(tmp_path).storage)
+    states, _ = model.random_scenarios(130, failures=2, seed=1)
+    batched = model.propagate(states.copy())
+    single = np.vstack([model.propagate(states[i:i + 1].copy()) for i in range(len(states))])
+    assert (batched == single).all()
+    assert set(np.unique(batched)) <= {OK, DEGRADED, DOWN}
+
+    report = model.resilience(scenarios=500, failures=1, batch_size=64)
+    assert 0 < report["score"] < 1
+    assert report["most_damaging"][0]["id"] in ("database:orders-db", "cache:redis")
+    assert all(row["id"] != "team:orders" for row in report["most_often_down"])
+
+def test_random_failures_are_distinct_even_when_they_cover_the_pool(tmp_path):
+    model = ScenarioModel(_engine(tmp_path).storage)
+    runtime = int(model.runtime.sum())
+    for failures in (2, runtime - 1, runtime, runtime + 10):
+        failed, _ = model.random_failures(300, failures=failures, seed=3)
+        assert failed.shape == (300, min(failures, runtime))
+        assert all(len(set(row)) == len(row) for row in failed.tolist())
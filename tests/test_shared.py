@@ -0,0 +1,79 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+from graph.query import QueryEngine
+from graph.shared import SharedQueryPool, write_snapshot
+from graph.storage import GraphStorage
+from connectors.base import Node, Edge
+from serve_graph import ThreadingHTTPServer, make_handler
+
+def _ids(nodes):
+    return sorted(node["id"] for node in nodes)
+
+def test_worker_pool_answers_from_snapshot_and_picks_up_rewrites(tmp_path):
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    for name in ("gateway", "orders", "orders-db"):
+        storage.add_node(Node(f"service:{name}", "service", name, {"team": "shop"}))
+    storage.add_edge(Edge("1", "calls", "service:gateway", "service:orders"))
+    storage.add_edge(Edge("2", "connects_to", "service:orders", "service:orders-db"))
+    snapshot = write_snapshot(storage, str(tmp_path / "graph.csr"))
+    engine = QueryEngine(storage)
+
+    with SharedQueryPool(snapshot, workers=2) as pool:
+        # The workers run QueryEngine itself, so answers match the in-process engine
+        assert _ids(pool.query("downstream", "gateway")) == ["service:orders", "service:orders-db"]
+        assert [_ids(nodes) for nodes in pool.map("upstream", [("orders-db",), ("orders-db", 1), ("missing",)])] == [
+            ["service:gateway", "service:orders"], ["service:orders"], []]
+        radius, expected = pool.query("blast_radius", "orders-db"), engine.blast_radius("orders-db")
+        assert radius["summary"] == expected["summary"] and radius["impact_analysis"] == expected["impact_analysis"]
+        assert _ids(radius["raw_graph_context"]["upstream_nodes"]) == ["service:gateway", "service:orders"]
+        assert pool.query("path", "gateway", "ordrs-db") == ["service:gateway", "service:orders", "service:orders-db"]
+        assert pool.query("paths", "gateway", "orders-db", k=2) == engine.paths("gateway", "orders-db", k=2)
+        assert pool.query("get_owner", "orders") == "shop"
+
+        # build_graph.py replaces the snapshot: workers reopen it on their next query
+        storage.add_node(Node("service:cache", "service", "cache"))
+        storage.add_edge(Edge("3", "calls", "service:orders-db", "service:cache"))
+        write_snapshot(storage, snapshot)
+        assert "service:cache" in _ids(pool.query("downstream", "gateway"))
+
+        # Serving mode: the same pool behind serve_graph.py's HTTP handler
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(pool))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/query"
+            body = json.dumps({"tool": "get_owner", "params": {"node_id": "cache"}}).encode()
+            with urllib.request.urlopen(urllib.request.Request(url, data=body)) as response:
+                assert json.loads(response.read()) == {"result": "Unknown"}
+            body = json.dumps({"tool": "delete_node", "params": {"node_id": "cache"}}).encode()
+            try:
+                urllib.request.urlopen(urllib.request.Request(url, data=body))
+                assert False, "non-query tools are rejected"
+            except urllib.error.HTTPError as e:
+                assert e.code == 400
+        finally:
+            server.shutdown()
+            server.server_close()
+
+def test_server_answers_500_when_a_worker_fails():
+    class FailingPool:
+        workers = 1
+
+        def query(self, op, **params):
+            raise KeyError("service:gone")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(FailingPool()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/query"
+        body = json.dumps({"tool": "upstream", "params": {"node_id": "gone"}}).encode()
+        try:
+            urllib.request.urlopen(urllib.request.Request(url, data=body))
+            assert False, "the failure is reported"
+        except urllib.error.HTTPError as e:
+            assert e.code == 500 and json.loads(e.read()) == {"error": "KeyError: 'service:gone'"}
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,215 @@
+import json
+import os
+from graph.storage import GraphStorage
+from connectors.base import Node, Edge
+
+def _populate(storage, n=50):
+    for i in range(n):
+        storage.add_node(Node(f"service:s{i}", "service", f"s{i}", {"team": "t"}))
+    for i in range(1, n):
+        storage.add_edge(Edge(f"e{i}", "calls", f"service:s{i - 1}", f"service:s{i}"))
+
+def test_save_is_atomic_and_roundtrips(tmp_path):
+    path = str(tmp_path / "graph.json")
+    storage = GraphStorage(persistence_file=path)
+    _populate(storage)
+    storage.save()
+
+    # No temp files left behind, and the snapshot keeps the legacy "links" key
+    assert os.listdir(tmp_path) == ["graph.json"]
+    with open(path) as f:
+        assert "links" in json.load(f)
+
+    reloaded = GraphStorage(persistence_file=path)
+    assert reloaded.graph.number_of_nodes() == 50
+    assert reloaded.graph.number_of_edges() == 49
+
+def test_load_keeps_graph_on_corrupt_snapshot(tmp_path):
+    path = str(tmp_path / "graph.json")
+    storage = GraphStorage(persistence_file=path)
+    _populate(storage, 3)
+    with open(path, "w") as f:
+        f.write('{"nodes": [')
+    storage.load()
+    assert storage.graph.number_of_nodes() == 3
+
+def test_write_behind_coalesces_saves(tmp_path):
+    path = str(tmp_path / "graph.json")
+    storage = GraphStorage(persistence_file=path, write_behind=0.05)
+    _populate(storage, 200)
+    storage.flush()
+
+    assert storage.save_count == 1
+    assert GraphStorage(persistence_file=path).graph.number_of_nodes() == 200
+
+    storage.delete_node("service:s0")
+    storage.close()
+    assert storage.save_count == 2
+    assert GraphStorage(persistence_file=path).graph.number_of_nodes() == 199
+
+def test_mutation_log_replay_and_compaction(tmp_path):
+    path = str(tmp_path / "graph.json")
+    storage = GraphStorage(persistence_file=path, wal=True)
+    _populate(storage, 10)
+    storage.compact()
+    assert os.path.getsize(path + ".wal") == 0
+
+    # Re-applying unchanged upserts writes nothing; a real change is one record
+    _populate(storage, 10)
+    assert os.path.getsize(path + ".wal") == 0
+    storage.add_node(Node("service:s1", "service", "s1", {"team": "other"}))
+    storage.delete_node("service:s9")
+    with open(path + ".wal") as f:
+        assert len(f.readlines()) == 2
+
+    # A torn trailing record (crash mid-append) is ignored on replay
+    with open(path + ".wal", "a") as f:
+        f.write('["n","service:torn",{"ty')
+    reloaded = GraphStorage(persistence_file=path, wal=True)
+    assert reloaded.graph.nodes["service:s1"]["team"] == "other"
+    assert not reloaded.graph.has_node("service:s9")
+    assert not reloaded.graph.has_node("service:torn")
+
+def test_close_releases_the_log_and_a_plain_save_keeps_logged_changes(tmp_path):
+    from graph.loader import open_storage
+    path = str(tmp_path / "graph.json")
+    writer = GraphStorage(persistence_file=path, wal=True)
+    writer.add_node(Node("service:logged", "service", "logged"))
+    log = writer._log
+    writer.close()
+    assert log._file.closed and writer._log is None
+
+    # build_graph.py without --wal: the log is replayed before the full snapshot replaces it
+    plain = open_storage("json", path)
+    plain.save()
+    assert not os.path.exists(path + ".wal")
+    assert GraphStorage(persistence_file=path).has_node("service:logged")
+
+def test_mutation_log_auto_compacts(tmp_path):
+    path = str(tmp_path / "graph.json")
+    storage = GraphStorage(persistence_file=path, wal=True, compact_threshold=2048)
+    _populate(storage, 100)
+    assert storage.save_count > 0
+    assert os.path.getsize(path + ".wal") < 2048
+    assert GraphStorage(persistence_file=path, wal=True).graph.number_of_nodes() == 100
+
+def _engine_results(engine):
+    ids = lambda nodes: sorted(n['id'] for n in nodes)
+    return {
+        "down": ids(engine.downstream("service:s0")),
+        "up": ids(engine.upstream("service:s5")),
+        "down_2": ids(engine.downstream("service:s8", depth=2)),
+        "up_3": ids(engine.upstream("service:s5", depth=3)),
+        "path": engine.path("service:s0", "service:s5"),
+        "types": ids(engine.get_nodes("service")),
+        "owner": engine.get_owner("s3"),
+        "node": engine.get_node("service:s2"),
+    }
+
+def test_sqlite_backend_matches_networkx(tmp_path):
+    from graph.query import QueryEngine
+    from graph.sqlite_storage import SQLiteGraphStorage
+
+    nx_storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    sql_storage = SQLiteGraphStorage(persistence_file=str(tmp_path / "graph.db"))
+    for storage in (nx_storage, sql_storage):
+        _populate(storage, 10)
+        # A cycle must not make the recursive CTE loop forever
+        storage.add_edge(Edge("back", "calls", "service:s9", "service:s3"))
+        storage.add_node(Node("team:t", "team", "t"))
+        storage.add_edge(Edge("own", "owns", "team:t", "service:s3"))
+        storage.save()
+
+    assert _engine_results(QueryEngine(sql_storage)) == _engine_results(QueryEngine(nx_storage))
+
+    sql_storage.close()
+    reopened = SQLiteGraphStorage(persistence_file=str(tmp_path / "graph.db"))
+    assert reopened.number_of_nodes() == nx_storage.number_of_nodes()
+    assert reopened.number_of_edges() == nx_storage.number_of_edges()
+
+def test_sqlite_find_nodes(tmp_path):
+    from graph.sqlite_storage import SQLiteGraphStorage
+    storage = SQLiteGraphStorage(persistence_file=str(tmp_path / "graph.db"))
+    _populate(storage, 5)
+    storage.add_node(Node("service:s1", "service", "s1", {"team": "u", "namespace": "ns"}))
+
+    assert [n['id'] for n in storage.find_nodes("service", team="u", namespace="ns")] == ["service:s1"]
+    assert len(storage.find_nodes("service", team="t")) == 4
+    assert storage.find_nodes("database", team="t") == []
+
+def test_node_records_are_shared_and_read_only(tmp_path):
+    import copy
+    import pytest
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    _populate(storage, 3)
+
+    record = storage.get_node("service:s1")
+    assert storage.get_node("service:s1") is record
+    assert storage.find_nodes("service", team="t")[1] is record
+    with pytest.raises(TypeError):
+        record["team"] = "x"
+    assert copy.deepcopy(record) == record
+
+    # An upsert replaces the record and starts a new version
+    version = storage.version
+    storage.add_node(Node("service:s1", "service", "s1", {"team": "x"}))
+    assert storage.version > version
+    assert storage.get_node("service:s1")["team"] == "x"
+    assert record["team"] == "t"
+
+def test_shared_snapshot_matches_networkx(tmp_path):
+    from graph.query import QueryEngine
+    from graph.shared import SharedGraph, write_snapshot
+
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    _populate(storage, 10)
+    storage.add_edge(Edge("back", "calls", "service:s9", "service:s3"))
+    storage.add_node(Node("team:t", "team", "t"))
+    storage.add_edge(Edge("own", "owns", "team:t", "service:s3"))
+
+    shared = SharedGraph(write_snapshot(storage, str(tmp_path / "graph.csr")))
+    assert _engine_results(QueryEngine(shared)) == _engine_results(QueryEngine(storage))
+    assert shared.shortest_path("service:s0", "service:s5") == QueryEngine(storage).path("service:s0", "service:s5")
+    assert shared.resolve("SERVICE:S4") == "service:s4" and shared.resolve("s7") == "service:s7"
+    assert shared.number_of_edges() == storage.number_of_edges()
+
+def test_save_snapshot_is_consistent_while_writers_continue(tmp_path, monkeypatch):
+    from graph import storage as storage_module
+    monkeypatch.setattr(storage_module, "SNAPSHOT_CHUNK", 10)
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    _populate(storage, 300)
+    expected = json.dumps(storage_module.node_link_data(storage.graph), sort_keys=True)
+
+    class MutateMidSnapshot:
+        """The storage lock, running writes at the snapshot's fifth lock hold (the lock is reentrant)."""
+        def __init__(self, lock):
+            self.lock, self.holds, self.done = lock, 0, False
+
+        def __enter__(self):
+            self.lock.acquire()
+            self.holds += 1
+            if self.holds == 5 and not self.done:
+                self.done = True
+                storage.add_node(Node("service:s299", "service", "renamed"))
+                storage.add_edge(Edge("new", "depends_on", "service:s250", "service:s251"))
+                storage.delete_node("service:s290")
+                storage.add_node(Node("service:late", "service", "late"))
+
+        def __exit__(self, *exc):
+            self.lock.release()
+
+    storage._lock = MutateMidSnapshot(storage._lock)
+    data, _ = storage._snapshot()
+    assert storage._lock.done
+    assert json.dumps(data, sort_keys=True) == expected
+    assert storage._preimages is None and storage.graph.nodes["service:s299"]["name"] == "renamed"
+
+def test_write_behind_registers_one_exit_hook(tmp_path, monkeypatch):
+    from graph import storage as storage_module
+    hooks = []
+    monkeypatch.setattr(storage_module.atexit, "register", lambda *args: hooks.append(args))
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"), write_behind=0.01)
+    for i in range(3):
+        storage.add_node(Node(f"service:s{i}", "service", f"s{i}"))
+        storage.close()  # the next mutation starts a new writer thread
+    assert len(hooks) == 1 and storage.save_count == 3
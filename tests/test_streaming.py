@@ -0,0 +1,37 @@
+import json
+from chat import streaming
+from chat.streaming import StreamStats, coalesce, decode_token, iter_tokens
+from telemetry.tracing import tracer
+
+def _line(token, **extra):
+    return json.dumps({"model": "llama3.1", "response": token, "done": False, **extra}).encode()
+
+def test_decode_token_matches_json_loads(monkeypatch):
+    monkeypatch.setattr(streaming, "orjson", None)
+    for token in ["Hello", " wörld", 'a "quoted" \\ token\n', "☃", ""]:
+        assert decode_token(_line(token)) == token
+        assert decode_token(_line(token).decode()) == token
+    # Key order differs / no response at all: falls back to json.loads
+    assert decode_token(b'{"done": true, "response" : "x"}') == "x"
+    assert decode_token(b'{"done": true, "context": [1, 2]}') == ""
+    assert list(iter_tokens([_line("a"), b"", _line(""), _line("b")])) == ["a", "b"]
+
+def test_coalesce_keeps_first_token_and_text(monkeypatch):
+    clock = iter(i * 0.001 for i in range(10_000))
+    monkeypatch.setattr(streaming.time, "perf_counter", lambda: next(clock))
+    tokens = [f"t{i} " for i in range(200)]
+    stats = StreamStats()
+    chunks = list(coalesce(iter(tokens), interval=0.05, max_bytes=10_000, stats=stats, name="test.stream"))
+
+    assert chunks[0] == tokens[0]
+    assert "".join(chunks) == "".join(tokens)
+    assert stats.tokens == 200 and stats.updates == len(chunks) < 20
+    assert stats.to_dict()["first_token_ms"] is not None
+    assert any(row["metric"] == "ekg_stream_updates_per_second" and row["call"] == "test.stream"
+               for row in tracer.stats())
+
+def test_coalesce_flushes_on_size():
+    tokens = ["x" * 100] * 50
+    chunks = list(coalesce(iter(tokens), interval=60, max_bytes=500))
+    assert "".join(chunks) == "".join(tokens)
+    assert all(len(chunk) <= 500 for chunk in chunks) and len(chunks) == 11
@@ -0,0 +1,54 @@
+import time
+from telemetry.tracing import Tracer, Histogram, SPAN_METRIC, TTFT_METRIC, TOKEN_RATE_METRIC
+
+def test_spans_nest_and_feed_histograms():
+    tracer = Tracer()
+
+    @tracer.traced("query.lookup")
+    def lookup():
+        return 42
+
+    with tracer.span("chat.request", tool="upstream"):
+        assert lookup() == 42
+        with tracer.span("llm.parse_intent"):
+            pass
+
+    trace = tracer.recent_traces()[0]
+    assert trace["name"] == "chat.request" and trace["attrs"] == {"tool": "upstream"}
+    assert [child["name"] for child in trace["children"]] == ["query.lookup", "llm.parse_intent"]
+    spans = {row["span"]: row for row in tracer.stats() if row["metric"] == SPAN_METRIC}
+    assert spans["query.lookup"]["count"] == 1 and spans["chat.request"]["errors"] == 0
+
+def test_histogram_rolling_percentiles():
+    histogram = Histogram((0.1, 1.0), window=100)
+    for i in range(1000):
+        histogram.observe(i / 1000)
+    summary = histogram.summary()
+    # Percentiles cover the last 100 samples only; totals cover everything
+    assert summary["count"] == 1000 and summary["p50"] >= 0.9
+    assert histogram.counts == [101, 899, 0]
+
+def test_stream_ttft_and_prometheus_export():
+    tracer = Tracer()
+
+    def tokens():
+        time.sleep(0.01)
+        yield from ["a", "b", "c"]
+
+    with tracer.span("boom"):
+        pass
+    try:
+        with tracer.span("boom"):
+            raise ValueError
+    except ValueError:
+        pass
+
+    assert "".join(tracer.instrument_stream(tokens(), "llm.stream")) == "abc"
+    stream = tracer.recent_traces()[0]
+    assert stream["attrs"]["tokens"] == 3 and stream["attrs"]["ttft_ms"] >= 10
+
+    text = tracer.to_prometheus()
+    assert f'{TTFT_METRIC}_count{{call="llm.stream"}} 1' in text
+    assert f'{TOKEN_RATE_METRIC}_count{{call="llm.stream"}} 1' in text
+    assert f'{SPAN_METRIC}_bucket{{span="boom",le="+Inf"}} 2' in text
+    assert 'ekg_span_errors_total{span="boom"} 1' in text
@@ -0,0 +1,51 @@
+import networkx as nx
+from chat.visualization import compute_layout, hierarchical_layout, spring_layout
+
+def _layered_graph():
+    g = nx.DiGraph()
+    g.add_edges_from([("gw", "a"), ("gw", "b"), ("a", "db"), ("b", "db"), ("b", "cache"), ("db", "a")])
+    g.add_node("orphan")
+    return g
+
+def test_layouts_cover_all_nodes_in_unit_box():
+    g = _layered_graph()
+    for layout in (spring_layout(g), hierarchical_layout(g), compute_layout(g)):
+        assert set(layout) == set(g.nodes)
+        assert all(-1.0 <= x <= 1.0 and -1.0 <= y <= 1.0 for x, y in layout.values())
+    # Deterministic, so cached positions are stable across processes
+    assert spring_layout(g) == spring_layout(g)
+
+def test_hierarchical_layout_ranks_follow_edges():
+    layout = hierarchical_layout(_layered_graph())
+    # The db <-> a cycle collapses to one rank below b; gw is on top
+    assert layout["gw"][1] < layout["b"][1] < layout["a"][1] == layout["db"][1]
+    assert len({layout[n] for n in layout}) == len(layout)
+
+def test_cluster_and_ego_views_stay_bounded(tmp_path):
+    from graph.storage import GraphStorage
+    from graph.query import QueryEngine
+    from connectors.base import Node, Edge
+    from chat.visualization import cluster_view, ego_view
+
+    storage = GraphStorage(persistence_file=str(tmp_path / "graph.json"))
+    for i in range(30):
+        storage.add_node(Node(f"service:s{i}", "service", f"s{i}", {"team": f"t{i % 3}"}))
+    for i in range(1, 30):
+        storage.add_edge(Edge(f"e{i}", "calls", f"service:s{i - 1}", f"service:s{i}"))
+    engine = QueryEngine(storage)
+
+    view = cluster_view(engine)
+    assert sorted(view.nodes) == ["cluster:t0", "cluster:t1", "cluster:t2"]
+    assert view["cluster:t0"]["cluster:t1"]["count"] == 10
+
+    # Expanding t0 (10 members) with room for 3 more nodes shows 3 of them plus a remainder
+    view = cluster_view(engine, expanded=["t0"], max_nodes=6)
+    assert view.number_of_nodes() == 6
+    assert view.nodes["cluster:t0"]["members"] == 7
+
+    view = ego_view(engine, "s10", hops=2)
+    assert sorted(view.nodes) == sorted(f"service:s{i}" for i in range(8, 13))
+    assert view.nodes["service:s10"]["focus"]
+    # A radius that does not fit falls back to the largest one that does
+    view = ego_view(engine, "s10", hops=5, max_nodes=7)
+    assert view.graph["hops"] == 3 and view.number_of_nodes() == 7